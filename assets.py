@@ -0,0 +1,130 @@
+# assets.py
+
+"""
+Fichiers statiques versionnés par empreinte, cache long et pré-compression.
+
+`flask build-assets` copie chaque fichier de static/ (hors photos de profil)
+sous un nom contenant l'empreinte de son contenu (css/main.3f2a9c1d0b7e.css),
+génère ses variantes .gz (et .br si le module brotli est installé), puis
+écrit static/manifest.json.
+
+Au démarrage, le manifeste est chargé : url_for('static', ...) renvoie alors
+le nom versionné, servi avec `Cache-Control: immutable` et un max-age d'un an.
+Les photos de profil ont déjà des noms qui ne changent jamais (aléatoires ou
+issus de l'empreinte, voir images.py) et reçoivent le même en-tête.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : seules les variantes .gz sont produites
+    brotli = None
+
+
+MANIFEST_NAME = 'manifest.json'
+
+# Fichiers qui ne sont jamais versionnés (photos, manifeste, variantes déjà produites)
+_SKIPPED_DIRS = ('profile_pics',)
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+_COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Du plus efficace au moins efficace
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _compress(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build(static_folder):
+    """Versionne et pré-compresse les fichiers statiques ; renvoie le manifeste."""
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.relpath(os.path.join(root, d), static_folder) not in _SKIPPED_DIRS]
+        for name in files:
+            if name == MANIFEST_NAME or name.endswith(('.gz', '.br')) or _HASHED_NAME.search(name):
+                continue
+            path = os.path.join(root, name)
+            logical = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{_file_digest(path)}{ext}'
+
+            hashed_path = os.path.join(static_folder, hashed)
+            if not os.path.exists(hashed_path):
+                shutil.copyfile(path, hashed_path)
+            if ext in _COMPRESSIBLE:
+                _compress(hashed_path)
+            manifest[logical] = hashed
+
+    with open(os.path.join(static_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_immutable(filename):
+    return bool(_HASHED_NAME.search(filename)) or filename.startswith('profile_pics/')
+
+
+def init_app(app):
+    """Branche le manifeste sur url_for et remplace la vue 'static'."""
+    app.extensions['asset_manifest'] = load_manifest(app.static_folder)
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            manifest = app.extensions['asset_manifest']
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+    def serve_static(filename):
+        response = None
+        # Variante pré-compressée si le client l'accepte
+        accepted = request.accept_encodings
+        if filename.endswith(_COMPRESSIBLE):
+            for encoding, suffix in _ENCODINGS:
+                if accepted[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+                    response = send_from_directory(
+                        app.static_folder, filename + suffix,
+                        mimetype=mimetypes.guess_type(filename)[0],
+                    )
+                    response.headers['Content-Encoding'] = encoding
+                    break
+            response = response or send_from_directory(app.static_folder, filename)
+            response.vary.add('Accept-Encoding')
+        else:
+            response = send_from_directory(app.static_folder, filename)
+
+        if _is_immutable(filename) and filename != 'profile_pics/' + app.config['PROFILE_PIC_PLACEHOLDER']:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = serve_static
@@ -0,0 +1,106 @@
+# benchmarks/bench_chat.py
+
+"""
+Benchmark du chat sur une conversation de 10 000 messages.
+
+Usage : python benchmarks/bench_chat.py [--messages 10000]
+
+Compare l'ancien rendu de tout l'historique avec la page keyset de /chat,
+la page "plus anciens" en milieu de conversation et le rafraîchissement JSON
+/chat/<id>/messages?after=<id>.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_chat.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask import render_template  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from forms import MessageForm  # noqa: E402
+from models import User, Match, Message, conversation_key  # noqa: E402
+import conversations  # noqa: E402
+
+app = create_app()
+
+
+def seed(n_messages):
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.local', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1), 'image_file': 'default.jpg'}
+        for i in (1, 2)
+    ])
+    db.session.add(Match.create(1, 2))
+    start = datetime(2024, 1, 1)
+    db.session.execute(insert(Message), [
+        {'sender_id': 1 + i % 2, 'recipient_id': 2 - i % 2, 'body': f'Message numéro {i}',
+         'timestamp': start + timedelta(seconds=i), 'conversation_key': conversation_key(1, 2)}
+        for i in range(n_messages)
+    ])
+    db.session.commit()
+
+
+def bench(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(args.messages)
+        middle = Message.query.filter_by(body=f'Message numéro {args.messages // 2}').one()
+        middle_cursor = conversations.encode_cursor(middle)
+        last_id = db.session.query(db.func.max(Message.id)).scalar()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+
+    def legacy_full_history():
+        # Ancien chat() : tout l'historique puis rendu complet de chat.html
+        with app.test_request_context('/chat/2'):
+            app.login_manager._update_request_context_with_user(db.session.get(User, 1))
+            messages = Message.conversation(1, 2).order_by(Message.timestamp.asc()).all()
+            render_template('messaging/chat.html', recipient=db.session.get(User, 2),
+                            form=MessageForm(), messages=messages)
+
+    cases = [
+        ('ancien chat() (historique complet)', legacy_full_history),
+        ('GET /chat/2 (derniers messages)', lambda: client.get('/chat/2')),
+        ('GET /chat/2?before=<milieu>', lambda: client.get(f'/chat/2?before={middle_cursor}')),
+        ('GET /chat/2/messages?after=<dernier>', lambda: client.get(f'/chat/2/messages?after={last_id}')),
+        ('GET /chat/2/messages?after=<dernier-10>', lambda: client.get(f'/chat/2/messages?after={last_id - 10}')),
+    ]
+    print(f'Conversation de {args.messages} messages, page de {app.config["CHAT_PAGE_SIZE"]}')
+    print(f"{'cas':<42} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    for name, fn in cases:
+        fn()  # échauffement (compilation des templates)
+        p50, p95 = bench(fn, args.iterations)
+        print(f'{name:<42} | {p50:>9.2f} | {p95:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_db_concurrency.py
+
+"""
+Débit sous charge concurrente : profil SQLite 'default' contre 'production'.
+
+Usage : python benchmarks/bench_db_concurrency.py [--clients 8 16 32] [--seconds 10] [--mode processes]
+
+Pour chaque profil (DB_PROFILE) et chaque nombre de clients, un sous-processus
+crée une base SQLite temporaire, puis N clients (un utilisateur chacun ;
+processus forkés comme des workers gunicorn, ou threads) enchaînent pendant --seconds : 80 % de lectures (/feed, /inbox, /matches,
+/profile) et 20 % de swipes (un commit chacun). On relève le débit, la
+latence des lectures et des écritures, et les erreurs (ex: database is locked).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+READ_URLS = ['/feed', '/inbox', '/matches', '/profile/{other}']
+N_USERS = 20000
+
+
+def seed(app, db, n_clients):
+    from datetime import date, datetime, timedelta
+    from sqlalchemy import insert
+    from models import User, Match, Message, conversation_key
+    import conversations
+
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.local', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1), 'city': 'Paris', 'image_file': 'default.jpg'}
+        for i in range(1, N_USERS + 1)
+    ])
+    # Chaque client a 20 matchs et quelques messages (inbox, matches non vides)
+    now = datetime.utcnow()
+    pairs = {(a, b) for a in range(1, n_clients + 1) for b in range(n_clients + 1, n_clients + 21)}
+    db.session.execute(insert(Match), [{'user1_id': a, 'user2_id': b, 'timestamp': now} for a, b in pairs])
+    db.session.execute(insert(Message), [
+        {'sender_id': b, 'recipient_id': a, 'body': 'salut', 'conversation_key': conversation_key(a, b),
+         'timestamp': now - timedelta(minutes=i)}
+        for a, b in pairs for i in range(3)
+    ])
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conversations.rebuild_summaries(conn)
+
+
+def run_client(app, user_id, n_clients, deadline, results):
+    """Boucle d'un client ; ajoute (type, ms, ok) à results."""
+    rng = random.Random(user_id)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    next_target = n_clients + 100 + user_id * 5000
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.2:
+            kind, url, expected = 'write', f'/swipe/{next_target}/dislike', 302
+            next_target += 1
+        else:
+            kind, url, expected = 'read', rng.choice(READ_URLS).format(other=rng.randrange(1, N_USERS)), 200
+        start = time.perf_counter()
+        try:
+            ok = client.get(url).status_code == expected
+        except Exception:  # ex: OperationalError database is locked
+            ok = False
+        results.append((kind, (time.perf_counter() - start) * 1000, ok))
+
+
+def _process_client(args):
+    user_id, n_clients, deadline = args
+    from app import create_app
+    from extensions import db
+    app = create_app()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)   # connexions héritées du parent
+    results = []
+    run_client(app, user_id, n_clients, deadline, results)
+    return results
+
+
+def child(n_clients, seconds, mode):
+    """Exécuté dans un sous-processus : DB_PROFILE et DATABASE_URL déjà positionnés."""
+    from app import create_app
+    from extensions import db
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        seed(app, db, n_clients)
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    if mode == 'processes':
+        # Un processus par client, comme des workers gunicorn synchrones (fork)
+        with multiprocessing.get_context('fork').Pool(n_clients) as pool:
+            results = [r for chunk in pool.map(
+                _process_client, [(i, n_clients, deadline) for i in range(1, n_clients + 1)]
+            ) for r in chunk]
+    else:
+        results = []
+        threads = [threading.Thread(target=run_client, args=(app, i, n_clients, deadline, results))
+                   for i in range(1, n_clients + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    def percentile(kind, p):
+        samples = sorted(ms for k, ms, _ in results if k == kind)
+        return samples[max(int(len(samples) * p) - 1, 0)] if samples else 0.0
+
+    print(json.dumps({
+        'rps': len(results) / elapsed,
+        'read_p50': percentile('read', 0.5), 'read_p99': percentile('read', 0.99),
+        'write_p50': percentile('write', 0.5), 'write_p99': percentile('write', 0.99),
+        'errors': sum(not ok for _, _, ok in results),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--mode', choices=['processes', 'threads'], default='processes')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.seconds, args.mode)
+        return
+
+    print(f"{'profil':>10} | {'clients':>7} | {'req/s':>6} | {'lecture p50':>11} | {'lecture p99':>11} | "
+          f"{'écriture p50':>12} | {'écriture p99':>12} | {'erreurs':>7}")
+    for profile in ('default', 'production'):
+        for n_clients in args.clients:
+            env = dict(os.environ, DB_PROFILE=profile,
+                       DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', str(n_clients), '--seconds', str(args.seconds),
+                 '--mode', args.mode],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            print(f"{profile:>10} | {n_clients:>7} | {r['rps']:>6.0f} | {r['read_p50']:>8.1f} ms | "
+                  f"{r['read_p99']:>8.1f} ms | {r['write_p50']:>9.1f} ms | {r['write_p99']:>9.1f} ms | {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_discovery.py
+
+"""
+Benchmark du remplissage du feed avec préférences de découverte (ville, âge).
+
+Usage : python benchmarks/bench_discovery.py [--users 1000000] [--cities 50]
+
+Crée une base SQLite temporaire de N utilisateurs répartis sur des villes de
+tailles très inégales (loi de Zipf), puis mesure candidates.refill() pour une
+grande, une moyenne et une petite ville, avec une tranche d'âge 25-35 ans.
+Pour comparaison : l'approche précédente, qui parcourt la table User par id
+et calcule l'âge en Python jusqu'à remplir le lot.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_discovery.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from datetime import date, timedelta  # noqa: E402
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, normalize_city  # noqa: E402
+import candidates  # noqa: E402
+import discovery  # noqa: E402
+
+app = create_app()
+
+MIN_AGE, MAX_AGE = 25, 35
+CHUNK = 50000
+
+
+def seed(n_users, n_cities):
+    rng = random.Random(42)
+    cities = [f'Ville-{i}' for i in range(n_cities)]
+    weights = [1 / (rank + 1) for rank in range(n_cities)]   # Zipf : quelques grandes villes
+    oldest, span = date(1960, 1, 1), (date(2007, 1, 1) - date(1960, 1, 1)).days
+    for start in range(1, n_users + 1, CHUNK):
+        picked = rng.choices(cities, weights=weights, k=min(CHUNK, n_users + 1 - start))
+        db.session.execute(insert(User), [
+            {
+                'email': f'user{start + i}@bench.local',
+                'password_hash': 'x',
+                'first_name': f'User{start + i}',
+                'date_of_birth': oldest + timedelta(days=rng.randrange(span)),
+                'city': city,
+                'city_key': normalize_city(city),   # insert() groupé : pas de @validates
+                'image_file': 'default.jpg',
+            }
+            for i, city in enumerate(picked)
+        ])
+    db.session.commit()
+    return cities
+
+
+def legacy_refill(user_id, city, batch_size):
+    """Parcours de User par id, ville et âge vérifiés en Python (sans préférence SQL)."""
+    today, found, last_id, examined = date.today(), [], 0, 0
+    key = normalize_city(city)
+    while len(found) < batch_size:
+        rows = db.session.execute(
+            select(User.id, User.city, User.date_of_birth)
+            .where(User.id > last_id, User.id != user_id).order_by(User.id).limit(1000)
+        ).all()
+        if not rows:
+            break
+        for user_id_, user_city, dob in rows:
+            examined += 1
+            age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+            if normalize_city(user_city) == key and MIN_AGE <= age <= MAX_AGE:
+                found.append(user_id_)
+        last_id = rows[-1][0]
+    return examined
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        cities = seed(args.users, args.cities)
+        print(f'{args.users} utilisateurs, {args.cities} villes ({time.perf_counter() - start:.0f} s de génération)')
+        batch_size = app.config['FEED_BATCH_SIZE']
+
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + str(
+            select(User.id).where(*discovery.candidate_filters(discovery.DiscoveryPreference(
+                city_key='x', min_age=MIN_AGE, max_age=MAX_AGE))).order_by(User.id).limit(batch_size)
+            .compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        ))).all()
+        print('Plan :', ' / '.join(row[-1] for row in plan))
+        print()
+        print(f"{'ville':>10} | {'profils':>8} | {'refill p50 (ms)':>15} | {'ancien (ms)':>11} | {'lignes lues (ancien)':>20}")
+
+        for city in (cities[0], cities[len(cities) // 4], cities[-1]):
+            size = db.session.scalar(
+                select(db.func.count()).select_from(User).where(User.city_key == normalize_city(city)))
+            owner_id = db.session.scalar(select(User.id).where(User.city == city).limit(1))
+            discovery.save_preferences(owner_id, city, MIN_AGE, MAX_AGE)
+            db.session.commit()
+
+            samples = []
+            for _ in range(args.iterations):
+                samples.append(timed(lambda: candidates.refill(owner_id)))
+                db.session.rollback()   # même lot à chaque itération
+
+            examined = []
+            legacy = timed(lambda: examined.append(legacy_refill(owner_id, city, batch_size)))
+            print(f'{city:>10} | {size:>8} | {statistics.median(samples):>15.2f} | {legacy:>11.1f} | {examined[0]:>20}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/bench_engagement.py
+
+"""
+Compteurs d'engagement et likes en attente (engagement.py) contre un calcul
+à la volée depuis Swipe et Match.
+
+Usage : python benchmarks/bench_engagement.py [--users 20000 --swipes 400000 --popular 10000 --samples 200]
+
+Base générée par seeding.generate() (swipers d'activité inégale, likes
+non réciproques, matchs) ; l'utilisateur 1 reçoit en plus `popular` likes
+(profil très populaire). Puis pour `samples` utilisateurs dont le plus liké :
+    - compteurs (likes reçus, envoyés, matchs) : trois COUNT indexés sur
+      Swipe / Match contre une lecture de UserStats par clé primaire ;
+    - "ils t'ont liké" (12 plus récents + total) : anti-jointure sur les
+      swipes en retour et les matchs, filtre des dislikes archivés, contre
+      une lecture de PendingLike ;
+    - coût d'écriture : record_swipes() d'un like, avec et sans la mise à
+      jour des compteurs (fonctions d'engagement remplacées par des no-op),
+      en alternance ;
+    - durée de `flask rebuild-stats --check` sur toute la base.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_engagement.db')
+os.environ.setdefault('METRICS_ENABLED', '0')   # ni mesures ni journal des requêtes lentes
+
+from datetime import datetime  # noqa: E402
+from flask import g  # noqa: E402
+from sqlalchemy import select, insert, func, exists, and_, or_  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Swipe, Match, UserStats, User  # noqa: E402
+import engagement  # noqa: E402
+import seeding  # noqa: E402
+import seen  # noqa: E402
+import swipes  # noqa: E402
+
+app = create_app()
+
+PENDING_LIMIT = 12
+
+
+def counters_by_scan(user_id):
+    received = db.session.scalar(select(func.count()).select_from(Swipe)
+                                 .where(Swipe.swiped_id == user_id, Swipe.liked.is_(True)))
+    sent = db.session.scalar(select(func.count()).select_from(Swipe)
+                             .where(Swipe.swiper_id == user_id, Swipe.liked.is_(True)))
+    matches = db.session.scalar(select(func.count()).select_from(Match.for_user(user_id).subquery()))
+    return received, sent, matches
+
+
+def counters_by_stats(user_id):
+    stats = engagement.stats_for(user_id)
+    return stats.likes_received, stats.likes_sent, stats.matches
+
+
+def pending_by_scan(user_id):
+    answer = Swipe.__table__.alias('answer')
+    liker = Swipe.swiper_id
+    query = (
+        select(Swipe.swiper_id, Swipe.timestamp)
+        .where(Swipe.swiped_id == user_id, Swipe.liked.is_(True),
+               ~exists().where(answer.c.swiper_id == user_id, answer.c.swiped_id == liker),
+               ~exists().where(or_(and_(Match.user1_id == user_id, Match.user2_id == liker),
+                                   and_(Match.user1_id == liker, Match.user2_id == user_id))))
+        .order_by(Swipe.timestamp.desc())
+    )
+    archived = seen.load(user_id)
+    likers = [liker_id for liker_id, _ in db.session.execute(query) if liker_id not in archived]
+    users = db.session.scalars(select(User).where(User.id.in_(likers[:PENDING_LIMIT]))).all()
+    return len(likers), len(users)
+
+
+def pending_by_index(user_id):
+    rows = engagement.pending_likes(user_id, PENDING_LIMIT)
+    return engagement.pending_count(user_id) if rows else 0, len(rows)
+
+
+def timed(fn, user_ids):
+    """(p50, p99, ms du premier utilisateur : le plus liké)."""
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id)
+        samples.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+        g.pop('seen_sets', None)   # bitmap relu comme dans une nouvelle requête
+    first = samples[0]
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], first
+
+
+def swipe_costs(pairs):
+    """ms par like enregistré (record_swipes + commit) : {avec compteurs ?: p50}, en alternance."""
+    saved = engagement.record_swipes, engagement.record_matches
+    samples = {True: [], False: []}
+    try:
+        for i, (swiper_id, swiped_id) in enumerate(pairs):
+            with_counters = i % 2 == 0
+            if with_counters:
+                engagement.record_swipes, engagement.record_matches = saved
+            else:
+                engagement.record_swipes = engagement.record_matches = lambda *args: None
+            start = time.perf_counter()
+            swipes.record_swipes(swiper_id, {swiped_id: True})
+            db.session.commit()
+            samples[with_counters].append((time.perf_counter() - start) * 1000)
+    finally:
+        engagement.record_swipes, engagement.record_matches = saved
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--swipes', type=int, default=400000)
+    parser.add_argument('--popular', type=int, default=10000)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        seeding.generate(args.users, args.swipes, n_matches=args.users // 4, messages_per_match=0)
+        already = set(db.session.scalars(select(Swipe.swiper_id).where(Swipe.swiped_id == 1)))
+        fans = [i for i in range(2, args.users + 1) if i not in already][:args.popular]
+        db.session.execute(insert(Swipe), [
+            {'swiper_id': fan, 'swiped_id': 1, 'liked': True, 'timestamp': datetime.utcnow()} for fan in fans
+        ])
+        db.session.commit()
+        with db.engine.begin() as conn:
+            engagement.rebuild_stats(conn)
+        print(f'Base : {args.users} utilisateurs, {args.swipes} swipes ({time.perf_counter() - start:.0f} s)')
+
+        rng = random.Random(7)
+        top = db.session.scalar(select(UserStats.user_id).order_by(UserStats.likes_received.desc()).limit(1))
+        user_ids = [top] + rng.sample(range(1, args.users + 1), args.samples - 1)
+        assert all(counters_by_scan(u) == counters_by_stats(u) for u in user_ids[:20])
+        assert all(pending_by_scan(u) == pending_by_index(u) for u in user_ids[:20])
+
+        print(f'\nPlus liké : utilisateur {top}, {counters_by_stats(top)[0]} likes reçus, '
+              f'{pending_by_index(top)[0]} en attente')
+        print(f"{'lecture':>16} | {'scan p50 ms':>11} | {'scan p99 ms':>11} | {'scan top ms':>11} | "
+              f"{'index p50 ms':>12} | {'index p99 ms':>12} | {'index top ms':>12}")
+        for name, scan, index in (('compteurs', counters_by_scan, counters_by_stats),
+                                  ("ils t'ont liké", pending_by_scan, pending_by_index)):
+            scan_times, index_times = timed(scan, user_ids), timed(index, user_ids)
+            print(f'{name:>16} | ' + ' | '.join(f'{ms:>11.3f}' for ms in scan_times)
+                  + ' | ' + ' | '.join(f'{ms:>12.3f}' for ms in index_times))
+
+        # Paires jamais swipées : un like chacune, avec puis sans compteurs
+        swiped = {tuple(row) for row in db.session.execute(select(Swipe.swiper_id, Swipe.swiped_id))}
+        pairs = []
+        while len(pairs) < 2 * args.samples:
+            pair = tuple(rng.sample(range(1, args.users + 1), 2))
+            if pair not in swiped:
+                swiped.add(pair)
+                pairs.append(pair)
+        costs = swipe_costs(pairs)
+        print(f'\nrecord_swipes (1 like + commit) : {costs[False]:.3f} ms sans compteurs, '
+              f'{costs[True]:.3f} ms avec (p50)')
+
+        with db.engine.begin() as conn:
+            engagement.rebuild_stats(conn)   # rattrape les likes enregistrés sans compteurs
+        start = time.perf_counter()
+        with db.engine.begin() as conn:
+            drifted = engagement.rebuild_stats(conn, check_only=True)
+        print(f'rebuild-stats --check : {(time.perf_counter() - start) * 1000:.0f} ms, {len(drifted)} écart(s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_feed.py
+
+"""
+Benchmark de /feed en fonction du nombre de swipes déjà effectués.
+
+Usage : python benchmarks/bench_feed.py [--users 110000]
+
+Crée une base SQLite temporaire, génère des utilisateurs ayant 10 à 100 000
+swipes, puis mesure la latence de /feed (moteur de candidats) et, pour
+comparaison, celle de l'ancienne requête NOT IN.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_feed.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from datetime import date  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Swipe  # noqa: E402
+import candidates  # noqa: E402
+
+app = create_app()
+
+SWIPE_COUNTS = [10, 100, 1000, 10000, 100000]
+
+
+def seed(n_users):
+    db.session.execute(insert(User), [
+        {
+            'email': f'user{i}@bench.local',
+            'password_hash': 'x',
+            'first_name': f'User{i}',
+            'date_of_birth': date(1995, 1, 1),
+            'city': 'Paris',
+            'image_file': 'default.jpg',
+        }
+        for i in range(1, n_users + 1)
+    ])
+    # Les swipers sont les premiers utilisateurs ; leurs swipes visent des profils au hasard
+    rng = random.Random(42)
+    for swiper_id, count in enumerate(SWIPE_COUNTS, start=1):
+        targets = rng.sample(range(len(SWIPE_COUNTS) + 1, n_users + 1), count)
+        db.session.execute(insert(Swipe), [
+            {'swiper_id': swiper_id, 'swiped_id': target, 'liked': False}
+            for target in targets
+        ])
+    db.session.commit()
+
+
+def legacy_feed_query(user_id):
+    """Ancienne implémentation de feed() (NOT IN sur tout l'historique)."""
+    swiped = [i for (i,) in db.session.query(Swipe.swiped_id).filter_by(swiper_id=user_id).all()]
+    swiped.append(user_id)
+    return User.query.filter(User.id.notin_(swiped)).first()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=110000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(args.users)
+
+    client = app.test_client()
+    print(f"{'swipes':>8} | {'1er /feed (ms)':>14} | {'/feed p50 (ms)':>14} | {'/feed p95 (ms)':>14} | {'NOT IN (ms)':>11}")
+    for swiper_id, count in enumerate(SWIPE_COUNTS, start=1):
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(swiper_id)
+            sess['_fresh'] = True
+
+        first = timed(lambda: client.get('/feed'))
+        samples = []
+        for _ in range(args.iterations):
+            samples.append(timed(lambda: client.get('/feed')))
+            with app.app_context():
+                shown = candidates.next_candidate(swiper_id)
+            client.get(f'/swipe/{shown.id}/dislike')
+        samples.sort()
+
+        with app.app_context():
+            try:
+                legacy = f'{timed(lambda: legacy_feed_query(swiper_id)):.2f}'
+            except Exception as exc:  # limite de paramètres SQLite dépassée
+                legacy = type(exc).__name__
+            db.session.rollback()
+
+        p50 = statistics.median(samples)
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f'{count:>8} | {first:>14.2f} | {p50:>14.2f} | {p95:>14.2f} | {legacy:>11}')
+
+
+if __name__ == '__main__':
+    main()
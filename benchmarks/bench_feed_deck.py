@@ -0,0 +1,138 @@
+# benchmarks/bench_feed_deck.py
+
+"""
+Requêtes HTTP et temps serveur par profil swipé : parcours classique contre paquet.
+
+Usage : python benchmarks/bench_feed_deck.py [--users 5000 --profiles 300 --deck 10]
+
+- classique : GET /feed (un profil) puis GET /swipe/<id>/<action> (redirection),
+  soit deux requêtes par profil ;
+- paquet : reproduit static/js/main.js : un GET /feed de --deck profils, les
+  décisions envoyées par lots de 5 à /api/swipes, le paquet suivant demandé
+  (?format=json&exclude=...) quand il reste peu de cartes.
+Chaque parcours swipe --profiles profils avec un utilisateur différent, sur
+la même base générée par seeding.generate().
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_deck.db'))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+import seeding  # noqa: E402
+
+app = create_app()
+
+SYNC_EVERY = 5   # comme static/js/main.js
+
+
+class Meter:
+    """Compte les requêtes HTTP, le temps passé côté serveur et les requêtes SQL."""
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+        self.seconds = 0.0
+        self.queries = 0
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def call(self, method, url, **kwargs):
+        start = time.perf_counter()
+        response = getattr(self.client, method)(url, **kwargs)
+        self.seconds += time.perf_counter() - start
+        self.requests += 1
+        return response
+
+
+def login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+
+def classic(meter, n_profiles, rng):
+    swiped = 0
+    while swiped < n_profiles:
+        html = meter.call('get', '/feed?n=1').get_data(as_text=True)
+        ids = re.findall(r'class="deck-card" data-user-id="(\d+)"', html)
+        if not ids:
+            break
+        meter.call('get', f"/swipe/{ids[0]}/{rng.choice(['like', 'dislike'])}")
+        swiped += 1
+    return swiped
+
+
+def deck(meter, n_profiles, rng, deck_size):
+    html = meter.call('get', f'/feed?n={deck_size}').get_data(as_text=True)
+    config = json.loads(re.search(r'id="feed-deck-data">(.*?)</script>', html, re.S).group(1))
+    cards = list(config['user_ids'])
+    exhausted = config['exhausted']
+    pending = []
+    swiped = 0
+    prefetch_at = max(2, deck_size // 3)
+
+    def sync():
+        if pending:
+            meter.call('post', config['swipes_url'], json={'swipes': pending[:]})
+            del pending[:]
+
+    while swiped < n_profiles and cards:
+        pending.append({'user_id': cards.pop(0), 'action': rng.choice(['like', 'dislike'])})
+        swiped += 1
+        if len(pending) >= SYNC_EVERY:
+            sync()
+        if len(cards) <= prefetch_at and not exhausted:
+            sync()
+            exclude = ','.join(str(i) for i in cards)
+            result = meter.call('get', f"{config['deck_url']}&exclude={exclude}").get_json()
+            cards += [card['user_id'] for card in result['cards'] if card['user_id'] not in cards]
+            exhausted = result['exhausted']
+    sync()
+    return swiped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--profiles', type=int, default=300)
+    parser.add_argument('--deck', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        seeding.generate(args.users, args.users * 10, seed=args.seed)
+
+    print(f"{'parcours':>10} | {'profils':>7} | {'requêtes/profil':>15} | {'ms serveur/profil':>17} | {'SQL/profil':>10}")
+    for user_id, (label, run) in enumerate((
+        ('classique', lambda meter, rng: classic(meter, args.profiles, rng)),
+        ('paquet', lambda meter, rng: deck(meter, args.profiles, rng, args.deck)),
+    ), start=1):
+        client = app.test_client()
+        login(client, user_id)
+        meter = Meter(client)
+        swiped = run(meter, random.Random(args.seed))
+        print(f'{label:>10} | {swiped:>7} | {meter.requests / swiped:>15.2f} | '
+              f'{meter.seconds * 1000 / swiped:>17.2f} | {meter.queries / swiped:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
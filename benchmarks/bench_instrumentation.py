@@ -0,0 +1,118 @@
+# benchmarks/bench_instrumentation.py
+
+"""
+Surcoût de l'instrumentation (instrumentation.py) sur les routes principales.
+
+Usage : python benchmarks/bench_instrumentation.py [--users 2000 --iterations 200 --rounds 5]
+
+Trois sous-processus, sur la même base générée par seeding.generate() :
+METRICS_ENABLED=0, METRICS_ENABLED=1, puis METRICS_ENABLED=1 avec
+SERVER_TIMING_HEADER=1. Chacun appelle /feed, /matches, /inbox, /chat et
+/profile en boucle. Les variantes sont alternées sur --rounds tours (la
+machine dérive d'un tour à l'autre) ; on compare la médiane des latences
+médianes de chaque tour.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+VARIANTS = [
+    ('désactivé', {'METRICS_ENABLED': '0'}),
+    ('activé', {'METRICS_ENABLED': '1'}),
+    ('+ Server-Timing', {'METRICS_ENABLED': '1', 'SERVER_TIMING_HEADER': '1'}),
+]
+
+
+def child(iterations, warmup):
+    """Exécuté dans un sous-processus : DATABASE_URL pointe sur une base déjà remplie."""
+    from sqlalchemy import select
+    from app import create_app
+    from extensions import db
+    from models import Match
+    app = create_app()
+
+    with app.app_context():
+        pairs = db.session.execute(select(Match.user1_id, Match.user2_id).limit(50)).all()
+    client = app.test_client()
+    samples = {}
+    for iteration in range(warmup + iterations):
+        user_id, partner_id = pairs[iteration % len(pairs)]
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        for name, url in [('/feed', '/feed'), ('/matches', '/matches'), ('/inbox', '/inbox'),
+                          ('/chat', f'/chat/{partner_id}'), ('/profile', f'/profile/{partner_id}')]:
+            start = time.perf_counter()
+            response = client.get(url)
+            ms = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200, (url, response.status_code)
+            if iteration >= warmup:
+                samples.setdefault(name, []).append(ms)
+    print(json.dumps({name: statistics.median(ms) for name, ms in samples.items()}))
+
+
+def seed(db_path, args):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, METRICS_ENABLED='0')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed-data', '--users', str(args.users),
+                    '--swipes', str(args.users * 20), '--matches', str(args.users // 2)],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.iterations, args.warmup)
+        return
+
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, 'template.db')
+    seed(template, args)
+
+    rounds = {label: [] for label, _ in VARIANTS}
+    for round_index in range(args.rounds):
+        for label, extra_env in VARIANTS:
+            db_path = os.path.join(workdir, 'bench.db')
+            shutil.copy(template, db_path)   # même base de départ (le feed remplit sa file)
+            env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, **extra_env)
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', '--iterations', str(args.iterations),
+                 '--warmup', str(args.warmup)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            rounds[label].append(json.loads(output.strip().splitlines()[-1]))
+
+    results = {
+        label: {name: statistics.median(r[name] for r in runs) for name in runs[0]}
+        for label, runs in rounds.items()
+    }
+    baseline = results[VARIANTS[0][0]]
+    print(f"{'route':>9} | " + ' | '.join(f'{label:>24}' for label, _ in VARIANTS))
+    for name in baseline:
+        cells = []
+        for label, _ in VARIANTS:
+            p50 = results[label][name]
+            delta = (p50 - baseline[name]) / baseline[name] * 100
+            cells.append(f'{p50:>6.2f} ms p50 ({delta:>+5.1f} %)')
+        print(f'{name:>9} | ' + ' | '.join(f'{cell:>24}' for cell in cells))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
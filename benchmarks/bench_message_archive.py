@@ -0,0 +1,164 @@
+# benchmarks/bench_message_archive.py
+
+"""
+Archivage des anciens messages en segments compressés (message_archive.py) :
+taille de la base et latence du chat avant et après archivage.
+
+Usage : python benchmarks/bench_message_archive.py [--users 5000 --matches 2000 --messages-per-match 300
+                                                   --older-than-days 7 --samples 100]
+
+Base générée par seeding.generate() (conversations de longueur géométrique,
+un message toutes les ~90 minutes), toutes les conversations marquées lues
+(le préfixe archivable s'arrête sinon au premier non-lu). Puis :
+    - taille du fichier après VACUUM, et de la table Message (nombre de
+      lignes), avant et après `flask archive-messages` ;
+    - durée du job d'archivage ;
+    - pour `samples` conversations parmi les plus longues, latence de
+      history_page() (p50, p99) : première page (toujours chaude), page
+      profonde (la plus ancienne, lue dans les segments après archivage) et
+      défilement complet de la conversation, page par page. Les pages sont
+      comparées avant / après : mêmes messages, même ordre.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_message_archive.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+os.environ.setdefault('METRICS_ENABLED', '0')   # ni mesures ni journal des requêtes lentes
+
+from sqlalchemy import select, func, text  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Message, MessageSegment, conversation_key  # noqa: E402
+import conversations  # noqa: E402
+import message_archive  # noqa: E402
+import seeding  # noqa: E402
+
+app = create_app()
+
+
+def vacuumed_size():
+    """Taille en Mo de la base compactée (VACUUM INTO une copie)."""
+    path = os.path.join(tempfile.mkdtemp(), 'vacuum.db')
+    db.session.commit()
+    with db.engine.connect() as conn:
+        conn.execute(text('VACUUM INTO :path'), {'path': path})
+    size = os.path.getsize(path) / 1e6
+    os.remove(path)
+    return size
+
+
+def cursors(pairs, page_size):
+    """Curseur de la page la plus ancienne de chaque conversation : le (page_size+1)-ième message le plus ancien."""
+    deep = {}
+    for a, b in pairs:
+        row = db.session.execute(
+            select(Message.timestamp, Message.id).where(Message.conversation_key == conversation_key(a, b))
+            .order_by(Message.timestamp, Message.id).offset(page_size).limit(1)
+        ).first()
+        deep[(a, b)] = tuple(row)
+    return deep
+
+
+def scroll(a, b, page_size):
+    """Tout l'historique, page par page depuis la plus récente : [id]."""
+    ids, before = [], None
+    while True:
+        messages, older = conversations.history_page(a, b, page_size, before=before)
+        ids = [m.id for m in messages] + ids
+        if older is None:
+            return ids
+        before = conversations.decode_cursor(older)
+
+
+def measure(pairs, deep, page_size):
+    """{lecture: (p50 ms, p99 ms)} et les pages lues, pour comparaison."""
+    readers = {
+        'première page': lambda a, b: conversations.history_page(a, b, page_size)[0],
+        'page profonde': lambda a, b: conversations.history_page(a, b, page_size, before=deep[(a, b)])[0],
+        'défilement complet': lambda a, b: scroll(a, b, page_size),
+    }
+    timings, pages = {}, {}
+    for name, reader in readers.items():
+        samples = []
+        for a, b in pairs:
+            start = time.perf_counter()
+            result = reader(a, b)
+            samples.append((time.perf_counter() - start) * 1000)
+            pages[(name, a, b)] = [m if isinstance(m, int) else m.id for m in result]
+            db.session.rollback()
+        samples.sort()
+        timings[name] = (statistics.median(samples), samples[max(int(len(samples) * 0.99) - 1, 0)])
+    return timings, pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--messages-per-match', type=int, default=300)
+    parser.add_argument('--older-than-days', type=int, default=7)
+    parser.add_argument('--samples', type=int, default=100)
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        seeding.generate(args.users, args.users * 10, n_matches=args.matches,
+                         messages_per_match=args.messages_per_match)
+        # Tout est lu : last_read = dernier message de la conversation
+        db.session.execute(text(
+            'UPDATE conversation_summary SET user1_last_read_id = coalesce(last_message_id, 0), '
+            'user2_last_read_id = coalesce(last_message_id, 0)'
+        ))
+        db.session.commit()
+        with db.engine.begin() as conn:
+            conversations.rebuild_summaries(conn)
+        total = db.session.scalar(select(func.count()).select_from(Message))
+        print(f'Base : {args.matches} matchs, {total} messages ({time.perf_counter() - start:.0f} s)')
+
+        page_size = app.config['CHAT_PAGE_SIZE']
+        longest = db.session.execute(
+            select(Message.conversation_key).group_by(Message.conversation_key)
+            .order_by(func.count().desc()).limit(args.samples * 2)
+        ).scalars().all()
+        pairs = [tuple(map(int, key.split(':')))
+                 for key in random.Random(7).sample(longest, min(args.samples, len(longest)))]
+        deep = cursors(pairs, page_size)
+
+        size_before = vacuumed_size()
+        measure(pairs, deep, page_size)   # passe de chauffe (cache de pages SQLite), avant comme après
+        before, pages_before = measure(pairs, deep, page_size)
+
+        start = time.perf_counter()
+        archived = message_archive.archive_messages(args.older_than_days)
+        archive_s = time.perf_counter() - start
+        segments = db.session.scalar(select(func.count()).select_from(MessageSegment))
+        hot = db.session.scalar(select(func.count()).select_from(Message))
+
+        size_after = vacuumed_size()
+        measure(pairs, deep, page_size)
+        after, pages_after = measure(pairs, deep, page_size)
+        assert pages_before == pages_after, 'pages différentes après archivage'
+
+        print(f'\nArchivage (> {args.older_than_days} j) : {archived} messages en {segments} segments, '
+              f'{archive_s:.1f} s ; {hot} messages restent dans Message')
+        print(f'Taille après VACUUM : {size_before:.1f} Mo -> {size_after:.1f} Mo')
+        print(f'\n{len(pairs)} conversations (les plus longues), {page_size} messages par page')
+        print(f"{'lecture':>20} | {'avant p50 ms':>12} | {'avant p99 ms':>12} | "
+              f"{'après p50 ms':>12} | {'après p99 ms':>12}")
+        for name in before:
+            print(f'{name:>20} | ' + ' | '.join(f'{ms:>12.3f}' for ms in before[name] + after[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/bench_password_hashing.py
+
+"""
+Latence de /feed pendant une vague de connexions : hachage dans la requête
+contre pool de processus borné (passwords.py).
+
+Usage : python benchmarks/bench_password_hashing.py [--feed-clients 4 --login-clients 8 --seconds 15]
+
+Pour chaque variante, un serveur werkzeug multi-thread est lancé dans un
+sous-processus sur une base générée par seeding.generate(). --feed-clients
+threads enchaînent des GET /feed (sessions déjà connectées) : d'abord seuls,
+puis pendant que --login-clients threads enchaînent des POST /login (un client
+qui reçoit 503 attend Retry-After avant de réessayer, comme un navigateur).
+    - requête : PASSWORD_HASH_WORKERS = 0, file illimitée (comportement d'origine) ;
+    - pool    : PASSWORD_HASH_WORKERS = 1, PASSWORD_HASH_MAX_PENDING = 4, nice 10.
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMAIL_DOMAIN = 'example.com'   # seeding.SEED_EMAIL_DOMAIN (ce processus n'importe pas l'application)
+
+VARIANTS = [
+    ('requête', {'PASSWORD_HASH_WORKERS': '0', 'PASSWORD_HASH_MAX_PENDING': '1000'}),
+    ('pool', {'PASSWORD_HASH_WORKERS': '1', 'PASSWORD_HASH_MAX_PENDING': '4', 'PASSWORD_HASH_NICE': '10'}),
+]
+
+
+def serve(port, users):
+    sys.path.insert(0, ROOT)
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app
+    import seeding
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with app.app_context():
+        seeding.generate(users, users * 10)
+    # Arrêt propre sur SIGTERM : le pool et le forkserver s'arrêtent avec le serveur
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print('ready', flush=True)
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+class Client:
+    """Connexion HTTP persistante avec le cookie de session."""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookie = None
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def request(self, method, path, form=None):
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie and cookie.startswith('session='):
+            self.cookie = cookie.split(';', 1)[0]
+        return response
+
+
+def login(client, user_id):
+    return client.request('POST', '/login', {'email': f'user{user_id}@{EMAIL_DOMAIN}', 'password': 'password'})
+
+
+def run_phase(port, feed_clients, login_clients, seconds):
+    stop = time.perf_counter() + seconds
+    feed_ms, login_ms, statuses = [], [], []
+
+    def feed_loop(client):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            client.request('GET', '/feed?n=1')
+            feed_ms.append((time.perf_counter() - start) * 1000)
+
+    def login_loop(offset):
+        client = Client(port)
+        user_id = 100 + offset
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = login(client, user_id)
+            statuses.append(response.status)
+            if response.status == 503:
+                time.sleep(float(response.getheader('Retry-After', 1)))
+            else:
+                login_ms.append((time.perf_counter() - start) * 1000)
+            client.cookie = None
+            user_id += login_clients
+
+    threads = [threading.Thread(target=feed_loop, args=(client,)) for client in feed_clients]
+    threads += [threading.Thread(target=login_loop, args=(i,)) for i in range(login_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return feed_ms, login_ms, statuses
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--feed-clients', type=int, default=4)
+    parser.add_argument('--login-clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8791)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.users)
+        return
+
+    print(f"{'variante':>8} | {'phase':>14} | {'feed p50':>8} | {'feed p99':>8} | {'feed/s':>6} | "
+          f"{'logins/s':>8} | {'login p50':>9} | {'503':>5}")
+    for label, env in VARIANTS:
+        db_path = os.path.join(tempfile.mkdtemp(), 'bench_hash.db')
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(args.port), '--users', str(args.users)],
+            env=dict(os.environ, DATABASE_URL='sqlite:///' + db_path, METRICS_ENABLED='0', **env),
+            stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            assert server.stdout.readline().strip() == 'ready'
+            time.sleep(0.5)
+            feed_clients = [Client(args.port) for _ in range(args.feed_clients)]
+            for user_id, client in enumerate(feed_clients, start=1):
+                login(client, user_id)
+            for phase, logins in (('feed seul', 0), ('feed + logins', args.login_clients)):
+                feed_ms, login_ms, statuses = run_phase(args.port, feed_clients, logins, args.seconds)
+                rejected = statuses.count(503)
+                print(f'{label:>8} | {phase:>14} | {statistics.median(feed_ms):>8.1f} | '
+                      f'{percentile(feed_ms, 0.99):>8.1f} | {len(feed_ms) / args.seconds:>6.0f} | '
+                      f'{len(login_ms) / args.seconds:>8.1f} | '
+                      f'{statistics.median(login_ms) if login_ms else float("nan"):>9.0f} | {rejected:>5}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_profile_cache.py
+
+"""
+GET conditionnel des pages de profil et cache des cartes (profile_cache.py).
+
+Usage : python benchmarks/bench_profile_cache.py [--users 500 --iterations 500]
+
+1. /profile/<id> : réponse complète (200) contre revalidation avec l'ETag
+   reçu (304) : latence médiane et requêtes SQL.
+2. Carte de profil (users/profil_card.html) : rendu à chaque fois (cache
+   'none') contre fragment en cache ('local').
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_profile.db'))
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+from user_cache import LocalTTLCache, NullCache  # noqa: E402
+import profile_cache  # noqa: E402
+import seeding  # noqa: E402
+
+app = create_app()
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seeding.generate(args.users, args.users * 5)
+        engine = db.engine
+    queries = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: queries.append(1))
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+
+    # 1. Page de profil : 200 contre 304
+    etag = client.get('/profile/2').headers['ETag']
+    print(f"{'profil':>22} | {'p50 ms':>7} | {'SQL':>4} | statut")
+    for label, headers in (('réponse complète', {}), ('revalidation (ETag)', {'If-None-Match': etag})):
+        del queries[:]
+        response = client.get('/profile/2', headers=headers)
+        n_queries = len(queries)
+        ms = timed(lambda: client.get('/profile/2', headers=headers), args.iterations)
+        print(f'{label:>22} | {ms:>7.2f} | {n_queries:>4} | {response.status_code}')
+
+    # 2. Cartes de profil : rendu complet contre fragment en cache
+    with app.test_request_context():
+        users = db.session.scalars(select(User).limit(50)).all()
+        print(f"\n{'carte de profil':>22} | {'µs/carte':>8}")
+        for label, backend in (('rendu à chaque fois', NullCache()), ('fragment en cache', LocalTTLCache())):
+            profile_cache.cards.backend = backend
+            for user in users:
+                profile_cache.cards.render(user)
+            ms = timed(lambda: [profile_cache.cards.render(user) for user in users], args.iterations // 10)
+            print(f'{label:>22} | {ms / len(users) * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_ranking.py
+
+"""
+Benchmark du classement des candidats par vibe tags (tags.jaccard_scores).
+
+Usage : python benchmarks/bench_ranking.py [--candidates 100000] [--tags 300]
+
+Mesure, pour N candidats (3 à 8 tags chacun) : la construction groupée des
+bitsets, le calcul des scores de Jaccard sur des bitsets déjà construits,
+la chaîne complète avec NumPy, et le repli en Python pur.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tags  # noqa: E402
+
+
+def bench(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--tags', type=int, default=300)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    candidate_ids = list(range(2, args.candidates + 2))
+    pairs = [
+        (candidate_id, tag_id)
+        for candidate_id in candidate_ids
+        for tag_id in rng.sample(range(1, args.tags + 1), rng.randint(3, 8))
+    ]
+    reference = rng.sample(range(1, args.tags + 1), 6)
+    print(f'{args.candidates} candidats, {len(pairs)} paires (candidat, tag), {args.tags} tags')
+
+    if tags.load_numpy() is not None:
+        import numpy as np
+        pair_array = np.asarray(pairs, dtype=np.int64)
+        bitsets = tags.build_bitsets(candidate_ids, pair_array)
+        print(f'NumPy, construction des bitsets : {bench(lambda: tags.build_bitsets(candidate_ids, pair_array), args.iterations):8.2f} ms')
+        print(f'NumPy, scores sur bitsets       : {bench(lambda: tags.score_bitsets(bitsets, reference), args.iterations):8.2f} ms')
+        print(f'NumPy, chaîne complète (liste)  : {bench(lambda: tags.jaccard_scores(reference, candidate_ids, pairs), args.iterations):8.2f} ms')
+
+    numpy_module, tags.np = tags.np, None
+    try:
+        print(f'Python pur (repli)              : {bench(lambda: tags.jaccard_scores(reference, candidate_ids, pairs), 3):8.2f} ms')
+    finally:
+        tags.np = numpy_module
+
+
+if __name__ == '__main__':
+    main()
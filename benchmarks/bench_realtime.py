@@ -0,0 +1,162 @@
+# benchmarks/bench_realtime.py
+
+"""
+Connexions SSE inactives et latence de diffusion du chat temps réel (realtime.py).
+
+Usage : python benchmarks/bench_realtime.py [--connections 2000 --messages 200]
+
+Ce processus joue le serveur web : base générée par seeding.generate()
+(un match par connexion), serveur SSE démarré dans un thread (comme le mode
+'thread').
+Un sous-processus client ouvre --connections flux /chat/<id>/events (un
+par match, côté user1) et les laisse inactifs ; on relève les threads et la
+mémoire (RSS) du serveur avant et après. Puis --messages messages sont
+envoyés par POST /chat/<id> (côté user2) : le client mesure le délai entre
+l'horodatage du message et sa réception.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def process_status():
+    """(threads, RSS en Mio) du processus courant."""
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            fields[name] = value.split()
+    return int(fields['Threads'][0]), int(fields['VmRSS'][0]) / 1024
+
+
+# --- CLIENT (sous-processus) ---
+
+async def client_main(port, streams, idle_timeout):
+    latencies = []
+
+    async def stream(cookie, other_id, ready):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET /chat/{other_id}/events HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                     f'Cookie: session={cookie}\r\n\r\n'.encode())
+        await reader.readuntil(b'\r\n\r\n')
+        ready()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b'data: '):
+                message = json.loads(line[6:])
+                sent_at = datetime.fromisoformat(message['timestamp'])
+                latencies.append((datetime.utcnow() - sent_at).total_seconds() * 1000)
+
+    connected = 0
+
+    def ready():
+        nonlocal connected
+        connected += 1
+        if connected == len(streams):
+            print('ready', flush=True)
+
+    tasks = [asyncio.create_task(stream(cookie, other_id, ready)) for cookie, other_id in streams]
+    # Fin : aucun message reçu pendant idle_timeout secondes après le premier
+    last_count = -1
+    while True:
+        await asyncio.sleep(idle_timeout)
+        if latencies and len(latencies) == last_count:
+            break
+        last_count = len(latencies)
+    for task in tasks:
+        task.cancel()
+    print(json.dumps(latencies), flush=True)
+
+
+# --- SERVEUR ---
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--client', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        streams = json.loads(sys.stdin.readline())
+        asyncio.run(client_main(args.port, streams, idle_timeout=2))
+        return
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_realtime.db'))
+    from sqlalchemy import select
+    from app import create_app
+    from extensions import db
+    from models import Match
+    import realtime
+    import seeding
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        seeding.generate(args.connections * 2, args.connections * 4, n_matches=args.connections,
+                         messages_per_match=1)
+        pairs = db.session.execute(select(Match.user1_id, Match.user2_id).limit(args.connections)).all()
+
+    threads_before, rss_before = process_status()
+    server = realtime.RealtimeServer(app)
+    server.start_thread('127.0.0.1', args.port)
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    streams = [(serializer.dumps({'_user_id': str(a), '_fresh': True}), b) for a, b in pairs]
+    client = subprocess.Popen([sys.executable, __file__, '--client', '--port', str(args.port)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    client.stdin.write(json.dumps(streams) + '\n')
+    client.stdin.flush()
+    start = time.perf_counter()
+    assert client.stdout.readline().strip() == 'ready'
+    connect_seconds = time.perf_counter() - start
+    time.sleep(1)
+    threads_after, rss_after = process_status()
+    connections = server.connections
+
+    # Messages envoyés par user2 de conversations tirées au hasard
+    rng = random.Random(42)
+    http = app.test_client()
+    post_ms = []
+    for _ in range(args.messages):
+        a, b = rng.choice(pairs)
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(b)
+            sess['_fresh'] = True
+        t0 = time.perf_counter()
+        response = http.post(f'/chat/{a}', data={'body': 'bench'}, headers={'Accept': 'application/json'})
+        post_ms.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code == 201, response.status_code
+        time.sleep(0.005)
+    latencies = json.loads(client.stdout.readline())
+    client.wait()
+
+    print(f'connexions SSE ouvertes    : {connections} (en {connect_seconds:.1f} s)')
+    print(f'threads du serveur         : {threads_before} avant, {threads_after} après')
+    print(f'mémoire (RSS)              : +{rss_after - rss_before:.1f} Mio, '
+          f'{(rss_after - rss_before) * 1024 / max(connections, 1):.1f} Kio par connexion')
+    print(f'POST /chat (écriture)      : p50 {statistics.median(post_ms):.2f} ms')
+    print(f'messages reçus             : {len(latencies)} / {args.messages}')
+    if latencies:
+        latencies.sort()
+        print(f'délai envoi -> réception   : p50 {statistics.median(latencies):.2f} ms, '
+              f'p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# benchmarks/bench_routes.py
+
+"""
+Latence et nombre de requêtes SQL des routes principales, en JSON comparable.
+
+Usage :
+    python benchmarks/bench_routes.py --label avant [--users 20000 --swipes 400000 ...]
+    python benchmarks/bench_routes.py --label apres --compare benchmarks/results/avant.json
+
+Remplit une base SQLite temporaire avec seeding.generate(), puis appelle
+chaque route via le client de test Flask, connecté à tour de rôle sous
+différents utilisateurs ayant des matchs : /feed, /swipe, /matches, /inbox,
+/chat et /profile. Pour chaque route : p50 / p95 / p99 / moyenne (ms),
+requêtes SQL par appel (médiane, max) et erreurs.
+
+Le résultat est écrit dans benchmarks/results/<label>.json (paramètres de
+génération, profil DB_PROFILE, commit git, mesures) ; --compare affiche
+l'écart avec un résultat précédent.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_routes.db')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + DB_PATH)
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Match  # noqa: E402
+import seeding  # noqa: E402
+
+app = create_app()
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+class QueryCounter:
+    """Compte les requêtes SQL émises sur tous les moteurs (principal, replica)."""
+
+    def __init__(self):
+        self.count = 0
+        with app.app_context():
+            self.engines = list(db.engines.values())
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+    def measure(self, fn):
+        self.count = 0
+        start = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - start) * 1000, self.count
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, max(int(round(len(samples) * p)) - 1, 0))]
+
+
+def routes_for(user_id, partner_id, rng, n_users):
+    """(nom, url, statut attendu) pour un utilisateur ayant un match avec partner_id."""
+    return [
+        ('/feed', '/feed', 200),
+        ('/swipe', f'/swipe/{rng.randint(1, n_users)}/dislike', 302),
+        ('/matches', '/matches', 200),
+        ('/inbox', '/inbox', 200),
+        ('/chat', f'/chat/{partner_id}', 200),
+        ('/profile', f'/profile/{partner_id}', 200),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    with app.app_context():
+        start = time.perf_counter()
+        counts = seeding.generate(args.users, args.swipes, args.like_ratio, args.matches,
+                                  args.messages_per_match, args.seed)
+        seed_seconds = time.perf_counter() - start
+        pairs = db.session.execute(select(Match.user1_id, Match.user2_id).limit(args.sessions)).all()
+    if not pairs:
+        raise SystemExit('Aucun match généré : augmenter --matches.')
+
+    rng = random.Random(args.seed)
+    counter = QueryCounter()
+    client = app.test_client()
+    samples = {}   # {route: [(ms, requêtes, ok)]}
+
+    for iteration in range(args.warmup + args.iterations):
+        user_id, partner_id = pairs[iteration % len(pairs)]
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        for name, url, expected in routes_for(user_id, partner_id, rng, args.users):
+            response, ms, queries = counter.measure(lambda: client.get(url))
+            if iteration >= args.warmup:
+                samples.setdefault(name, []).append((ms, queries, response.status_code == expected))
+
+    routes = {}
+    for name, rows in samples.items():
+        latencies = [ms for ms, _, _ in rows]
+        queries = [q for _, q, _ in rows]
+        routes[name] = {
+            'n': len(rows),
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'queries_p50': statistics.median(queries),
+            'queries_max': max(queries),
+            'errors': sum(not ok for _, _, ok in rows),
+        }
+
+    return {
+        'label': args.label,
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'db_profile': app.config['DB_PROFILE'],
+        'dataset': dict(counts, seed=args.seed, like_ratio=args.like_ratio,
+                        messages_per_match=args.messages_per_match, seed_seconds=round(seed_seconds, 1)),
+        'iterations': args.iterations,
+        'routes': routes,
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"{result['label']} ({result['git_commit']}, DB_PROFILE={result['db_profile']}) — {result['dataset']}")
+    header = f"{'route':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'SQL':>4} | {'err':>3}"
+    if baseline:
+        header += f" | {'p50 avant':>9} | {'Δ p50':>7} | {'SQL avant':>9}"
+    print(header)
+    for name, r in result['routes'].items():
+        line = (f"{name:>9} | {r['p50_ms']:>8.2f} | {r['p95_ms']:>8.2f} | {r['p99_ms']:>8.2f} | "
+                f"{r['queries_p50']:>4g} | {r['errors']:>3}")
+        before = (baseline or {}).get('routes', {}).get(name)
+        if before:
+            delta = (r['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+            line += f" | {before['p50_ms']:>9.2f} | {delta:>+6.0f}% | {before['queries_p50']:>9g}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--label', default=datetime.now().strftime('%Y%m%d-%H%M%S'))
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--swipes', type=int, default=400000)
+    parser.add_argument('--like-ratio', type=float, default=0.35)
+    parser.add_argument('--matches', type=int, default=5000)
+    parser.add_argument('--messages-per-match', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=100, help="Utilisateurs connectés à tour de rôle.")
+    parser.add_argument('--output', help='Fichier JSON (défaut : benchmarks/results/<label>.json).')
+    parser.add_argument('--compare', help='Résultat JSON précédent à comparer.')
+    args = parser.parse_args()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    result = run(args)
+    output = args.output or os.path.join(RESULTS_DIR, f'{args.label}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f'Résultats : {output}')
+
+
+if __name__ == '__main__':
+    main()
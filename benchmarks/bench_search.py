@@ -0,0 +1,199 @@
+# benchmarks/bench_search.py
+
+"""
+Recherche dans les messages : LIKE '%mot%' contre index FTS5 (search.py).
+
+Usage : python benchmarks/bench_search.py [--messages 1000000 --users 50000 --matches 200000]
+        (corpus de la demande : --messages 10000000)
+
+Utilisateurs et matchs générés par seeding.generate(), puis --messages
+messages répartis sur les matchs, au vocabulaire de loi de Zipf (20 000 mots) :
+quelques mots très fréquents, une longue traîne de mots rares.
+
+Mesures :
+    - chargement : débit d'insertion avec et sans les triggers FTS5, puis
+      temps de remplissage de l'index (search.rebuild, comme la migration) ;
+    - recherche d'un mot fréquent, moyen et rare pour des utilisateurs tirés
+      au hasard (les plus actifs ont plus de chances d'être tirés), limitée
+      à leurs conversations :
+        like-global : body LIKE sur toute la table (ce que ferait une recherche naïve) ;
+        like-convs  : body LIKE sur les conversations de l'utilisateur (index conversation) ;
+        fts5        : search.search_messages() (une page de 20 résultats classés).
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_search.db'))
+os.environ.setdefault('METRICS_ENABLED', '0')   # les LIKE seraient tous journalisés comme requêtes lentes
+
+from sqlalchemy import text  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+import search  # noqa: E402
+import seeding  # noqa: E402
+
+app = create_app()
+
+VOCABULARY = 20000
+CHUNK = 50000
+
+
+def vocabulary(rng):
+    """Mots pseudo-français ; le rang 0 est le plus fréquent."""
+    syllables = ['ba', 'lo', 'mi', 'ré', 'tu', 'ca', 'fé', 'jo', 'pa', 'ri', 'son', 'vi', 'bé', 'na', 'zou', 'ké']
+    words = set(seeding.WORDS)
+    while len(words) < VOCABULARY:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    words = sorted(words - set(seeding.WORDS))
+    rng.shuffle(words)
+    return seeding.WORDS + words[:VOCABULARY - len(seeding.WORDS)]
+
+
+def messages(rng, words, pairs, n, start):
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    total = cumulative[-1]
+    for i in range(n):
+        a, b = pairs[rng.randrange(len(pairs))]
+        length = min(60, max(1, int(rng.lognormvariate(2.0, 0.6))))
+        body = ' '.join(words[bisect.bisect(cumulative, rng.random() * total)] for _ in range(length))
+        sender, recipient = (a, b) if rng.random() < 0.5 else (b, a)
+        yield (sender, recipient, body, start + timedelta(seconds=i), f'{a}:{b}')
+
+
+def load(conn, rows):
+    start = time.perf_counter()
+    count = 0
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK))
+        if not chunk:
+            break
+        conn.executemany(
+            'INSERT INTO message (sender_id, recipient_id, body, timestamp, conversation_key) VALUES (?, ?, ?, ?, ?)',
+            chunk)
+        count += len(chunk)
+    conn.commit()
+    return count / (time.perf_counter() - start)
+
+
+def timed(fn, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--matches', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    words = vocabulary(rng)
+    start = datetime(2024, 1, 1)
+
+    with app.app_context():
+        seeding.generate(args.users, args.matches * 2, n_matches=args.matches, messages_per_match=0,
+                         seed=args.seed)
+        pairs = db.session.execute(text('SELECT user1_id, user2_id FROM "match"')).all()
+        path = db.engine.url.database
+
+    import sqlite3
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    rows = messages(rng, words, pairs, args.messages, start)
+
+    # 1. Chargement : une part avec les triggers, le reste sans, puis remplissage de l'index
+    with_triggers = min(200000, args.messages // 5)
+    rate_with = load(conn, itertools.islice(rows, with_triggers))
+    for table in search.INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            conn.execute(f'DROP TRIGGER {table}_{suffix}')
+    rate_without = load(conn, rows)
+    conn.execute("INSERT INTO message_fts (message_fts) VALUES ('delete-all')")
+    t0 = time.perf_counter()
+    conn.execute("INSERT INTO message_fts (message_fts) VALUES ('rebuild')")
+    conn.commit()
+    rebuild_seconds = time.perf_counter() - t0
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    fts_pages = conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'message_fts%'"
+    ).fetchone()[0] if conn.execute(
+        "SELECT 1 FROM pragma_module_list WHERE name = 'dbstat'").fetchone() else None
+    conn.close()
+
+    print(f'{args.messages} messages, {len(pairs)} conversations, {args.users} utilisateurs')
+    print(f'insertion avec triggers FTS5 : {rate_with:,.0f} messages/s')
+    print(f'insertion sans trigger       : {rate_without:,.0f} messages/s')
+    print(f'remplissage de l\'index       : {rebuild_seconds:.1f} s '
+          f'({args.messages / rebuild_seconds:,.0f} messages/s)')
+    if fts_pages:
+        print(f'taille de l\'index            : {fts_pages / 2**20:.0f} Mio '
+              f'(base entière : {os.path.getsize(path) / 2**20:.0f} Mio)')
+
+    # 2. Recherche
+    with app.app_context():
+        with db.engine.begin() as connection:
+            search.create_indexes(connection)
+        senders = [row[0] for row in db.session.execute(text(
+            'SELECT sender_id FROM message WHERE id % 97 = 0')).all()]
+        terms = {'fréquent': words[3], 'moyen': words[300], 'rare': words[15000]}
+
+        def like_global(user_id, word):
+            return db.session.execute(text("""
+                SELECT id FROM message
+                WHERE (sender_id = :u OR recipient_id = :u) AND body LIKE :pattern
+                ORDER BY timestamp DESC LIMIT 20
+            """), {'u': user_id, 'pattern': f'%{word}%'}).all()
+
+        def like_convs(user_id, word):
+            return db.session.execute(text("""
+                SELECT id FROM message
+                WHERE conversation_key IN (
+                    SELECT user1_id || ':' || user2_id FROM "match" WHERE user1_id = :u OR user2_id = :u)
+                  AND body LIKE :pattern
+                ORDER BY timestamp DESC LIMIT 20
+            """), {'u': user_id, 'pattern': f'%{word}%'}).all()
+
+        def fts(user_id, word):
+            return search.search_messages(user_id, word)
+
+        print(f"\n{'mot':>9} | {'méthode':>11} | {'p50 ms':>8} | {'p95 ms':>8} | {'résultats moy.':>14}")
+        for label, word in terms.items():
+            users = [rng.choice(senders) for _ in range(args.queries)]
+            for name, fn, n_users in (
+                ('like-global', like_global, min(3, len(users))),
+                ('like-convs', like_convs, len(users)),
+                ('fts5', fts, len(users)),
+            ):
+                found = []
+                durations = []
+                for user_id in users[:n_users]:
+                    durations += timed(lambda: found.append(fn(user_id, word)), 1)
+                hits = statistics.mean(len(getattr(r, 'results', r)) for r in found)
+                durations.sort()
+                print(f'{label:>9} | {name:>11} | {statistics.median(durations):>8.2f} | '
+                      f'{durations[int(len(durations) * 0.95) - 1 if len(durations) > 1 else 0]:>8.2f} | '
+                      f'{hits:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_seen.py
+
+"""
+Gains de l'archivage des dislikes en bitmaps compressés (seen.py).
+
+Usage : python benchmarks/bench_seen.py [--users 200000]
+
+Crée une base SQLite temporaire où quelques utilisateurs ont 1 000 à 100 000
+anciens dislikes (profils tirés au hasard, ou plages contiguës comme lors d'un
+parcours du feed), puis compare avant / après `archive_dislikes` :
+taille de la base (après VACUUM), taille de chaque ensemble (lignes Swipe,
+set Python en mémoire, bitmap) et latence du remplissage du feed.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_seen.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from datetime import date, datetime, timedelta  # noqa: E402
+from flask import g  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Swipe, SeenBitmap  # noqa: E402
+import candidates  # noqa: E402
+import seen  # noqa: E402
+
+app = create_app()
+
+# (nombre de dislikes, profils contigus ?)
+SWIPERS = [(1000, False), (10000, False), (100000, False), (100000, True)]
+
+
+def seed(n_users):
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.local', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1), 'city': 'Paris', 'image_file': 'default.jpg'}
+        for i in range(1, n_users + 1)
+    ])
+    rng = random.Random(42)
+    old = datetime.utcnow() - timedelta(days=90)
+    first_target = len(SWIPERS) + 1
+    for swiper_id, (count, contiguous) in enumerate(SWIPERS, start=1):
+        if contiguous:
+            targets = range(first_target, first_target + count)
+        else:
+            targets = rng.sample(range(first_target, n_users + 1), count)
+        db.session.execute(insert(Swipe), [
+            {'swiper_id': swiper_id, 'swiped_id': target, 'liked': False, 'timestamp': old}
+            for target in targets
+        ])
+    db.session.commit()
+
+
+def db_size():
+    db.session.commit()
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('VACUUM')
+    return os.path.getsize(DB_PATH)
+
+
+def refill_p50(swiper_id, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        candidates.refill(swiper_id)
+        samples.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()        # même lot à chaque itération
+        g.pop('seen_sets', None)     # bitmap relu comme dans une nouvelle requête
+    return statistics.median(samples)
+
+
+def set_size(ids):
+    """Mémoire d'un set Python d'entiers (conteneur + objets int)."""
+    ids = set(ids)
+    return sys.getsizeof(ids) + sum(sys.getsizeof(i) for i in ids)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(args.users)
+        swiped = {
+            swiper_id: db.session.scalars(db.select(Swipe.swiped_id).filter_by(swiper_id=swiper_id)).all()
+            for swiper_id in range(1, len(SWIPERS) + 1)
+        }
+        before_size = db_size()
+        before_refill = {swiper_id: refill_p50(swiper_id, args.iterations) for swiper_id in swiped}
+
+        start = time.perf_counter()
+        archived = seen.archive_dislikes(older_than_days=30)
+        archive_ms = (time.perf_counter() - start) * 1000
+        after_size = db_size()
+
+    print(f'{archived} dislikes archivés en {archive_ms:.0f} ms')
+    print(f'Base SQLite (après VACUUM) : {before_size / 1e6:.1f} Mo -> {after_size / 1e6:.1f} Mo')
+    print()
+    print(f"{'dislikes':>9} | {'contigus':>8} | {'set Python':>10} | {'bitmap':>10} | "
+          f"{'refill avant (ms)':>17} | {'refill après (ms)':>17} | {'test (µs)':>9}")
+    for swiper_id, (count, contiguous) in enumerate(SWIPERS, start=1):
+        with app.app_context():
+            bitmap = db.session.get(SeenBitmap, swiper_id)
+            after_refill = refill_p50(swiper_id, args.iterations)
+            archived_set = seen.SeenSet(bitmap.data)
+            probes = random.Random(swiper_id).sample(range(1, args.users + 1), 10000)
+            start = time.perf_counter()
+            for probe in probes:
+                probe in archived_set  # noqa: B015
+            probe_us = (time.perf_counter() - start) * 1e6 / len(probes)
+
+        print(f'{count:>9} | {"oui" if contiguous else "non":>8} | {set_size(swiped[swiper_id]) / 1e3:>8.0f} Ko | '
+              f'{len(bitmap.data):>8} o | {before_refill[swiper_id]:>17.2f} | '
+              f'{after_refill:>17.2f} | {probe_us:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/bench_startup.py
+
+"""
+Démarrage à froid et première requête d'un worker, avec et sans préchargement.
+
+Usage : python benchmarks/bench_startup.py [--runs 5 --users 2000] [--baseline <révision git>]
+
+Mesures, sur une base générée une fois par `flask seed-data` :
+    - python -X importtime -c "import app" : temps d'import cumulé de app.py
+      et des modules qu'il importe directement (les plus lents), nombre de
+      modules chargés ;
+    - sans préchargement : chaque worker démarre un interpréteur, importe
+      l'application et la crée ; on mesure le temps jusqu'à la fin de sa
+      première réponse /login, puis la durée de sa première réponse /feed ;
+    - préchargé (gunicorn --preload) : l'application est créée une fois par
+      le processus maître (wsgi.py), puis os.fork() ; mêmes mesures dans le
+      processus enfant, à partir du fork.
+
+--baseline <rév.> refait les mêmes mesures sur une autre révision (extraite
+dans un git worktree temporaire) : avant create_app(), l'application globale
+de app.py est utilisée et le préchargement importe simplement le module.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe(root, preload):
+    """Exécuté dans un sous-processus : DATABASE_URL pointe sur une copie de la base remplie."""
+    start = time.perf_counter()
+    sys.path.insert(0, root)
+    import app as app_module
+    if hasattr(app_module, 'create_app'):
+        if preload:
+            import wsgi
+            app = wsgi.app
+        else:
+            app = app_module.create_app()
+    else:   # révision antérieure à create_app()
+        app = app_module.app
+    app.config['WTF_CSRF_ENABLED'] = False
+    loaded = time.perf_counter()
+    result = {'load_ms': (loaded - start) * 1000}
+
+    if preload:
+        read_end, write_end = os.pipe()
+        if os.fork():
+            os.close(write_end)
+            with os.fdopen(read_end) as pipe:
+                result.update(json.loads(pipe.read()))
+            os.wait()
+            print(json.dumps(result))
+            return
+        os.close(read_end)
+        start = time.perf_counter()   # le worker démarre au fork
+
+    client = app.test_client()
+    assert client.get('/login').status_code == 200
+    first_response = time.perf_counter()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+    assert client.get('/feed').status_code == 200
+    worker = {
+        'first_login_ms': (first_response - start) * 1000,
+        'first_feed_ms': (time.perf_counter() - first_response) * 1000,
+        'modules': len(sys.modules),
+    }
+    if preload:
+        with os.fdopen(write_end, 'w') as pipe:
+            pipe.write(json.dumps(worker))
+        os._exit(0)
+    result.update(worker)
+    print(json.dumps(result))
+
+
+def import_times(root, env):
+    """(ms cumulées de `import app`, [(module, ms)] de ses imports directs les plus lents)."""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=root, env=env,
+                            capture_output=True, text=True, check=True).stderr
+    total, children = None, []
+    for line in output.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)', line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(1)) / 1000, len(match.group(2)), match.group(3)
+        if indent == 1 and name == 'app':
+            total = cumulative
+        elif indent == 3:
+            children.append((name, cumulative))
+    return total, sorted(children, key=lambda item: -item[1])[:6]
+
+
+def measure(label, root, env, seeded, runs):
+    samples = {}
+    for _ in range(runs):
+        for preload in (False, True):
+            db_path = os.path.join(tempfile.mkdtemp(), 'bench_startup.db')
+            shutil.copy(seeded, db_path)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--probe', root] + (['--preload'] if preload else []),
+                env=dict(env, DATABASE_URL='sqlite:///' + db_path), capture_output=True, text=True, check=True,
+            ).stdout
+            for key, value in json.loads(output.strip().splitlines()[-1]).items():
+                samples.setdefault((preload, key), []).append(value)
+    totals = [import_times(root, dict(env, DATABASE_URL='sqlite:///' + seeded)) for _ in range(runs)]
+
+    print(f'\n== {label}')
+    print(f"import app : {statistics.median(t for t, _ in totals):.0f} ms (médiane de {runs}), "
+          f"{statistics.median(samples[(False, 'modules')]):.0f} modules après la première requête")
+    for name, ms in totals[-1][1]:
+        print(f'    {name:<24} {ms:8.1f} ms')
+    print(f"{'worker':>18} | {'chargement ms':>13} | {'1re /login ms':>13} | {'1re /feed ms':>12}")
+    for preload, name in ((False, 'sans préchargement'), (True, 'préchargé')):
+        load = statistics.median(samples[(preload, 'load_ms')])
+        print(f"{name:>18} | {load:>13.0f} | {statistics.median(samples[(preload, 'first_login_ms')]):>13.1f} | "
+              f"{statistics.median(samples[(preload, 'first_feed_ms')]):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--baseline', help='Révision git à comparer (ex : HEAD~1).')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    parser.add_argument('--preload', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.preload)
+        return
+
+    workdir = tempfile.mkdtemp()
+    seeded = os.path.join(workdir, 'seed.db')
+    env = dict(os.environ, METRICS_ENABLED='0', PASSWORD_HASH_WORKERS='0')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed-data', '--users', str(args.users),
+                    '--swipes', str(args.users * 10)], cwd=ROOT, env=dict(env, DATABASE_URL='sqlite:///' + seeded),
+                   check=True, capture_output=True)
+
+    if args.baseline:
+        baseline_root = os.path.join(workdir, 'baseline')
+        subprocess.run(['git', 'worktree', 'add', '--detach', baseline_root, args.baseline], cwd=ROOT,
+                       check=True, capture_output=True)
+        try:
+            measure(args.baseline, baseline_root, env, seeded, args.runs)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', baseline_root], cwd=ROOT, check=True)
+    measure('arbre actuel', ROOT, env, seeded, args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_swipe_buffer.py
+
+"""
+Débit de /swipe : commit par clic (direct) contre buffer d'écriture (buffered).
+
+Usage : python benchmarks/bench_swipe_buffer.py [--threads 8] [--swipes 300]
+
+Chaque thread joue un utilisateur différent qui enchaîne des dislikes via
+GET /swipe/<id>/dislike. On mesure le débit total et la latence par clic,
+puis on vérifie qu'après le vidage final toutes les lignes sont en base.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench_swipe_buffer.db')
+
+from datetime import date  # noqa: E402
+from sqlalchemy import insert, delete  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Swipe  # noqa: E402
+import swipe_buffer  # noqa: E402
+
+app = create_app()
+
+
+def seed(n_users):
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.local', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1), 'city': 'Paris', 'image_file': 'default.jpg'}
+        for i in range(1, n_users + 1)
+    ])
+    db.session.commit()
+
+
+def run(n_threads, n_swipes):
+    latencies, errors = [], []
+
+    def worker(swiper_id):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(swiper_id)
+            sess['_fresh'] = True
+        first_target = n_threads + 1
+        for target in range(first_target, first_target + n_swipes):
+            start = time.perf_counter()
+            response = client.get(f'/swipe/{target}/dislike')
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 302:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, n_threads + 1)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--swipes', type=int, default=300)
+    args = parser.parse_args()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        seed(args.threads + args.swipes)
+
+    results = {'direct': run(args.threads, args.swipes)}
+    with app.app_context():
+        db.session.execute(delete(Swipe))
+        db.session.commit()
+
+    for fsync in (True, False):
+        swipe_buffer.buffer = swipe_buffer.SwipeBuffer(
+            app, os.path.join(TMP_DIR, f'swipe_log_{fsync}'),
+            interval_ms=app.config['SWIPE_FLUSH_INTERVAL_MS'],
+            max_items=app.config['SWIPE_FLUSH_MAX_ITEMS'],
+            fsync=fsync,
+        )
+        label = 'buffered' + (' (fsync)' if fsync else ' (sans fsync)')
+        results[label] = run(args.threads, args.swipes)
+        swipe_buffer.buffer.close()
+        with app.app_context():
+            stored = db.session.query(Swipe).count()
+            db.session.execute(delete(Swipe))
+            db.session.commit()
+        results[label]['stored'] = stored
+
+    expected = args.threads * args.swipes
+    print(f'{args.threads} threads x {args.swipes} swipes')
+    print(f"{'mode':>22} | {'swipes/s':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'erreurs':>7} | {'en base':>9}")
+    for label, r in results.items():
+        stored = f"{r['stored']}/{expected}" if 'stored' in r else '-'
+        print(f"{label:>22} | {r['throughput']:>9.0f} | {r['p50']:>8.2f} | {r['p99']:>8.2f} | {r['errors']:>7} | {stored:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_user_cache.py
+
+"""
+Effet du cache des utilisateurs (user_cache.py) sur les requêtes authentifiées.
+
+Usage : python benchmarks/bench_user_cache.py [--requests 500]
+
+Compare les backends 'none' et 'local' sur /matches : requêtes SQL par
+requête HTTP, latence médiane et compteurs succès / échecs du cache.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_user_cache.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+import user_cache  # noqa: E402
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.session.execute(insert(User), [{
+            'email': 'bench@bench.local', 'password_hash': 'x', 'first_name': 'Bench',
+            'date_of_birth': date(1995, 1, 1), 'image_file': 'default.jpg',
+        }])
+        db.session.commit()
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+
+    print(f"{'backend':<8} | {'SQL/requête':>11} | {'p50 (ms)':>8} | {'succès':>6} | {'échecs':>6}")
+    for name, backend in (('none', user_cache.NullCache()), ('local', user_cache.LocalTTLCache())):
+        user_cache.cache = user_cache.UserCache(backend)
+        client.get('/matches')  # échauffement
+        statements.clear()
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            client.get('/matches')
+            samples.append((time.perf_counter() - start) * 1000)
+        stats = user_cache.cache.stats()
+        print(f'{name:<8} | {len(statements) / args.requests:>11.2f} | '
+              f'{statistics.median(samples):>8.3f} | {stats["hits"]:>6} | {stats["misses"]:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+# candidates.py
+
+"""
+Moteur de candidats pour le feed.
+
+Au lieu d'envoyer à chaque affichage de /feed la liste complète des profils
+déjà swipés (NOT IN géant, limité par SQLite), chaque utilisateur possède une
+petite file de candidats non vus (CandidateQueue). La file est remplie par lots
+grâce à une anti-jointure sur Swipe et un curseur keyset sur User.id
+(CandidateCursor), puis consommée en O(1) à chaque swipe.
+
+Les préférences de découverte (ville, tranche d'âge, voir discovery.py)
+s'ajoutent à cette requête sous forme de prédicats indexés : seuls les profils
+de la ville et de la tranche d'âge demandées sont parcourus.
+
+Chaque lot est classé par compatibilité de vibe tags (voir tags.py), à
+laquelle s'ajoute la popularité du profil (likes reçus, voir engagement.py)
+pondérée par FEED_POPULARITY_WEIGHT : le feed sert d'abord le candidat au
+meilleur score, puis le plus petit id.
+"""
+
+from flask import current_app
+from sqlalchemy import select, exists
+
+from extensions import db
+from models import User, Swipe, CandidateQueue, CandidateCursor
+import discovery
+import engagement
+import seen
+import swipe_buffer
+import tags
+
+
+DEFAULT_BATCH_SIZE = 200
+
+
+def _batch_size():
+    return current_app.config.get('FEED_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def _heads(user_id, limit, exclude=()):
+    """Renvoie les `limit` meilleurs candidats de la file, hors `exclude`."""
+    # Swipes encore dans le buffer d'écriture : leur ligne de file n'est pas encore supprimée
+    skipped = swipe_buffer.pending_for(user_id) | set(exclude)
+    return db.session.scalars(
+        select(CandidateQueue.candidate_id)
+        .where(CandidateQueue.owner_id == user_id, CandidateQueue.candidate_id.notin_(skipped))
+        .order_by(CandidateQueue.score.desc(), CandidateQueue.candidate_id)
+        .limit(limit)
+    ).all()
+
+
+def refill(user_id, batch_size=None):
+    """
+    Ajoute un lot de candidats non vus, classés, à la file de l'utilisateur.
+
+    On parcourt User.id par ordre croissant à partir du curseur, en excluant
+    (anti-jointure) les profils déjà swipés ou archivés et ceux hors des
+    préférences de découverte, puis on score le lot en une fois
+    (Jaccard sur les vibe tags + popularité). Renvoie le nombre de candidats ajoutés.
+    """
+    batch_size = batch_size or _batch_size()
+
+    cursor = db.session.get(CandidateCursor, user_id)
+    if cursor is None:
+        cursor = CandidateCursor(user_id=user_id, last_candidate_id=0)
+        db.session.add(cursor)
+
+    already_swiped = exists().where(
+        Swipe.swiper_id == user_id,
+        Swipe.swiped_id == User.id
+    )
+    filters = discovery.candidate_filters(discovery.get_preferences(user_id))
+    archived = seen.load(user_id)   # anciens dislikes, sortis de Swipe (voir seen.py)
+    pending = swipe_buffer.pending_for(user_id)
+
+    candidate_ids = []
+    last_id = cursor.last_candidate_id
+    while len(candidate_ids) < batch_size:
+        # Les plages de profils archivés sont sautées sans requête ; la marge
+        # de la page compense les quelques ID archivés filtrés ensuite
+        last_id = archived.next_unseen(last_id + 1) - 1
+        page = db.session.scalars(
+            select(User.id)
+            .where(User.id > last_id, User.id != user_id, ~already_swiped, *filters)
+            .order_by(User.id)
+            .limit(batch_size + batch_size // 2)
+        ).all()
+        if not page:
+            break
+        candidate_ids += [i for i in archived.filter_unseen(page) if i not in pending]
+        last_id = page[-1]
+    if len(candidate_ids) > batch_size:
+        candidate_ids = candidate_ids[:batch_size]
+        last_id = candidate_ids[-1]
+    cursor.last_candidate_id = last_id
+
+    if candidate_ids:
+        scores = tags.jaccard_scores(
+            tags.user_tag_ids(user_id), candidate_ids, tags.tag_pairs(candidate_ids)
+        )
+        weight = current_app.config['FEED_POPULARITY_WEIGHT']
+        if weight:
+            scores = [score + weight * popularity
+                      for score, popularity in zip(scores, engagement.popularity(candidate_ids))]
+        db.session.add_all(
+            CandidateQueue(owner_id=user_id, candidate_id=candidate_id, score=score)
+            for candidate_id, score in zip(candidate_ids, scores)
+        )
+
+    return len(candidate_ids)
+
+
+def next_candidates(user_id, n, exclude=()):
+    """
+    Renvoie jusqu'à n profils à afficher (le paquet du feed), dans l'ordre de la file.
+
+    `exclude` : profils déjà entre les mains du client (paquet en cours, décisions
+    pas encore envoyées). La file est rechargée tant qu'elle ne suffit pas ;
+    moins de n profils signifie qu'il n'y en a plus d'autres à proposer.
+    """
+    exclude = set(exclude)
+    deck = []
+    while len(deck) < n:
+        candidate_ids = _heads(user_id, n - len(deck), exclude)
+        if candidate_ids:
+            exclude.update(candidate_ids)
+            found = {u.id: u for u in db.session.scalars(select(User).where(User.id.in_(candidate_ids)))}
+            deck += [found[i] for i in candidate_ids if i in found]
+            # Profils supprimés entre-temps : on les oublie
+            for candidate_id in set(candidate_ids) - found.keys():
+                consume(user_id, candidate_id)
+            if len(found) < len(candidate_ids):
+                db.session.commit()
+        if len(deck) < n:
+            added = refill(user_id)
+            db.session.commit()
+            if not added:
+                break
+    return deck
+
+
+def next_candidate(user_id):
+    """
+    Renvoie le prochain profil à afficher dans le feed (ou None).
+
+    La file est rechargée automatiquement lorsqu'elle est vide.
+    """
+    deck = next_candidates(user_id, 1)
+    return deck[0] if deck else None
+
+
+def consume(user_id, candidate_id):
+    """Retire un candidat de la file après un swipe (recherche par clé primaire)."""
+    CandidateQueue.query.filter_by(owner_id=user_id, candidate_id=candidate_id).delete()
@@ -0,0 +1,163 @@
+# commands.py
+
+"""
+Commandes `flask ...` de maintenance, enregistrées par init_app(app).
+
+Chaque commande tourne dans le contexte de l'application créée par
+create_app() (flask --app app), qu'elle lit via current_app.
+"""
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db
+import assets
+import conversations
+import engagement
+import message_archive
+import migrations
+import realtime
+import search
+import seeding
+import seen
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def db_upgrade_command():
+    """Applique les migrations de schéma en attente."""
+    applied = migrations.upgrade(log=print)
+    print(f"Schéma en version {migrations.current_version()} ({len(applied)} migration(s) appliquée(s)).")
+
+
+@click.command('rebuild-summaries')
+@click.option('--check', is_flag=True, help="Signale les écarts sans rien modifier.")
+@with_appcontext
+def rebuild_summaries_command(check):
+    """Recalcule les résumés de conversation depuis la table Message."""
+    with db.engine.begin() as conn:
+        drifted = conversations.rebuild_summaries(conn, check_only=check)
+    verb = "à corriger" if check else "corrigé(s)"
+    print(f"{len(drifted)} résumé(s) {verb}" + (f" : {drifted}" if drifted else "."))
+    if check and drifted:
+        raise SystemExit(1)
+
+
+@click.command('rebuild-stats')
+@click.option('--check', is_flag=True, help="Signale les écarts sans rien modifier.")
+@with_appcontext
+def rebuild_stats_command(check):
+    """Recalcule les compteurs d'engagement et les likes en attente depuis Swipe et Match."""
+    with db.engine.begin() as conn:
+        drifted = engagement.rebuild_stats(conn, check_only=check)
+    verb = "à corriger" if check else "corrigé(s)"
+    print(f"{len(drifted)} utilisateur(s) {verb}" + (f" : {drifted}" if drifted else "."))
+    if check and drifted:
+        raise SystemExit(1)
+
+
+@click.command('check-indexes')
+@with_appcontext
+def check_indexes_command():
+    """Vérifie (EXPLAIN QUERY PLAN) que chaque requête de route utilise un index."""
+    failures = 0
+    for name, plan, ok in migrations.explain_route_queries():
+        print(f"[{'OK' if ok else 'SCAN'}] {name}")
+        for step in plan:
+            print(f"      {step}")
+        failures += not ok
+    if failures:
+        raise SystemExit(f"{failures} requête(s) sans index.")
+
+
+@click.command('archive-swipes')
+@click.option('--older-than-days', type=int, default=None,
+              help="Âge minimal des dislikes à archiver (défaut : SEEN_ARCHIVE_AFTER_DAYS).")
+@with_appcontext
+def archive_swipes_command(older_than_days):
+    """Déplace les anciens dislikes de Swipe vers les bitmaps compressés (voir seen.py)."""
+    days = older_than_days if older_than_days is not None else current_app.config['SEEN_ARCHIVE_AFTER_DAYS']
+    archived = seen.archive_dislikes(days, log=print)
+    print(f"{archived} dislike(s) de plus de {days} jour(s) archivé(s).")
+
+
+@click.command('archive-messages')
+@click.option('--older-than-days', type=int, default=None,
+              help="Âge minimal des messages à archiver (défaut : MESSAGE_ARCHIVE_AFTER_DAYS).")
+@with_appcontext
+def archive_messages_command(older_than_days):
+    """Déplace les anciens messages de Message vers des segments compressés (voir message_archive.py)."""
+    days = older_than_days if older_than_days is not None else current_app.config['MESSAGE_ARCHIVE_AFTER_DAYS']
+    archived = message_archive.archive_messages(days, log=print)
+    print(f"{archived} message(s) de plus de {days} jour(s) archivé(s).")
+
+
+@click.command('realtime')
+@with_appcontext
+def realtime_command():
+    """Serveur SSE du chat (REALTIME_MODE = 'external'), alimenté par la table Message."""
+    config = current_app.config
+    print(f"Flux temps réel sur http://{config['REALTIME_HOST']}:{config['REALTIME_PORT']}")
+    realtime.serve_forever(current_app._get_current_object())
+
+
+@click.command('search-index')
+@click.option('--check', is_flag=True, help="Vérifie les index sans les reconstruire.")
+@with_appcontext
+def search_index_command(check):
+    """Reconstruit les index de recherche plein texte depuis les tables (voir search.py)."""
+    with db.engine.begin() as conn:
+        if check:
+            broken = search.check(conn)
+            print(f"Index à reconstruire : {', '.join(broken)}" if broken else "Index de recherche cohérents.")
+            if broken:
+                raise SystemExit(1)
+        else:
+            search.rebuild(conn, log=print)
+
+
+@click.command('seed-data')
+@click.option('--users', default=1000, show_default=True, help="Nombre d'utilisateurs.")
+@click.option('--swipes', default=20000, show_default=True, help='Nombre de swipes.')
+@click.option('--like-ratio', default=0.35, show_default=True, help='Proportion de likes.')
+@click.option('--matches', default=500, show_default=True, help='Nombre de matchs.')
+@click.option('--messages-per-match', default=10, show_default=True, help='Messages par match (moyenne).')
+@click.option('--seed', default=42, show_default=True, help='Graine du générateur aléatoire.')
+@with_appcontext
+def seed_data_command(users, swipes, like_ratio, matches, messages_per_match, seed):
+    """Remplit une base vide avec des données synthétiques (voir seeding.py)."""
+    try:
+        seeding.generate(users, swipes, like_ratio, matches, messages_per_match, seed, log=print)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    print(f"Mot de passe de tous les comptes : {seeding.SEED_PASSWORD}")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Versionne et pré-compresse les fichiers de static/ (écrit static/manifest.json)."""
+    manifest = assets.build(current_app.static_folder)
+    current_app.extensions['asset_manifest'] = manifest
+    for logical, hashed in sorted(manifest.items()):
+        print(f"{logical} -> {hashed}")
+
+
+COMMANDS = [
+    db_upgrade_command,
+    rebuild_summaries_command,
+    rebuild_stats_command,
+    check_indexes_command,
+    archive_swipes_command,
+    archive_messages_command,
+    realtime_command,
+    search_index_command,
+    seed_data_command,
+    build_assets_command,
+]
+
+
+def init_app(app):
+    for command in COMMANDS:
+        app.cli.add_command(command)
@@ -10,8 +10,101 @@ class Config:
     # 1. Configuration de la Base de Données (ESSENTIEL)
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///vibe_zone.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Profil 'production' : WAL, PRAGMA et pool ci-dessous, lectures routées (voir database.py)
+    DB_PROFILE = os.getenv('DB_PROFILE', 'default')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))             # secondes
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -65536))     # négatif = Kio (64 Mio)
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))    # 256 Mio
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    DB_SERIALIZE_WRITES = os.getenv('DB_SERIALIZE_WRITES', '1') == '1'  # un écrivain par processus
     
     # 2. Configuration des Photos de Profil (ajouts)
     # Le chemin complet doit utiliser app.root_path pour être sûr
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/profile_pics')
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # Traitement des photos : 'process' (pool en arrière-plan) ou 'sync' (dans la requête)
+    IMAGE_PROCESSING = os.getenv('IMAGE_PROCESSING', 'process')
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    # Image affichée pendant le traitement d'une nouvelle photo
+    PROFILE_PIC_PLACEHOLDER = 'default.jpg'
+
+    # 3. Feed : nombre de candidats pré-calculés (et classés ensemble) à chaque remplissage
+    FEED_BATCH_SIZE = int(os.getenv('FEED_BATCH_SIZE', 200))
+    # Profils envoyés d'un coup au navigateur (paquet swipé sans recharger, voir static/js/main.js)
+    FEED_DECK_SIZE = int(os.getenv('FEED_DECK_SIZE', 10))
+    FEED_DECK_MAX = int(os.getenv('FEED_DECK_MAX', 50))
+
+    # 4. API de swipes groupés : taille maximale d'un lot
+    SWIPE_BATCH_MAX = int(os.getenv('SWIPE_BATCH_MAX', 100))
+
+    # 5. Chat : nombre de messages par page d'historique
+    CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', 50))
+
+    # 6. Cache des utilisateurs chargés à chaque requête : 'local' (LRU + TTL) ou 'none'
+    USER_CACHE_BACKEND = os.getenv('USER_CACHE_BACKEND', 'none')
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))          # secondes
+    USER_CACHE_MAXSIZE = int(os.getenv('USER_CACHE_MAXSIZE', 10000))
+
+    # 7. Dislikes plus anciens que ce délai : archivés en bitmap par `flask archive-swipes`
+    SEEN_ARCHIVE_AFTER_DAYS = int(os.getenv('SEEN_ARCHIVE_AFTER_DAYS', 30))
+
+    # 8. Swipes : 'direct' (un commit par clic) ou 'buffered' (journal + écriture par lots,
+    #    voir swipe_buffer.py pour les garanties de durabilité)
+    SWIPE_WRITE_MODE = os.getenv('SWIPE_WRITE_MODE', 'direct')
+    SWIPE_BUFFER_DIR = os.getenv('SWIPE_BUFFER_DIR', 'instance/swipe_log')
+    SWIPE_FLUSH_INTERVAL_MS = int(os.getenv('SWIPE_FLUSH_INTERVAL_MS', 200))
+    SWIPE_FLUSH_MAX_ITEMS = int(os.getenv('SWIPE_FLUSH_MAX_ITEMS', 500))
+    SWIPE_LOG_FSYNC = os.getenv('SWIPE_LOG_FSYNC', '1') == '1'
+
+    # 9. Mesures par requête (temps SQL / templates, requêtes lentes) exposées sur /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', '0') == '1'   # détail visible dans le navigateur
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    # /metrics n'existe que si METRICS_TOKEN est défini : en-tête "Authorization: Bearer <jeton>"
+    # (bearer_token de la configuration Prometheus)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+    # 10. Cartes de profil rendues gardées en mémoire (clé : id + version du profil), ou 'none'
+    PROFILE_CARD_CACHE = os.getenv('PROFILE_CARD_CACHE', 'local')
+    PROFILE_CARD_CACHE_MAXSIZE = int(os.getenv('PROFILE_CARD_CACHE_MAXSIZE', 5000))
+    PROFILE_CARD_CACHE_TTL = int(os.getenv('PROFILE_CARD_CACHE_TTL', 600))   # secondes
+
+    # 11. Chat en temps réel (SSE, voir realtime.py) : 'off', 'thread' (même processus) ou 'external'
+    REALTIME_MODE = os.getenv('REALTIME_MODE', 'off')
+    REALTIME_HOST = os.getenv('REALTIME_HOST', '127.0.0.1')
+    REALTIME_PORT = int(os.getenv('REALTIME_PORT', 8001))
+    REALTIME_URL = os.getenv('REALTIME_URL', '')                       # adresse vue par le navigateur
+    REALTIME_ALLOWED_ORIGINS = os.getenv('REALTIME_ALLOWED_ORIGINS', '')  # vide : même hôte, autre port
+    REALTIME_MAX_CONNECTIONS = int(os.getenv('REALTIME_MAX_CONNECTIONS', 10000))
+    REALTIME_HEARTBEAT_S = int(os.getenv('REALTIME_HEARTBEAT_S', 20))
+    REALTIME_QUEUE_SIZE = int(os.getenv('REALTIME_QUEUE_SIZE', 100))   # messages en attente par connexion
+    REALTIME_DB_THREADS = int(os.getenv('REALTIME_DB_THREADS', 4))
+    REALTIME_POLL_INTERVAL_MS = int(os.getenv('REALTIME_POLL_INTERVAL_MS', 250))   # mode 'external'
+
+    # 12. Recherche plein texte (FTS5, voir search.py)
+    SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 20))
+    SEARCH_RANK_POOL = int(os.getenv('SEARCH_RANK_POOL', 500))   # résultats les plus récents classés par pertinence
+
+    # 13. Mots de passe : paramètres werkzeug et pool de hachage borné (voir passwords.py)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')   # ou 'pbkdf2:sha256:1000000'
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 1))       # processus ; 0 : dans la requête
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 8))  # au-delà : 503 immédiat
+    PASSWORD_HASH_TIMEOUT_S = float(os.getenv('PASSWORD_HASH_TIMEOUT_S', 5))
+    PASSWORD_HASH_NICE = int(os.getenv('PASSWORD_HASH_NICE', 10))            # priorité CPU abaissée des processus
+
+    # 14. Compteurs d'engagement (voir engagement.py) : popularité dans le score du feed, likes en attente
+    FEED_POPULARITY_WEIGHT = float(os.getenv('FEED_POPULARITY_WEIGHT', 0.25))   # 0 : classement par tags seul
+    FEED_POPULARITY_PIVOT = int(os.getenv('FEED_POPULARITY_PIVOT', 20))         # likes reçus pour un signal de 0.5
+    INBOX_PENDING_LIKES = int(os.getenv('INBOX_PENDING_LIKES', 12))             # "ils t'ont liké" dans /inbox
+
+    # 15. Archivage des anciens messages en segments compressés par `flask archive-messages`
+    #     (voir message_archive.py) ; les derniers messages de chaque conversation restent dans Message
+    MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv('MESSAGE_ARCHIVE_AFTER_DAYS', 90))
+    MESSAGE_ARCHIVE_KEEP_RECENT = int(os.getenv('MESSAGE_ARCHIVE_KEEP_RECENT', 100))   # >= CHAT_PAGE_SIZE
+    MESSAGE_SEGMENT_SIZE = int(os.getenv('MESSAGE_SEGMENT_SIZE', 256))                 # messages par segment
+    MESSAGE_SEGMENT_COMPRESSION = int(os.getenv('MESSAGE_SEGMENT_COMPRESSION', 6))     # niveau zlib (1-9)
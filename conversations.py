@@ -0,0 +1,294 @@
+# conversations.py
+
+"""
+Conversations : historique paginé et résumés pour la boîte de réception.
+
+L'historique est lu par pages avec un curseur keyset (timestamp, id) sur
+l'index ix_message_conversation : la page la plus récente d'abord, puis
+"charger plus anciens" avec le curseur du plus vieux message affiché.
+Au-delà des messages restés dans Message, la lecture continue dans les
+segments archivés (voir message_archive.py) avec le même curseur.
+
+Les résumés (ConversationSummary, une ligne par match) sont mis à jour dans
+la même transaction que l'envoi d'un message ou la création d'un match, ce
+qui permet à /inbox de tout afficher en une seule requête indexée.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import tuple_, text, case, or_, select
+
+from extensions import db
+from models import User, Message, ConversationSummary, conversation_key
+import message_archive
+
+
+SNIPPET_LENGTH = 80
+
+
+def encode_cursor(message):
+    """Curseur opaque pour l'URL : '<timestamp iso>_<id>'."""
+    return f'{message.timestamp.isoformat()}_{message.id}'
+
+
+def decode_cursor(cursor):
+    """Inverse de encode_cursor() ; renvoie None si le curseur est invalide."""
+    try:
+        timestamp, message_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def history_page(user_a_id, user_b_id, limit, before=None, until=None):
+    """
+    Renvoie (messages, older_cursor) : les `limit` messages précédant `before`
+    (ou les plus récents), dans l'ordre chronologique. Avec `until` (curseur
+    d'un message, ex: résultat de recherche), la page se termine sur ce
+    message, inclus.
+
+    older_cursor vaut None s'il n'y a pas de messages plus anciens.
+    """
+    query = Message.conversation(user_a_id, user_b_id)
+    position = tuple_(Message.timestamp, Message.id)
+    if until is not None:
+        query = query.filter(position <= tuple_(*until))
+    elif before is not None:
+        query = query.filter(position < tuple_(*before))
+
+    # Une ligne de plus pour savoir s'il reste des messages plus anciens
+    rows = query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        # Partie chaude épuisée : la suite est dans les segments archivés, tous plus anciens
+        if rows:
+            oldest, inclusive = (rows[-1].timestamp, rows[-1].id), False
+        else:
+            oldest, inclusive = until or before, until is not None
+        rows += message_archive.messages_before(
+            conversation_key(user_a_id, user_b_id), oldest, limit + 1 - len(rows), inclusive=inclusive
+        )
+    has_older = len(rows) > limit
+    messages = list(reversed(rows[:limit]))
+
+    older_cursor = encode_cursor(messages[0]) if has_older else None
+    return messages, older_cursor
+
+
+def messages_after(user_a_id, user_b_id, after_id, limit):
+    """
+    Messages postérieurs au message `after_id` (rafraîchissement incrémental).
+
+    On relit l'horodatage du message de référence (clé primaire) pour rester
+    sur un parcours d'intervalle de l'index (conversation, timestamp, id).
+    """
+    query = Message.conversation(user_a_id, user_b_id)
+    anchor = db.session.get(Message, after_id) if after_id else None
+    if anchor is not None and anchor.conversation_key == conversation_key(user_a_id, user_b_id):
+        query = query.filter(
+            tuple_(Message.timestamp, Message.id) > tuple_(anchor.timestamp, anchor.id)
+        )
+    elif after_id:
+        query = query.filter(Message.id > after_id)
+
+    return query.order_by(Message.timestamp.asc(), Message.id.asc()).limit(limit).all()
+
+
+def message_to_dict(message):
+    return {
+        'id': message.id,
+        'sender_id': message.sender_id,
+        'recipient_id': message.recipient_id,
+        'body': message.body,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+
+# --- RÉSUMÉS DE CONVERSATION ---
+
+def create_summaries(matches):
+    """Crée le résumé des nouveaux matchs [(match_id, user1_id, user2_id, timestamp)]."""
+    db.session.add_all(
+        ConversationSummary(match_id=match_id, user1_id=user1_id, user2_id=user2_id,
+                            last_activity_at=timestamp)
+        for match_id, user1_id, user2_id, timestamp in matches
+    )
+
+
+def record_message(match, message):
+    """
+    Met à jour le résumé après l'envoi d'un message (même transaction).
+
+    UPDATE atomique : les compteurs sont incrémentés côté SQL, sans lecture préalable.
+    """
+    db.session.flush()  # attribue message.id
+    unread_column = 'user1_unread' if message.recipient_id == match.user1_id else 'user2_unread'
+    updated = ConversationSummary.query.filter_by(match_id=match.id).update({
+        'last_activity_at': message.timestamp,
+        'last_message_id': message.id,
+        'last_sender_id': message.sender_id,
+        'last_message_snippet': message.body[:SNIPPET_LENGTH],
+        unread_column: getattr(ConversationSummary, unread_column) + 1,
+    }, synchronize_session=False)
+
+    if not updated:
+        # Match antérieur aux résumés et pas encore reconstruit : on crée la ligne
+        summary = ConversationSummary(
+            match_id=match.id, user1_id=match.user1_id, user2_id=match.user2_id,
+            last_activity_at=message.timestamp, last_message_id=message.id,
+            last_sender_id=message.sender_id,
+            last_message_snippet=message.body[:SNIPPET_LENGTH],
+        )
+        setattr(summary, unread_column, 1)
+        db.session.add(summary)
+
+
+def mark_read(match, user_id):
+    """Remet à zéro les non-lus de user_id ; ne fait aucune écriture s'il n'y en a pas."""
+    summary = db.session.get(ConversationSummary, match.id)
+    if summary is None or not summary.unread_for(user_id):
+        return False
+    side = summary.side(user_id)
+    setattr(summary, side + '_unread', 0)
+    setattr(summary, side + '_last_read_id', summary.last_message_id or 0)
+    return True
+
+
+def delete_message(match, message_id, sender_id, timestamp=None):
+    """
+    Supprime un message envoyé par sender_id, qu'il soit encore dans Message
+    ou archivé, et met le résumé à jour (même transaction). Renvoie False si
+    le message n'existe pas dans cette conversation.
+
+    `timestamp` (date du message affiché) limite la recherche dans les
+    archives à un seul segment (voir message_archive.delete_message).
+    """
+    key = conversation_key(match.user1_id, match.user2_id)
+    message = db.session.get(Message, message_id)
+    if message is None or message.conversation_key != key or message.sender_id != sender_id:
+        message = None   # archivé (un message archivé a toujours été lu), ou absent
+        if message_archive.delete_message(key, message_id, timestamp, sender_id=sender_id) is None:
+            return False
+    else:
+        db.session.delete(message)
+    db.session.flush()
+
+    # Le dernier message d'une conversation reste toujours dans Message
+    latest = Message.conversation(match.user1_id, match.user2_id) \
+        .order_by(Message.timestamp.desc(), Message.id.desc()).first()
+    if latest is None and message_archive.restore_newest(key):
+        latest = Message.conversation(match.user1_id, match.user2_id) \
+            .order_by(Message.timestamp.desc(), Message.id.desc()).first()
+
+    summary = db.session.get(ConversationSummary, match.id)
+    if summary is None:
+        return True
+    if message is not None:
+        side = summary.side(message.recipient_id)
+        if message.id > getattr(summary, side + '_last_read_id'):
+            setattr(summary, side + '_unread', max(getattr(summary, side + '_unread') - 1, 0))
+    if summary.last_message_id == message_id:
+        summary.last_message_id = latest.id if latest else None
+        summary.last_sender_id = latest.sender_id if latest else None
+        summary.last_message_snippet = latest.body[:SNIPPET_LENGTH] if latest else None
+        summary.last_activity_at = latest.timestamp if latest else match.timestamp
+    return True
+
+
+def inbox_query(user_id):
+    """
+    Requête de la boîte de réception : OR servi par les index
+    (userX_id, last_activity_at), jointure sur la clé primaire de l'autre utilisateur.
+    """
+    other_id = case(
+        (ConversationSummary.user1_id == user_id, ConversationSummary.user2_id),
+        else_=ConversationSummary.user1_id,
+    )
+    return (
+        select(ConversationSummary, User)
+        .join(User, User.id == other_id)
+        .where(or_(ConversationSummary.user1_id == user_id,
+                   ConversationSummary.user2_id == user_id))
+        .order_by(ConversationSummary.last_activity_at.desc())
+    )
+
+
+def inbox(user_id):
+    """Conversations de l'utilisateur, la plus active en premier : [(résumé, autre utilisateur)]."""
+    return db.session.execute(inbox_query(user_id)).all()
+
+
+# Résumés attendus, recalculés depuis Match et Message.
+# Les positions de lecture existantes sont conservées pour recompter les non-lus.
+_EXPECTED_SUMMARIES_SQL = """
+WITH last AS (
+    SELECT conversation_key, id, sender_id, body, timestamp,
+           ROW_NUMBER() OVER (
+               PARTITION BY conversation_key ORDER BY timestamp DESC, id DESC
+           ) AS rn
+    FROM message
+)
+SELECT m.id AS match_id, m.user1_id, m.user2_id,
+       COALESCE(l.timestamp, m.timestamp) AS last_activity_at,
+       l.id AS last_message_id,
+       l.sender_id AS last_sender_id,
+       substr(l.body, 1, :snippet_length) AS last_message_snippet,
+       (SELECT COUNT(*) FROM message x
+         WHERE x.conversation_key = m.user1_id || ':' || m.user2_id
+           AND x.recipient_id = m.user1_id
+           AND x.id > COALESCE(s.user1_last_read_id, 0)) AS user1_unread,
+       (SELECT COUNT(*) FROM message x
+         WHERE x.conversation_key = m.user1_id || ':' || m.user2_id
+           AND x.recipient_id = m.user2_id
+           AND x.id > COALESCE(s.user2_last_read_id, 0)) AS user2_unread,
+       COALESCE(s.user1_last_read_id, 0) AS user1_last_read_id,
+       COALESCE(s.user2_last_read_id, 0) AS user2_last_read_id
+FROM "match" m
+LEFT JOIN last l ON l.conversation_key = m.user1_id || ':' || m.user2_id AND l.rn = 1
+LEFT JOIN conversation_summary s ON s.match_id = m.id
+"""
+
+_SUMMARY_COLUMNS = (
+    'match_id', 'user1_id', 'user2_id', 'last_activity_at', 'last_message_id',
+    'last_sender_id', 'last_message_snippet', 'user1_unread', 'user2_unread',
+    'user1_last_read_id', 'user2_last_read_id',
+)
+
+
+def rebuild_summaries(conn, check_only=False):
+    """
+    Recalcule les résumés depuis Message (rattrapage et contrôle de cohérence).
+
+    Renvoie la liste des match_id dont le résumé était absent, obsolète ou
+    orphelin. En mode check_only, rien n'est écrit.
+    """
+    expected = {
+        row.match_id: tuple(row)
+        for row in conn.execute(text(_EXPECTED_SUMMARIES_SQL),
+                                {'snippet_length': SNIPPET_LENGTH})
+    }
+    current = {
+        row.match_id: tuple(row)
+        for row in conn.execute(text(
+            f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM conversation_summary"
+        ))
+    }
+
+    drifted = sorted(
+        match_id for match_id in expected.keys() | current.keys()
+        if expected.get(match_id) != current.get(match_id)
+    )
+    if check_only or not drifted:
+        return drifted
+
+    orphans = [match_id for match_id in drifted if match_id not in expected]
+    if orphans:
+        conn.execute(text('DELETE FROM conversation_summary WHERE match_id = :match_id'),
+                     [{'match_id': match_id} for match_id in orphans])
+    rows = [dict(zip(_SUMMARY_COLUMNS, expected[match_id]))
+            for match_id in drifted if match_id in expected]
+    if rows:
+        conn.execute(text(
+            f"INSERT OR REPLACE INTO conversation_summary ({', '.join(_SUMMARY_COLUMNS)}) "
+            f"VALUES ({', '.join(':' + column for column in _SUMMARY_COLUMNS)})"
+        ), rows)
+    return drifted
@@ -0,0 +1,137 @@
+# database.py
+
+"""
+Profil SQLite de production : WAL, PRAGMA réglés, pool et routage lecture/écriture.
+
+Activé par DB_PROFILE = 'production' (le profil 'default' garde le
+comportement d'origine de SQLite) :
+
+    - journal WAL : les lecteurs ne bloquent plus derrière un commit (et
+      inversement) ; synchronous = NORMAL : plus de fsync à chaque commit,
+      seulement aux checkpoints. Une coupure de courant peut annuler les
+      tout derniers commits, sans jamais corrompre la base ;
+    - cache_size, mmap_size et busy_timeout appliqués à chaque connexion ;
+    - pool de connexions dimensionné (DB_POOL_SIZE, DB_MAX_OVERFLOW) ;
+    - un second moteur 'replica' sur le même fichier, en PRAGMA query_only,
+      sert les SELECT des vues marquées @read_only (profils, matches, inbox,
+      recherche), qui n'écrivent jamais. Toute écriture, et toute lecture qui
+      la suit dans la même transaction, passe par le moteur principal.
+"""
+
+import threading
+from functools import wraps
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
+
+
+REPLICA = 'replica'
+
+# SQLite n'accepte qu'un écrivain : les threads du processus attendent ce verrou
+# (réveil immédiat) plutôt que la boucle d'attente de busy_timeout (jusqu'à 100 ms)
+_writer_lock = threading.Lock()
+_serialize_writes = False
+
+
+def _is_select(clause):
+    """
+    Requête en lecture ? Un text() brut n'a pas is_select (seul .columns() le
+    pose) : on regarde alors son premier mot.
+    """
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith('SELECT')
+    return getattr(clause, 'is_select', False)
+
+
+class RoutingSession(Session):
+    """
+    Session qui envoie les SELECT des vues en lecture seule au moteur 'replica'
+    et, si DB_SERIALIZE_WRITES, sérialise ses transactions d'écriture.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engines = self._db.engines
+        is_write = self._flushing or not _is_select(clause)
+        if (
+            bind is None
+            and REPLICA in engines
+            and self.info.get('read_only')
+            and not self.info.get('wrote')
+            and not is_write
+        ):
+            return engines[REPLICA]
+        # Écriture (ou requête non reconnue) : moteur principal jusqu'au commit,
+        # pour que les lectures suivantes voient les lignes pas encore commitées
+        if is_write and not self.info.get('wrote'):
+            self.info['wrote'] = True
+            if _serialize_writes:
+                _writer_lock.acquire()
+                self.info['holds_writer_lock'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _end_of_transaction(session, transaction):
+    if transaction.parent is not None:
+        return
+    session.info.pop('wrote', None)
+    if session.info.pop('holds_writer_lock', False):
+        _writer_lock.release()
+
+
+def read_only(view):
+    """Décorateur de vue : ses SELECT peuvent être servis par le moteur 'replica'."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from extensions import db
+        db.session.info['read_only'] = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# --- CONFIGURATION ---
+
+def configure(app):
+    """À appeler avant db.init_app : options des moteurs selon DB_PROFILE."""
+    global _serialize_writes
+    if app.config['DB_PROFILE'] != 'production':
+        return
+    _serialize_writes = app.config['DB_SERIALIZE_WRITES']
+    # Options communes à tous les moteurs (principal et 'replica')
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update({
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+    })
+    app.config.setdefault('SQLALCHEMY_BINDS', {}).setdefault(REPLICA, app.config['SQLALCHEMY_DATABASE_URI'])
+
+
+def _pragmas(app, read_only_engine=False):
+    statements = [
+        f"PRAGMA journal_mode = {app.config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(app.config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(app.config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA busy_timeout = {int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        'PRAGMA query_only = ON' if read_only_engine else None,
+    ]
+    return [statement for statement in statements if statement]
+
+
+def init_app(app):
+    """À appeler après db.init_app : PRAGMA appliqués à chaque nouvelle connexion."""
+    if app.config['DB_PROFILE'] != 'production':
+        return
+    from extensions import db
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            statements = _pragmas(app, read_only_engine=(key == REPLICA))
+
+            @event.listens_for(engine, 'connect')
+            def set_pragmas(dbapi_connection, connection_record, statements=statements):
+                cursor = dbapi_connection.cursor()
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.close()
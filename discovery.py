@@ -0,0 +1,85 @@
+# discovery.py
+
+"""
+Préférences de découverte : ville et tranche d'âge des profils proposés.
+
+Les critères sont traduits en prédicats SQL servis par l'index
+ix_user_discovery (city_key, date_of_birth, id) :
+    city_key = :ville AND date_of_birth BETWEEN :née_au_plus_tôt AND :née_au_plus_tard
+L'âge n'est jamais calculé ligne par ligne : la tranche [min, max] est
+convertie une fois par jour en bornes de date de naissance (dob_bounds).
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+from extensions import db
+from models import User, DiscoveryPreference, CandidateQueue, CandidateCursor, normalize_city
+
+
+MIN_AGE = 18
+MAX_AGE = 99
+
+
+def years_before(day, years):
+    """Même jour, `years` ans plus tôt (un 29 février devient un 28 février)."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+@lru_cache(maxsize=1024)
+def dob_bounds(min_age, max_age, today):
+    """
+    (née au plus tôt, née au plus tard) pour un âge compris entre min_age et max_age.
+
+    On a `age >= min_age` ssi la naissance date d'au moins min_age ans, et
+    `age <= max_age` ssi elle date de moins de max_age + 1 ans. Une borne
+    absente (None) donne None.
+    """
+    earliest = years_before(today, max_age + 1) + timedelta(days=1) if max_age is not None else None
+    latest = years_before(today, min_age) if min_age is not None else None
+    return earliest, latest
+
+
+def get_preferences(user_id):
+    return db.session.get(DiscoveryPreference, user_id)
+
+
+def candidate_filters(preferences, today=None):
+    """Prédicats SQL à ajouter à la requête des candidats (liste vide = tout le monde)."""
+    if preferences is None:
+        return []
+    filters = []
+    if preferences.city_key:
+        filters.append(User.city_key == preferences.city_key)
+    earliest, latest = dob_bounds(preferences.min_age, preferences.max_age, today or date.today())
+    if earliest is not None and latest is not None:
+        filters.append(User.date_of_birth.between(earliest, latest))
+    elif earliest is not None:
+        filters.append(User.date_of_birth >= earliest)
+    elif latest is not None:
+        filters.append(User.date_of_birth <= latest)
+    return filters
+
+
+def save_preferences(user_id, city, min_age, max_age):
+    """
+    Enregistre les critères (city=None : partout) et repart d'une file vide.
+
+    Les candidats déjà en file ne correspondent plus forcément : la file et le
+    curseur sont remis à zéro. Les profils déjà swipés restent exclus (Swipe).
+    """
+    preferences = get_preferences(user_id)
+    if preferences is None:
+        preferences = DiscoveryPreference(user_id=user_id)
+        db.session.add(preferences)
+    preferences.city = city or None
+    preferences.city_key = normalize_city(city)
+    preferences.min_age = min_age
+    preferences.max_age = max_age
+
+    CandidateQueue.query.filter_by(owner_id=user_id).delete()
+    CandidateCursor.query.filter_by(user_id=user_id).update({'last_candidate_id': 0})
+    return preferences
@@ -0,0 +1,245 @@
+# engagement.py
+
+"""
+Compteurs d'engagement et likes en attente ("qui m'a liké").
+
+Compter les likes reçus d'un utilisateur, ou lister ceux auxquels il n'a pas
+répondu, demanderait un parcours de Swipe (swiped_id, liked) avec une
+anti-jointure sur les swipes en retour et les matchs. À la place :
+
+  - UserStats : likes reçus, likes envoyés et matchs, une ligne par
+    utilisateur, incrémentée par UPSERT (aucune lecture préalable) ;
+  - PendingLike : likes reçus sans réponse, rangés par destinataire ; une
+    ligne disparaît quand le destinataire swipe en retour ou qu'un match se crée.
+
+Les deux sont mis à jour par swipes.py dans la même transaction que les
+swipes et les matchs. rebuild_stats() les recalcule depuis Swipe, Match et
+les dislikes archivés (seen.py) et signale les écarts (`flask rebuild-stats`).
+
+Les likes reçus donnent aussi un signal de popularité, saturé
+(likes / (likes + FEED_POPULARITY_PIVOT)), que candidates.py ajoute au score
+de compatibilité du feed.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, delete, exists, func, text, tuple_
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import User, Swipe, SeenBitmap, UserStats, PendingLike
+from seen import SeenSet
+
+
+_COUNTERS = ('likes_received', 'likes_sent', 'matches')
+
+
+# --- MISE À JOUR INCRÉMENTALE (appelée par swipes.py) ---
+
+# Instructions construites une fois et exécutées en executemany : compilées une
+# seule fois par SQLAlchemy (un VALUES multi-lignes serait recompilé à chaque lot)
+_upsert = insert(UserStats.__table__)
+_UPSERT_STATS = _upsert.on_conflict_do_update(index_elements=['user_id'], set_={
+    **{column: getattr(UserStats.__table__.c, column) + getattr(_upsert.excluded, column) for column in _COUNTERS},
+    'updated_at': _upsert.excluded.updated_at,
+})
+_INSERT_PENDING = insert(PendingLike.__table__).on_conflict_do_nothing()
+
+
+def _add_counts(increments):
+    """
+    UPSERT {user_id: (likes reçus, likes envoyés, matchs)} : additionné côté SQL.
+
+    updated_at (Last-Modified des pages de profil) prend l'heure de l'écriture,
+    pas celle des swipes, antérieure au vidage du buffer d'écriture.
+    """
+    if not increments:
+        return
+    now = datetime.utcnow()
+    db.session.execute(_UPSERT_STATS, [
+        dict(zip(_COUNTERS, counts), user_id=user_id, updated_at=now)
+        for user_id, counts in increments.items()
+    ])
+
+
+def record_swipes(swiper_id, recorded, liked_ids, timestamp):
+    """
+    Après l'insertion des swipes `recorded` de swiper_id (dont `liked_ids` sont des likes) :
+    compteurs de likes, réponses aux likes en attente et nouveaux likes en attente.
+
+    À appeler avant la création des matchs du lot (create_matches retire
+    ensuite les likes en attente des paires matchées).
+    """
+    # 1. Le swiper a répondu (like ou dislike) aux likes qu'il avait reçus de ces profils
+    if recorded:
+        db.session.execute(delete(PendingLike).where(
+            PendingLike.user_id == swiper_id, PendingLike.liker_id.in_(recorded)
+        ))
+    if not liked_ids:
+        return
+
+    increments = {swiped_id: (1, 0, 0) for swiped_id in liked_ids}
+    increments[swiper_id] = (0, len(liked_ids), 0)
+    _add_counts(increments)
+
+    # 2. Like en attente pour les destinataires qui n'ont pas encore vu le swiper :
+    #    ni swipe en retour, ni match (buffer d'écriture, voir swipe_buffer.py), ni dislike archivé
+    from swipes import match_exists   # swipes.py importe ce module
+    waiting = db.session.scalars(
+        select(User.id).where(
+            User.id.in_(liked_ids),
+            ~exists().where(Swipe.swiper_id == User.id, Swipe.swiped_id == swiper_id),
+            ~match_exists(swiper_id),
+        )
+    ).all()
+    if not waiting:
+        return
+    archived = {
+        user_id for user_id, data in db.session.execute(
+            select(SeenBitmap.user_id, SeenBitmap.data).where(SeenBitmap.user_id.in_(waiting))
+        ) if swiper_id in SeenSet(data)
+    }
+    rows = [
+        {'user_id': swiped_id, 'liker_id': swiper_id, 'timestamp': timestamp}
+        for swiped_id in waiting if swiped_id not in archived
+    ]
+    if rows:
+        db.session.execute(_INSERT_PENDING, rows)
+
+
+def record_matches(matches):
+    """Nouveaux matchs [(match_id, user1_id, user2_id, timestamp)] : compteurs et likes en attente."""
+    if not matches:
+        return
+    increments = {}
+    pairs = []
+    for _, user1_id, user2_id, _ in matches:
+        for user_id in (user1_id, user2_id):
+            increments[user_id] = (0, 0, increments.get(user_id, (0, 0, 0))[2] + 1)
+        pairs += [(user1_id, user2_id), (user2_id, user1_id)]
+    _add_counts(increments)
+    db.session.execute(delete(PendingLike).where(tuple_(PendingLike.user_id, PendingLike.liker_id).in_(pairs)))
+
+
+def record_unmatch(user1_id, user2_id):
+    """Fin d'un match : un match de moins pour chacun (les likes restent, comme les swipes)."""
+    _add_counts({user1_id: (0, 0, -1), user2_id: (0, 0, -1)})
+
+
+# --- LECTURE ---
+
+def stats_for(user_id):
+    """Compteurs de l'utilisateur (UserStats à zéro, non ajouté à la session, s'il n'en a pas)."""
+    return db.session.get(UserStats, user_id) or UserStats(
+        user_id=user_id, likes_received=0, likes_sent=0, matches=0, updated_at=None
+    )
+
+
+def pending_likes(user_id, limit):
+    """Les `limit` likes en attente les plus récents : [(PendingLike, User)]."""
+    return db.session.execute(
+        select(PendingLike, User)
+        .join(User, User.id == PendingLike.liker_id)
+        .where(PendingLike.user_id == user_id)
+        .order_by(PendingLike.timestamp.desc())
+        .limit(limit)
+    ).all()
+
+
+def pending_count(user_id):
+    return db.session.scalar(
+        select(func.count()).select_from(PendingLike).where(PendingLike.user_id == user_id)
+    )
+
+
+def popularity(user_ids):
+    """Signal de popularité dans [0, 1) de chaque profil, dans l'ordre de user_ids."""
+    pivot = current_app.config['FEED_POPULARITY_PIVOT']
+    likes = dict(db.session.execute(
+        select(UserStats.user_id, UserStats.likes_received).where(UserStats.user_id.in_(list(user_ids)))
+    ).all())
+    return [likes.get(user_id, 0) / (likes.get(user_id, 0) + pivot) for user_id in user_ids]
+
+
+# --- RECONSTRUCTION ---
+
+# Compteurs attendus, recalculés depuis Swipe (les likes ne sont jamais archivés) et Match
+_EXPECTED_STATS_SQL = """
+WITH events AS (
+    SELECT swiped_id AS user_id, 1 AS received, 0 AS sent, 0 AS matched FROM swipe WHERE liked
+    UNION ALL SELECT swiper_id, 0, 1, 0 FROM swipe WHERE liked
+    UNION ALL SELECT user1_id, 0, 0, 1 FROM "match"
+    UNION ALL SELECT user2_id, 0, 0, 1 FROM "match"
+)
+SELECT user_id, SUM(received), SUM(sent), SUM(matched) FROM events GROUP BY user_id
+"""
+
+# Likes sans swipe en retour ni match ; les dislikes archivés sont filtrés ensuite (bitmaps)
+_EXPECTED_PENDING_SQL = """
+SELECT s.swiped_id, s.swiper_id, s.timestamp
+FROM swipe s
+WHERE s.liked
+  AND NOT EXISTS (SELECT 1 FROM swipe r WHERE r.swiper_id = s.swiped_id AND r.swiped_id = s.swiper_id)
+  AND NOT EXISTS (SELECT 1 FROM "match" m
+                   WHERE m.user1_id = min(s.swiper_id, s.swiped_id)
+                     AND m.user2_id = max(s.swiper_id, s.swiped_id))
+"""
+
+
+def rebuild_stats(conn, check_only=False):
+    """
+    Recalcule UserStats et PendingLike depuis Swipe, Match et les bitmaps des
+    dislikes archivés (rattrapage et contrôle de cohérence).
+
+    Renvoie la liste des user_id dont les compteurs ou les likes en attente
+    étaient faux. En mode check_only, rien n'est écrit.
+    """
+    zero = (0, 0, 0)
+    expected = {row[0]: tuple(row[1:]) for row in conn.execute(text(_EXPECTED_STATS_SQL))}
+    current = {row[0]: tuple(row[1:]) for row in conn.execute(text(
+        f"SELECT user_id, {', '.join(_COUNTERS)} FROM user_stats"
+    ))}
+    stale_stats = [
+        user_id for user_id in expected.keys() | current.keys()
+        if expected.get(user_id, zero) != current.get(user_id, zero)
+    ]
+
+    candidates = {(user_id, liker_id): timestamp
+                  for user_id, liker_id, timestamp in conn.execute(text(_EXPECTED_PENDING_SQL))}
+    archived = {user_id: SeenSet(data) for user_id, data in conn.execute(text(
+        'SELECT user_id, data FROM seen_bitmap'
+    ))}
+    expected_pending = {
+        pair: timestamp for pair, timestamp in candidates.items()
+        if pair[0] not in archived or pair[1] not in archived[pair[0]]
+    }
+    current_pending = {(user_id, liker_id): timestamp for user_id, liker_id, timestamp in conn.execute(text(
+        'SELECT user_id, liker_id, timestamp FROM pending_like'
+    ))}
+    stale_pending = [
+        pair for pair in expected_pending.keys() | current_pending.keys()
+        if expected_pending.get(pair) != current_pending.get(pair)
+    ]
+
+    drifted = sorted(set(stale_stats) | {user_id for user_id, _ in stale_pending})
+    if check_only or not drifted:
+        return drifted
+
+    if stale_stats:
+        conn.execute(text(
+            f"INSERT OR REPLACE INTO user_stats (user_id, {', '.join(_COUNTERS)}, updated_at) "
+            f"VALUES (:user_id, {', '.join(':' + column for column in _COUNTERS)}, CURRENT_TIMESTAMP)"
+        ), [dict(zip(_COUNTERS, expected.get(user_id, zero)), user_id=user_id) for user_id in stale_stats])
+    removed = [pair for pair in stale_pending if pair not in expected_pending]
+    if removed:
+        conn.execute(text('DELETE FROM pending_like WHERE user_id = :user_id AND liker_id = :liker_id'),
+                     [{'user_id': user_id, 'liker_id': liker_id} for user_id, liker_id in removed])
+    added = [pair for pair in stale_pending if pair in expected_pending]
+    if added:
+        conn.execute(text(
+            'INSERT OR REPLACE INTO pending_like (user_id, liker_id, timestamp) '
+            'VALUES (:user_id, :liker_id, :timestamp)'
+        ), [{'user_id': user_id, 'liker_id': liker_id, 'timestamp': expected_pending[(user_id, liker_id)]}
+            for user_id, liker_id in added])
+    return drifted
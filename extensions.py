@@ -1,3 +1,13 @@
+from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+from database import RoutingSession
+
+# Session capable d'envoyer les lectures au moteur 'replica' (voir database.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Flask-Login : branché sur l'application par create_app() (voir app.py)
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message_category = 'info'
+login_manager.login_message = "Veuillez vous connecter pour accéder à cette page."
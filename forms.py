@@ -10,7 +10,6 @@ except ImportError:
 
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
 from flask_wtf.file import FileField, FileAllowed # NOUVEAU
-from PIL import Image
 
 class RegistrationForm(FlaskForm):
     # Authentification
@@ -46,8 +45,8 @@ class LoginForm(FlaskForm):
 # forms.py (ajouts)
 
 # ... (Imports et autres classes de formulaire) ...
-from wtforms import TextAreaField
-from wtforms.validators import DataRequired, Length
+from wtforms import TextAreaField, IntegerField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
 
 class MessageForm(FlaskForm):
     body = TextAreaField('Message', validators=[
@@ -56,9 +55,23 @@ class MessageForm(FlaskForm):
     ])
     submit = SubmitField('Envoyer')
 
+class ConfirmForm(FlaskForm):
+    """Bouton seul (jeton CSRF) : fin d'un match, suppression d'un message."""
+    submit = SubmitField('Confirmer')
+
 class UpdateProfileForm(FlaskForm):
     # Champ de téléchargement d'image
     picture = FileField("Téléverser une photo de profil (JPG/PNG)", validators=[
         FileAllowed(['jpg', 'png', 'jpeg'], 'Seules les images JPG, PNG sont autorisées.')
     ])
-    submit = SubmitField('Enregistrer la photo')
\ No newline at end of file
+    submit = SubmitField('Enregistrer la photo')
+class DiscoveryForm(FlaskForm):
+    # Ville vide : profils de partout
+    city = StringField('Ville (laisser vide pour voir partout)', validators=[Optional(), Length(max=100)])
+    min_age = IntegerField('Âge minimum', validators=[DataRequired(), NumberRange(min=18, max=99)])
+    max_age = IntegerField('Âge maximum', validators=[DataRequired(), NumberRange(min=18, max=99)])
+    submit = SubmitField('Enregistrer mes préférences')
+
+    def validate_max_age(self, max_age):
+        if self.min_age.data is not None and max_age.data is not None and max_age.data < self.min_age.data:
+            raise ValidationError("L'âge maximum doit être supérieur ou égal à l'âge minimum.")
@@ -0,0 +1,199 @@
+# images.py
+
+"""
+Traitement des photos de profil en arrière-plan.
+
+La requête d'upload lit le fichier, calcule son empreinte (SHA-256) et rend
+la main tout de suite : l'utilisateur garde sa photo actuelle pendant qu'un
+pool de processus génère les déclinaisons (card, avatar, thumb) en WebP et
+JPEG. User.image_file est mis à jour à la fin du traitement, si l'upload est
+toujours le dernier en date : User.pending_picture garde l'empreinte de la
+photo attendue, et un traitement plus lent qu'un upload suivant n'écrase pas
+la nouvelle photo. En cas d'échec, seul pending_picture est effacé.
+
+Comme pour le pool de hachage (passwords.py), les processus démarrent par
+forkserver : pas de fork() d'un processus web multi-thread.
+
+Les fichiers produits sont nommés d'après l'empreinte du contenu :
+    <empreinte>_card.jpg, <empreinte>_card.webp, <empreinte>_avatar.jpg, ...
+Un même fichier envoyé deux fois n'est donc traité qu'une seule fois.
+"""
+
+import hashlib
+import io
+import os
+import multiprocessing
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from extensions import db
+
+
+# Déclinaisons générées : nom -> taille maximale (la card reprend l'ancien 400x400)
+SIZES = {
+    'card': (400, 400),
+    'avatar': (150, 150),
+    'thumb': (64, 64),
+}
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+# image_file produit par ce module : '<empreinte>_card.jpg'
+_RENDITION_NAME = re.compile(r'^(?P<digest>[0-9a-f]{32})_card\.jpg$')
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = {}   # {empreinte: Future} : évite de traiter deux fois le même contenu
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def rendition_name(digest, size='card', fmt='jpg'):
+    return f'{digest}_{size}.{fmt}'
+
+
+def has_renditions(image_file):
+    """Photo produite par ce module (déclinaisons WebP / JPEG disponibles) ?"""
+    return _RENDITION_NAME.match(image_file or '') is not None
+
+
+def rendition(image_file, size='card', fmt='jpg'):
+    """
+    Nom de fichier d'une déclinaison de la photo `image_file`.
+
+    Les anciennes photos (nom aléatoire, une seule taille) sont renvoyées telles
+    quelles : elles n'ont pas de WebP (voir has_renditions).
+    """
+    match = _RENDITION_NAME.match(image_file or '')
+    if not match:
+        return image_file
+    return rendition_name(match.group('digest'), size, fmt)
+
+
+def render_renditions(data, dest_dir, digest):
+    """
+    Décode l'image et écrit toutes ses déclinaisons (exécuté dans un processus du pool).
+
+    Pour un JPEG, draft() laisse le décodeur réduire l'image dès le décodage
+    (échelle 1/2, 1/4 ou 1/8), bien moins coûteux qu'un décodage plein format.
+    """
+    # Pillow n'est chargé que par les processus qui traitent des photos
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    largest = max(SIZES.values())
+    if image.format == 'JPEG':
+        image.draft('RGB', largest)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    # Du plus grand au plus petit : chaque réduction repart de la précédente
+    for size_name, size in sorted(SIZES.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail(size)
+        for fmt, pil_format in FORMATS.items():
+            path = os.path.join(dest_dir, rendition_name(digest, size_name, fmt))
+            # Fichier temporaire propre à ce traitement : deux processus peuvent
+            # traiter la même empreinte, chacun publie un fichier complet
+            fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, pil_format, quality=85)
+                os.chmod(tmp_path, 0o644)   # mkstemp crée en 0600 : fichier servi tel quel
+                os.replace(tmp_path, path)  # jamais de fichier à moitié écrit
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+    return rendition_name(digest)
+
+
+def _get_executor(app):
+    """Pool créé au premier upload (appelé avec _executor_lock déjà pris)."""
+    global _executor
+    if _executor is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _executor = ProcessPoolExecutor(max_workers=app.config['IMAGE_WORKERS'], mp_context=context)
+    return _executor
+
+
+def _set_picture(app, user_id, digest, image_file):
+    """
+    Appelé par le pool à la fin du traitement (thread hors requête). Sans
+    effet si un autre upload a remplacé celui-ci entre-temps. `image_file`
+    None : échec du traitement, la photo actuelle reste en place.
+    """
+    with app.app_context():
+        from models import User
+        from user_cache import cache
+        pending = User.query.filter_by(id=user_id, pending_picture=digest)
+        if image_file is None:
+            pending.update({'pending_picture': None})
+            db.session.commit()
+            return
+        updated = pending.update({
+            'image_file': image_file,
+            'pending_picture': None,
+            'version': User.version + 1,   # UPDATE groupé : pas de before_update (voir models.py)
+            'updated_at': datetime.utcnow(),
+        })
+        db.session.commit()
+        if updated:
+            cache.invalidate(user_id)  # UPDATE groupé : pas d'événement ORM
+
+
+def store_upload(app, user, upload):
+    """
+    Enregistre la photo envoyée par `user` et met à jour user.image_file.
+
+    Renvoie True si la photo définitive est déjà en place (contenu déjà connu
+    ou traitement synchrone), False si elle est en cours de traitement : la
+    photo actuelle reste affichée, et l'empreinte attendue est enregistrée
+    (commit) avant le lancement du travail, pour que la fin du traitement ne
+    puisse pas être écrasée par la requête.
+    """
+    data = upload.read()
+    digest = content_digest(data)
+    dest_dir = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+    final_name = rendition_name(digest)
+
+    # 1. Contenu déjà connu : aucune retouche nécessaire (un traitement en cours est abandonné)
+    if os.path.exists(os.path.join(dest_dir, final_name)):
+        user.image_file = final_name
+        user.pending_picture = None
+        return True
+
+    # 2. Traitement synchrone (développement, scripts) si demandé
+    if app.config['IMAGE_PROCESSING'] == 'sync':
+        user.image_file = render_renditions(data, dest_dir, digest)
+        user.pending_picture = None
+        return True
+
+    # 3. Sinon : pool de processus ; seul le traitement de cette empreinte
+    #    pourra remplacer la photo actuelle
+    user.pending_picture = digest
+    db.session.commit()
+    user_id = user.id
+
+    with _executor_lock:
+        future = _in_flight.get(digest)
+        if future is None:
+            future = _get_executor(app).submit(render_renditions, data, dest_dir, digest)
+            _in_flight[digest] = future
+
+    def on_done(done):
+        with _executor_lock:
+            _in_flight.pop(digest, None)
+        if done.exception() is not None:
+            app.logger.error("Échec du traitement de la photo de l'utilisateur %s : %s",
+                             user_id, done.exception())
+            _set_picture(app, user_id, digest, None)
+            return
+        _set_picture(app, user_id, digest, done.result())
+
+    future.add_done_callback(on_done)
+    return False
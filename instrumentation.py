@@ -0,0 +1,239 @@
+# instrumentation.py
+
+"""
+Mesures par requête : durée totale, temps SQL, temps de rendu, nombre de requêtes.
+
+Activé par METRICS_ENABLED. Pour chaque requête HTTP, on cumule :
+    - le temps passé dans les requêtes SQL (événements before/after_cursor_execute,
+      tous moteurs confondus, replica compris) et leur nombre ;
+    - le temps de rendu des templates (signaux before_render_template /
+      template_rendered) ;
+    - la durée totale de la vue.
+Les requêtes SQL plus lentes que SLOW_QUERY_MS sont journalisées (logger
+'vibezone.slow_query') sous forme normalisée : littéraux remplacés par ?,
+listes IN repliées, espaces compactés.
+
+Les compteurs sont exposés au format texte Prometheus sur /metrics, route
+réservée au collecteur : elle n'existe que si METRICS_TOKEN est défini et
+exige l'en-tête "Authorization: Bearer <METRICS_TOKEN>". Si
+SERVER_TIMING_HEADER, ils sont aussi renvoyés au navigateur dans l'en-tête
+Server-Timing (db, tpl, app). Les compteurs sont propres à chaque processus : avec
+plusieurs workers, Prometheus doit interroger chacun d'eux (ou agréger).
+"""
+
+import hmac
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import Response, abort, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+
+
+slow_query_logger = logging.getLogger('vibezone.slow_query')
+
+# Secondes ; mêmes bornes que les clients Prometheus officiels
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_SKIPPED_ENDPOINTS = ('static', 'metrics')
+
+
+# --- NORMALISATION DES REQUÊTES ---
+
+_SPACES = re.compile(r'\s+')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def normalize_statement(statement):
+    """'SELECT ... WHERE id IN (?, ?, ?) LIMIT 5' -> 'SELECT ... WHERE id IN (?...) LIMIT ?'."""
+    statement = _LITERALS.sub('?', _SPACES.sub(' ', statement).strip())
+    return _IN_LISTS.sub('(?...)', statement)
+
+
+# --- REGISTRE PROMETHEUS (minimal, sans dépendance) ---
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ('%s="%s"' % (n, str(v).replace('\\', '\\\\').replace('"', '\\"')) for n, v in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self._values = {} if labels else {(): 0}   # sans label : exposé à 0 dès le départ
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                yield f'{self.name}{_format_labels(self.labels, label_values)} {value:g}'
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self.buckets = tuple(buckets)
+        self._values = {}   # {labels: [compteurs par borne..., somme, total]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            for label_values, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ('le',), label_values + (f'{bound:g}',))
+                    yield f'{self.name}_bucket{labels} {cumulative}'
+                labels = _format_labels(self.labels + ('le',), label_values + ('+Inf',))
+                yield f'{self.name}_bucket{labels} {row[-1]}'
+                yield f'{self.name}_sum{_format_labels(self.labels, label_values)} {row[-2]:g}'
+                yield f'{self.name}_count{_format_labels(self.labels, label_values)} {row[-1]}'
+
+
+REQUESTS = Counter('vibezone_http_requests_total', 'Requêtes HTTP traitées.', ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = Histogram('vibezone_http_request_duration_seconds', 'Durée totale des requêtes HTTP.',
+                            ('endpoint',))
+REQUEST_DB_SECONDS = Counter('vibezone_http_request_db_seconds_total', 'Temps passé en requêtes SQL.',
+                             ('endpoint',))
+REQUEST_TEMPLATE_SECONDS = Counter('vibezone_http_request_template_seconds_total',
+                                   'Temps passé à rendre les templates.', ('endpoint',))
+REQUEST_QUERIES = Counter('vibezone_db_queries_total', 'Requêtes SQL émises, par vue.', ('endpoint',))
+QUERY_SECONDS = Histogram('vibezone_db_query_duration_seconds', 'Durée des requêtes SQL.')
+SLOW_QUERIES = Counter('vibezone_db_slow_queries_total', 'Requêtes SQL plus lentes que SLOW_QUERY_MS.')
+
+METRICS = (REQUESTS, REQUEST_SECONDS, REQUEST_DB_SECONDS, REQUEST_TEMPLATE_SECONDS,
+           REQUEST_QUERIES, QUERY_SECONDS, SLOW_QUERIES)
+
+
+def render_metrics():
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+# --- MESURES ---
+
+class RequestStats:
+    __slots__ = ('start', 'db_seconds', 'queries', 'template_seconds', 'template_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.template_seconds = 0.0
+        self.template_start = None
+
+
+# ContextVar plutôt que flask.g : lu à chaque requête SQL, sans passer par les proxys de Flask
+_current_stats = ContextVar('request_stats', default=None)
+
+
+def _watch_engine(engine, slow_query_seconds):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        QUERY_SECONDS.observe(elapsed)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_seconds += elapsed
+            stats.queries += 1
+        if elapsed >= slow_query_seconds:
+            SLOW_QUERIES.inc()
+            slow_query_logger.warning('%.1f ms (%s) %s', elapsed * 1000,
+                                      request.endpoint if has_request_context() else '-',
+                                      normalize_statement(statement))
+
+
+def init_app(app):
+    """Branche les mesures (si METRICS_ENABLED) et la route /metrics (si METRICS_TOKEN)."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    from extensions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _watch_engine(engine, app.config['SLOW_QUERY_MS'] / 1000)
+
+    @app.before_request
+    def start_request_stats():
+        _current_stats.set(RequestStats())
+
+    @app.teardown_request
+    def clear_request_stats(exc):
+        _current_stats.set(None)
+
+    def template_started(sender, template, context, **extra):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.template_start = time.perf_counter()
+
+    def template_finished(sender, template, context, **extra):
+        stats = _current_stats.get()
+        if stats is not None and stats.template_start is not None:
+            stats.template_seconds += time.perf_counter() - stats.template_start
+            stats.template_start = None
+
+    # Références gardées sur l'app : les signaux ne tiennent que des références faibles
+    app.extensions['instrumentation'] = (template_started, template_finished)
+    before_render_template.connect(template_started, app)
+    template_rendered.connect(template_finished, app)
+
+    @app.after_request
+    def record_request_stats(response):
+        stats = _current_stats.get()
+        endpoint = request.endpoint or 'inconnu'
+        if stats is None or endpoint in _SKIPPED_ENDPOINTS:
+            return response
+        total = time.perf_counter() - stats.start
+        REQUESTS.inc(1, endpoint, request.method, response.status_code)
+        REQUEST_SECONDS.observe(total, endpoint)
+        REQUEST_DB_SECONDS.inc(stats.db_seconds, endpoint)
+        REQUEST_TEMPLATE_SECONDS.inc(stats.template_seconds, endpoint)
+        REQUEST_QUERIES.inc(stats.queries, endpoint)
+
+        if app.config['SERVER_TIMING_HEADER']:
+            app_seconds = max(total - stats.db_seconds - stats.template_seconds, 0.0)
+            response.headers['Server-Timing'] = (
+                f'db;desc="{stats.queries} requetes SQL";dur={stats.db_seconds * 1000:.2f}, '
+                f'tpl;dur={stats.template_seconds * 1000:.2f}, '
+                f'app;dur={app_seconds * 1000:.2f}'
+            )
+        return response
+
+    token = app.config['METRICS_TOKEN']
+    if not token:
+        return
+
+    @app.route('/metrics')
+    def metrics():
+        # Temps et nombre de requêtes par route : réservé au collecteur
+        scheme, _, presented = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(presented.encode(), token.encode()):
+            abort(401)
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
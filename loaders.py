@@ -0,0 +1,95 @@
+# loaders.py
+
+"""
+Chargeur d'entités par requête HTTP (anti N+1).
+
+Les vues annoncent les ID dont elles auront besoin (want / load_many) ; le
+premier accès déclenche une seule requête `IN` pour tous les ID en attente.
+Les entités chargées restent en cache jusqu'à la fin de la requête (flask.g),
+ce qui évite à load_user, profile() ou chat() de relire le même utilisateur.
+
+Les matchs sont rangés par paire ordonnée (user1_id, user2_id), la clé sous
+laquelle les vues les cherchent (load_match) ; ceux déjà lus par une autre
+requête (ex: la liste de /matches) sont ajoutés au cache par prime().
+"""
+
+from flask import g
+
+from extensions import db
+from models import User, Match, ordered_pair
+
+
+def _key(entity):
+    """Clé de cache d'une entité : la paire ordonnée pour un Match, l'ID sinon."""
+    return (entity.user1_id, entity.user2_id) if isinstance(entity, Match) else entity.id
+
+
+class EntityLoader:
+    """Cache d'identité + regroupement des chargements par clé primaire."""
+
+    def __init__(self):
+        self._cache = {}     # {modèle: {id: entité ou None}}
+        self._pending = {}   # {modèle: {id, ...}} pas encore chargés
+
+    def want(self, model, ids):
+        """Annonce des ID à charger au prochain accès (aucune requête ici)."""
+        cache = self._cache.setdefault(model, {})
+        self._pending.setdefault(model, set()).update(i for i in ids if i not in cache)
+
+    def _dispatch(self, model):
+        pending = self._pending.pop(model, set())
+        if not pending:
+            return
+        cache = self._cache.setdefault(model, {})
+        for entity in db.session.scalars(db.select(model).where(model.id.in_(pending))):
+            cache[entity.id] = entity
+        for missing_id in pending - cache.keys():
+            cache[missing_id] = None
+
+    def load(self, model, entity_id):
+        """Renvoie l'entité (ou None) ; charge au passage tous les ID en attente."""
+        cache = self._cache.setdefault(model, {})
+        if entity_id not in cache:
+            self.want(model, [entity_id])
+            self._dispatch(model)
+        return cache[entity_id]
+
+    def load_many(self, model, ids):
+        """Renvoie les entités existantes dans l'ordre des ID, en une requête au plus."""
+        ids = list(ids)
+        self.want(model, ids)
+        self._dispatch(model)
+        cache = self._cache[model]
+        return [cache[i] for i in ids if cache[i] is not None]
+
+    def load_match(self, user_a_id, user_b_id):
+        """Match entre deux utilisateurs (ou None), lu une fois par requête HTTP."""
+        pair = ordered_pair(user_a_id, user_b_id)
+        cache = self._cache.setdefault(Match, {})
+        if pair not in cache:
+            cache[pair] = Match.between(*pair).first()
+        return cache[pair]
+
+    def prime(self, *entities):
+        """Ajoute au cache des entités déjà chargées par une autre requête."""
+        for entity in entities:
+            self._cache.setdefault(type(entity), {})[_key(entity)] = entity
+
+
+def get_loader():
+    """Chargeur propre à la requête en cours (créé au premier appel)."""
+    if 'entity_loader' not in g:
+        g.entity_loader = EntityLoader()
+    return g.entity_loader
+
+
+def load_user(user_id):
+    return get_loader().load(User, user_id)
+
+
+def load_users(user_ids):
+    return get_loader().load_many(User, user_ids)
+
+
+def load_match(user_a_id, user_b_id):
+    return get_loader().load_match(user_a_id, user_b_id)
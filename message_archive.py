@@ -0,0 +1,338 @@
+# message_archive.py
+
+"""
+Archivage à froid des anciennes conversations en segments compressés.
+
+La table Message ne fait que grandir, alors que chat() lit presque toujours
+la fin de la conversation. archive_messages() déplace, conversation par
+conversation, les messages plus anciens que MESSAGE_ARCHIVE_AFTER_DAYS dans
+des segments (MessageSegment) : jusqu'à MESSAGE_SEGMENT_SIZE messages en JSON
+colonnaire compressé par zlib, avec un petit index (premier et dernier
+message, nombre) sur (conversation_key, last_timestamp, last_id).
+
+Seul un préfixe de chaque conversation est archivé, dans l'ordre (timestamp, id)
+de l'historique : les messages archivés précèdent toujours ceux restés dans
+Message, et conversations.history_page() continue simplement dans les
+segments quand la partie chaude est épuisée. Le préfixe s'arrête :
+  - avant les MESSAGE_ARCHIVE_KEEP_RECENT derniers messages, toujours gardés
+    (première page du chat, dernier message du résumé de conversation) ;
+  - au premier message pas encore lu par son destinataire : les non-lus
+    recalculés par rebuild_summaries() ne lisent que la table Message.
+
+Les messages archivés sortent de message_fts (trigger de suppression, voir
+search.py) et entrent dans message_archive_fts, un index sans contenu tenu à
+jour ici à chaque écriture de segment : la recherche continue de les trouver.
+La suppression d'un message et la fin d'un match passent par
+delete_message() / delete_conversation(), qui réécrivent les segments.
+
+    flask archive-messages [--older-than-days 90]
+"""
+
+import json
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, delete, insert, text, tuple_
+
+from extensions import db
+from models import Message, MessageSegment, ConversationSummary
+
+
+# --- FORMAT DES SEGMENTS ---
+
+def _recipient_id(key, sender_id):
+    """L'autre participant de la conversation '3:17'."""
+    user1_id, user2_id = map(int, key.split(':'))
+    return user2_id if sender_id == user1_id else user1_id
+
+
+def encode(messages, level=6):
+    """Messages (ordre de l'historique) -> JSON colonnaire compressé."""
+    columns = {
+        'id': [m.id for m in messages],
+        'sender_id': [m.sender_id for m in messages],
+        'timestamp': [m.timestamp.isoformat() for m in messages],
+        'body': [m.body for m in messages],
+    }
+    return zlib.compress(json.dumps(columns, ensure_ascii=False, separators=(',', ':')).encode(), level)
+
+
+def _rows(data):
+    """[(id, sender_id, timestamp, body)] d'un segment, dans l'ordre de l'historique."""
+    columns = json.loads(zlib.decompress(data))
+    return list(zip(columns['id'], columns['sender_id'],
+                    map(datetime.fromisoformat, columns['timestamp']), columns['body']))
+
+
+# Instance vide, comme celles du chargement par l'ORM : le constructeur déclaratif
+# (un événement par attribut) coûterait ici plus que la décompression du segment
+_new_message = Message.__mapper__.class_manager.new_instance
+
+
+def _message(key, row):
+    message_id, sender_id, timestamp, body = row
+    message = _new_message()
+    message.__dict__.update(id=message_id, sender_id=sender_id, recipient_id=_recipient_id(key, sender_id),
+                            body=body, timestamp=timestamp, conversation_key=key)
+    return message
+
+
+def decode(data, key):
+    """Inverse de encode() : objets Message détachés (hors session), dans l'ordre de l'historique."""
+    return [_message(key, row) for row in _rows(data)]
+
+
+# --- INDEX DE RECHERCHE ---
+# message_archive_fts (voir search.py) : une entrée par message archivé, de
+# rowid segment.id * SEGMENT_SLOTS + position du message dans le segment. Un
+# segment réécrit change d'id : ses entrées sont retirées puis recréées.
+
+SEGMENT_SLOTS = 1 << 16   # positions par segment dans le rowid (MESSAGE_SEGMENT_SIZE au plus)
+
+_INDEX = text('INSERT INTO message_archive_fts (rowid, body, conversation_key) VALUES (:rowid, :body, :key)')
+# Index sans contenu : la suppression redonne les valeurs indexées
+_UNINDEX = text("INSERT INTO message_archive_fts (message_archive_fts, rowid, body, conversation_key) "
+                "VALUES ('delete', :rowid, :body, :key)")
+
+
+def _index_entries(segment_id, key, messages):
+    return [{'rowid': segment_id * SEGMENT_SLOTS + position, 'body': m.body, 'key': key}
+            for position, m in enumerate(messages)]
+
+
+def _add_segments(key, messages):
+    """Range `messages` dans de nouveaux segments de MESSAGE_SEGMENT_SIZE messages au plus, indexés."""
+    size = min(current_app.config['MESSAGE_SEGMENT_SIZE'], SEGMENT_SLOTS)
+    level = current_app.config['MESSAGE_SEGMENT_COMPRESSION']
+    chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+    segments = [
+        MessageSegment(
+            conversation_key=key, count=len(chunk), data=encode(chunk, level),
+            first_timestamp=chunk[0].timestamp, first_id=chunk[0].id,
+            last_timestamp=chunk[-1].timestamp, last_id=chunk[-1].id,
+        )
+        for chunk in chunks
+    ]
+    if not segments:
+        return
+    db.session.add_all(segments)
+    db.session.flush()   # attribue segment.id
+    db.session.execute(_INDEX, [entry for segment, chunk in zip(segments, chunks)
+                                for entry in _index_entries(segment.id, key, chunk)])
+
+
+def _drop_segment(segment, messages):
+    """Supprime `segment` (dont `messages` est le contenu décodé) et ses entrées d'index."""
+    db.session.execute(_UNINDEX, _index_entries(segment.id, segment.conversation_key, messages))
+    db.session.delete(segment)
+
+
+def reindex(conn, log=None):
+    """Remplit message_archive_fts depuis les segments (migration, `flask search-index`)."""
+    conn.execute(text("INSERT INTO message_archive_fts (message_archive_fts) VALUES ('delete-all')"))
+    count = 0
+    for segment_id, key, data in conn.execute(
+        select(MessageSegment.id, MessageSegment.conversation_key, MessageSegment.data)
+    ):
+        entries = [{'rowid': segment_id * SEGMENT_SLOTS + position, 'body': row[3], 'key': key}
+                   for position, row in enumerate(_rows(data))]
+        if entries:
+            conn.execute(_INDEX, entries)
+        count += len(entries)
+    if log:
+        log(f'message_archive_fts reconstruit ({count} messages archivés)')
+
+
+def indexed_messages(rowids):
+    """Messages archivés des entrées `rowids` de message_archive_fts, sans ordre particulier."""
+    positions = {}
+    for rowid in rowids:
+        positions.setdefault(rowid // SEGMENT_SLOTS, []).append(rowid % SEGMENT_SLOTS)
+    if not positions:
+        return []
+    found = []
+    for segment_id, key, data in db.session.execute(
+        select(MessageSegment.id, MessageSegment.conversation_key, MessageSegment.data)
+        .where(MessageSegment.id.in_(positions))
+    ):
+        rows = _rows(data)
+        found += [_message(key, rows[position]) for position in positions[segment_id] if position < len(rows)]
+    return found
+
+
+def _newest_segment(key):
+    return db.session.scalars(
+        select(MessageSegment).where(MessageSegment.conversation_key == key)
+        .order_by(MessageSegment.last_timestamp.desc(), MessageSegment.last_id.desc()).limit(1)
+    ).first()
+
+
+# --- LECTURE ---
+
+def messages_before(key, before, limit, inclusive=False):
+    """
+    Les `limit` messages archivés précédant `before` ((timestamp, id), ou None
+    pour les plus récents), du plus récent au plus ancien. `inclusive` : le
+    message `before` lui-même en fait partie.
+
+    Les segments sont lus du plus récent au plus ancien, en une requête
+    consommée au fur et à mesure : seuls les segments nécessaires sont
+    lus et décompressés.
+    """
+    query = (
+        select(MessageSegment.data)
+        .where(MessageSegment.conversation_key == key)
+        .order_by(MessageSegment.last_timestamp.desc(), MessageSegment.last_id.desc())
+    )
+    if before is not None:
+        first = tuple_(MessageSegment.first_timestamp, MessageSegment.first_id)
+        query = query.where(first <= tuple_(*before) if inclusive else first < tuple_(*before))
+
+    found = []
+    with db.session.execute(query) as segments:
+        for data, in segments:
+            rows = _rows(data)
+            # Position du curseur dans le segment (ordre de l'historique) ; seuls les
+            # messages renvoyés deviennent des objets Message
+            if before is None:
+                end = len(rows)
+            else:
+                end = (bisect_right if inclusive else bisect_left)([(row[2], row[0]) for row in rows], tuple(before))
+            found += reversed(rows[max(end - (limit - len(found)), 0):end])
+            if len(found) >= limit:
+                break
+    return [_message(key, row) for row in found]
+
+
+# --- ARCHIVAGE ---
+
+def archive_conversation(key, cutoff, summary=None):
+    """
+    Archive le préfixe archivable de la conversation `key` (voir le module).
+    Le commit est laissé à l'appelant. Renvoie le nombre de messages archivés.
+    """
+    keep_recent = max(current_app.config['MESSAGE_ARCHIVE_KEEP_RECENT'], 1)
+    in_conversation = Message.conversation_key == key
+    history = (Message.timestamp, Message.id)
+
+    # Le plus ancien des messages toujours gardés : on archive strictement avant
+    boundary = db.session.execute(
+        select(*history).where(in_conversation)
+        .order_by(Message.timestamp.desc(), Message.id.desc()).offset(keep_recent - 1).limit(1)
+    ).first()
+    if boundary is None:
+        return 0
+
+    last_read = {}
+    if summary is not None:
+        last_read = {summary.user1_id: summary.user1_last_read_id, summary.user2_id: summary.user2_last_read_id}
+    rows = db.session.execute(
+        select(Message.id, Message.sender_id, Message.recipient_id, Message.timestamp, Message.body)
+        .where(in_conversation, Message.timestamp < cutoff, tuple_(*history) < tuple_(*boundary))
+        .order_by(*history)
+    ).all()
+    prefix = []
+    for row in rows:
+        if row.id > last_read.get(row.recipient_id, 0):
+            break   # pas encore lu : lui et les suivants restent dans Message
+        prefix.append(row)
+    if not prefix:
+        return 0
+
+    # Le dernier segment incomplet est réécrit avec les nouveaux messages
+    carried = []
+    newest = _newest_segment(key)
+    if newest is not None and newest.count < current_app.config['MESSAGE_SEGMENT_SIZE']:
+        carried = decode(newest.data, key)
+        _drop_segment(newest, carried)
+    _add_segments(key, carried + prefix)
+
+    # Le préfixe est une plage de l'index (conversation_key, timestamp, id)
+    last = prefix[-1]
+    db.session.execute(delete(Message).where(in_conversation, tuple_(*history) <= tuple_(last.timestamp, last.id)))
+    return len(prefix)
+
+
+def archive_messages(older_than_days, log=None):
+    """
+    Archive les messages de plus de `older_than_days` jours, une conversation
+    à la fois (lecture, segments, suppression des lignes, commit).
+    Renvoie le nombre de messages archivés.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    keys = db.session.scalars(select(Message.conversation_key).where(Message.timestamp < cutoff).distinct()).all()
+
+    archived = 0
+    for key in keys:
+        user1_id, user2_id = map(int, key.split(':'))
+        summary = db.session.scalars(
+            select(ConversationSummary).where(ConversationSummary.user1_id == user1_id,
+                                              ConversationSummary.user2_id == user2_id)
+        ).first()
+        count = archive_conversation(key, cutoff, summary)
+        db.session.commit()
+
+        archived += count
+        if log and count:
+            log(f'Conversation {key} : {count} messages archivés')
+    return archived
+
+
+# --- SUPPRESSION ---
+
+def delete_message(key, message_id, timestamp=None, sender_id=None):
+    """
+    Retire des segments de la conversation le message `message_id` (envoyé
+    par `sender_id` si précisé). Son segment est réécrit, ou supprimé s'il
+    devient vide. Renvoie le message retiré, ou None.
+
+    Avec `timestamp`, seul le segment dont la plage (timestamp, id) contient
+    le message est lu ; sans, ceux dont la plage d'ID le contient (les ID
+    suivent l'ordre d'envoi).
+    """
+    in_conversation = MessageSegment.conversation_key == key
+    if timestamp is not None:
+        position = (timestamp, message_id)
+        candidates = select(MessageSegment).where(
+            in_conversation,
+            tuple_(MessageSegment.last_timestamp, MessageSegment.last_id) >= tuple_(*position),
+        ).order_by(MessageSegment.last_timestamp, MessageSegment.last_id).limit(1)
+    else:
+        candidates = select(MessageSegment).where(
+            in_conversation, MessageSegment.first_id <= message_id, MessageSegment.last_id >= message_id,
+        )
+    for segment in db.session.scalars(candidates).all():
+        messages = decode(segment.data, key)
+        hit = next((m for m in messages if m.id == message_id), None)
+        if hit is None or (sender_id is not None and hit.sender_id != sender_id):
+            continue
+        _drop_segment(segment, messages)
+        _add_segments(key, [m for m in messages if m is not hit])
+        return hit
+    return None
+
+
+def delete_conversation(key):
+    """Supprime tous les segments de la conversation et leurs entrées d'index (fin du match)."""
+    for segment in db.session.scalars(select(MessageSegment).where(MessageSegment.conversation_key == key)).all():
+        _drop_segment(segment, decode(segment.data, key))
+
+
+def restore_newest(key):
+    """
+    Remet le segment le plus récent dans Message (la conversation n'a plus de
+    message chaud, ex: après suppressions). Renvoie le nombre de messages remis.
+    """
+    segment = _newest_segment(key)
+    if segment is None:
+        return 0
+    messages = decode(segment.data, key)
+    db.session.execute(insert(Message), [
+        {'id': m.id, 'sender_id': m.sender_id, 'recipient_id': m.recipient_id, 'body': m.body,
+         'timestamp': m.timestamp, 'conversation_key': key}
+        for m in messages
+    ])
+    _drop_segment(segment, messages)
+    return len(messages)
@@ -0,0 +1,295 @@
+# migrations.py
+
+"""
+Migrations versionnées du schéma SQLite.
+
+La version courante du schéma est stockée dans `PRAGMA user_version`.
+Chaque migration est une fonction (connexion) -> None, appliquée une seule
+fois et dans l'ordre. Les étapes sont idempotentes (IF NOT EXISTS, test des
+colonnes) car db.create_all() peut avoir déjà créé une partie du schéma.
+
+    flask db-upgrade      # applique les migrations en attente
+    flask check-indexes   # EXPLAIN QUERY PLAN des requêtes des routes
+"""
+
+from sqlalchemy import text, inspect
+
+from extensions import db
+
+
+# --- OUTILS ---
+
+def _has_column(conn, table, column):
+    return any(col['name'] == column for col in inspect(conn).get_columns(table))
+
+
+def _get_version(conn):
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def _set_version(conn, version):
+    # PRAGMA n'accepte pas de paramètre lié ; version est toujours un entier
+    conn.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+
+
+# --- MIGRATIONS ---
+
+def _v1_swipe_indexes(conn):
+    """Index composites + unicité (swiper_id, swiped_id) sur Swipe."""
+    # Supprime les doublons éventuels avant de poser la contrainte d'unicité
+    conn.execute(text("""
+        DELETE FROM swipe WHERE id NOT IN (
+            SELECT MIN(id) FROM swipe GROUP BY swiper_id, swiped_id
+        )
+    """))
+    conn.execute(text('DROP INDEX IF EXISTS ix_swipe_swiper_swiped'))
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_swipe_swiper_swiped ON swipe (swiper_id, swiped_id)'
+    ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_swipe_swiped_swiper_liked ON swipe (swiped_id, swiper_id, liked)'
+    ))
+
+
+def _v2_match_ordered_pairs(conn):
+    """Stocke chaque match sous la forme (min, max) et garantit son unicité."""
+    conn.execute(text("""
+        UPDATE "match" SET user1_id = user2_id, user2_id = user1_id
+        WHERE user1_id > user2_id
+    """))
+    conn.execute(text("""
+        DELETE FROM "match" WHERE id NOT IN (
+            SELECT MIN(id) FROM "match" GROUP BY user1_id, user2_id
+        )
+    """))
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_match_users ON "match" (user1_id, user2_id)'
+    ))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_match_user2 ON "match" (user2_id)'))
+
+
+def _v3_message_conversation_key(conn):
+    """Ajoute Message.conversation_key ('min:max') et son index (clé, timestamp, id)."""
+    if not _has_column(conn, 'message', 'conversation_key'):
+        conn.execute(text('ALTER TABLE message ADD COLUMN conversation_key VARCHAR(32)'))
+    conn.execute(text("""
+        UPDATE message SET conversation_key =
+            MIN(sender_id, recipient_id) || ':' || MAX(sender_id, recipient_id)
+        WHERE conversation_key IS NULL
+    """))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_message_conversation '
+        'ON message (conversation_key, timestamp, id)'
+    ))
+
+
+def _v4_conversation_summaries(conn):
+    """Remplit conversation_summary (table créée par create_all) depuis match/message."""
+    from conversations import rebuild_summaries
+    rebuild_summaries(conn)
+
+
+def _v5_vibe_tags(conn):
+    """Score dans la file du feed + tags normalisés (tables créées par create_all)."""
+    from tags import normalize, parse_vibe_tags
+
+    if not _has_column(conn, 'candidate_queue', 'score'):
+        conn.execute(text('ALTER TABLE candidate_queue ADD COLUMN score FLOAT NOT NULL DEFAULT 0'))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_candidate_queue_rank '
+        'ON candidate_queue (owner_id, score DESC, candidate_id)'
+    ))
+
+    # Reprise de l'ancienne colonne texte User.vibe_tags
+    pairs = [
+        (user_id, name)
+        for user_id, raw in conn.execute(text('SELECT id, vibe_tags FROM user WHERE vibe_tags IS NOT NULL'))
+        for name in {normalize(n) for n in parse_vibe_tags(raw)} - {''}
+    ]
+    if pairs:
+        conn.execute(text('INSERT OR IGNORE INTO tag (name) VALUES (:name)'),
+                     [{'name': name} for name in {name for _, name in pairs}])
+        conn.execute(text(
+            'INSERT OR IGNORE INTO user_tag (user_id, tag_id) '
+            'SELECT :user_id, id FROM tag WHERE name = :name'
+        ), [{'user_id': user_id, 'name': name} for user_id, name in pairs])
+
+
+def _v6_city_key(conn):
+    """Ville normalisée sur user + index des préférences de découverte."""
+    from models import normalize_city
+
+    if not _has_column(conn, 'user', 'city_key'):
+        conn.execute(text('ALTER TABLE user ADD COLUMN city_key VARCHAR(100)'))
+    rows = conn.execute(text('SELECT id, city FROM user WHERE city IS NOT NULL AND city_key IS NULL')).all()
+    if rows:
+        conn.execute(text('UPDATE user SET city_key = :key WHERE id = :id'),
+                     [{'id': user_id, 'key': normalize_city(city)} for user_id, city in rows])
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_user_discovery ON user (city_key, date_of_birth, id)'
+    ))
+
+
+def _v7_user_version(conn):
+    """Version et date de modification du profil (ETag / Last-Modified)."""
+    if not _has_column(conn, 'user', 'version'):
+        conn.execute(text('ALTER TABLE user ADD COLUMN version INTEGER NOT NULL DEFAULT 1'))
+    if not _has_column(conn, 'user', 'updated_at'):
+        conn.execute(text('ALTER TABLE user ADD COLUMN updated_at DATETIME'))
+    conn.execute(text('UPDATE user SET updated_at = COALESCE(date_joined, CURRENT_TIMESTAMP) WHERE updated_at IS NULL'))
+
+
+def _v8_full_text_search(conn):
+    """Index FTS5 des messages et des profils, remplis depuis les tables existantes."""
+    import search
+    search.create_indexes(conn)
+    search.rebuild(conn)
+
+
+def _v9_engagement(conn):
+    """Remplit user_stats et pending_like (tables créées par create_all) depuis swipe/match."""
+    from engagement import rebuild_stats
+    rebuild_stats(conn)
+
+
+def _v10_pending_picture(conn):
+    """Empreinte de la photo de profil en cours de traitement."""
+    if not _has_column(conn, 'user', 'pending_picture'):
+        conn.execute(text('ALTER TABLE user ADD COLUMN pending_picture VARCHAR(32)'))
+
+
+def _v11_archive_search_index(conn):
+    """Index de recherche des messages archivés, rempli depuis les segments existants."""
+    import message_archive
+    import search
+    search.create_indexes(conn)
+    message_archive.reindex(conn)
+
+
+# (version, description, fonction) — ne jamais modifier une migration publiée,
+# toujours en ajouter une nouvelle à la fin.
+MIGRATIONS = [
+    (1, 'index et unicité sur swipe', _v1_swipe_indexes),
+    (2, 'matchs stockés en paire ordonnée (min, max)', _v2_match_ordered_pairs),
+    (3, 'clé de conversation sur message', _v3_message_conversation_key),
+    (4, 'résumés de conversation pour la boîte de réception', _v4_conversation_summaries),
+    (5, 'vibe tags normalisés et score des candidats', _v5_vibe_tags),
+    (6, 'ville normalisée et index de découverte', _v6_city_key),
+    (7, 'version et date de modification des profils', _v7_user_version),
+    (8, 'recherche plein texte (messages, profils)', _v8_full_text_search),
+    (9, 'compteurs d\'engagement et likes en attente', _v9_engagement),
+    (10, 'photo de profil en cours de traitement', _v10_pending_picture),
+    (11, 'recherche dans les messages archivés', _v11_archive_search_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def upgrade(log=None):
+    """
+    Met le schéma à jour. Renvoie la liste des migrations appliquées.
+
+    Une base vide est créée directement au dernier schéma ; une base existante
+    reçoit les migrations dont la version est supérieure à user_version.
+    """
+    applied = []
+    with db.engine.begin() as conn:
+        is_new_database = not inspect(conn).has_table('user')
+        # Crée les tables manquantes (ex: nouvelles tables) avec leur schéma courant
+        db.metadata.create_all(conn)
+
+        if is_new_database:
+            _set_version(conn, LATEST_VERSION)
+            return applied
+
+        current = _get_version(conn)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            if log:
+                log(f'Migration {version} : {description}')
+            migrate(conn)
+            _set_version(conn, version)
+            applied.append(version)
+    return applied
+
+
+def current_version():
+    with db.engine.connect() as conn:
+        return _get_version(conn)
+
+
+# --- VÉRIFICATION DES INDEX ---
+
+def _route_queries(user_id=1, other_id=2):
+    """Requêtes exécutées par les routes, avec des paramètres d'exemple."""
+    from datetime import date, datetime
+    from sqlalchemy import select, exists, tuple_
+    from models import (User, Swipe, Match, Message, MessageSegment, CandidateQueue, Tag, UserTag, SeenBitmap,
+                        UserStats, PendingLike, MatchNotice)
+    from conversations import inbox_query
+
+    already_swiped = exists().where(Swipe.swiper_id == user_id, Swipe.swiped_id == User.id)
+    return {
+        'login: utilisateur par email': User.query.filter_by(email='a@b.c'),
+        'feed: tête de file (meilleur score)': select(CandidateQueue.candidate_id)
+            .where(CandidateQueue.owner_id == user_id)
+            .order_by(CandidateQueue.score.desc(), CandidateQueue.candidate_id).limit(1),
+        'feed: tags des candidats': select(UserTag.user_id, UserTag.tag_id)
+            .where(UserTag.user_id.in_([2, 3, 4])),
+        'profil: tags de l\'utilisateur': select(Tag.name).join(UserTag, UserTag.tag_id == Tag.id)
+            .where(UserTag.user_id == user_id).order_by(Tag.name),
+        'feed: remplissage (anti-jointure keyset)': select(User.id)
+            .where(User.id > 0, User.id != user_id, ~already_swiped)
+            .order_by(User.id).limit(50),
+        'feed: remplissage filtré (ville, âge)': select(User.id)
+            .where(User.id > 0, User.id != user_id, ~already_swiped, User.city_key == 'paris',
+                   User.date_of_birth.between(date(1990, 1, 1), date(2000, 1, 1)))
+            .order_by(User.id).limit(50),
+        'feed/swipe: dislikes archivés': select(SeenBitmap.data).where(SeenBitmap.user_id == user_id),
+        'swipe: swipe existant': Swipe.between(user_id, other_id),
+        'swipe: like réciproque': Swipe.query.filter_by(
+            swiper_id=other_id, swiped_id=user_id, liked=True),
+        'swipe: matchs créés au vidage du buffer': select(MatchNotice.matched_user_id)
+            .where(MatchNotice.user_id == user_id),
+        'swipe/chat: match existant': Match.between(user_id, other_id),
+        'matches: matchs de l\'utilisateur': Match.for_user(user_id)
+            .order_by(Match.timestamp.desc()),
+        'inbox: résumés de conversation': inbox_query(user_id),
+        'inbox: likes en attente (récents)': select(PendingLike.liker_id)
+            .where(PendingLike.user_id == user_id).order_by(PendingLike.timestamp.desc()).limit(12),
+        'profil/feed: compteurs d\'engagement': select(UserStats).where(UserStats.user_id.in_([1, 2, 3])),
+        'chat: page d\'historique (keyset)': Message.conversation(user_id, other_id)
+            .filter(tuple_(Message.timestamp, Message.id) < tuple_(datetime(2030, 1, 1), 10**9))
+            .order_by(Message.timestamp.desc(), Message.id.desc()).limit(51),
+        'chat: segments archivés (keyset)': select(MessageSegment.id)
+            .where(MessageSegment.conversation_key == '1:2',
+                   tuple_(MessageSegment.first_timestamp, MessageSegment.first_id) < tuple_(datetime(2030, 1, 1), 10**9))
+            .order_by(MessageSegment.last_timestamp.desc(), MessageSegment.last_id.desc()),
+        'chat: messages depuis (JSON)': Message.conversation(user_id, other_id)
+            .filter(tuple_(Message.timestamp, Message.id) > tuple_(datetime(2020, 1, 1), 1))
+            .order_by(Message.timestamp.asc(), Message.id.asc()).limit(50),
+    }
+
+
+def explain_route_queries():
+    """
+    Renvoie [(nom, plan, ok)] pour chaque requête de route.
+
+    Une requête est refusée si son plan contient un SCAN d'une table
+    (parcours complet) au lieu d'une recherche par index.
+    """
+    results = []
+    for name, query in _route_queries().items():
+        statement = getattr(query, 'statement', query)
+        sql = str(statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}
+        ))
+        rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+        plan = [row[-1] for row in rows]
+        ok = not any(
+            step.startswith('SCAN') and 'USING' not in step and 'CONSTANT ROW' not in step
+            for step in plan
+        )
+        results.append((name, plan, ok))
+    return results
@@ -2,9 +2,31 @@
 
 # Remplace : from app import db
 from extensions import db
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import re
+import unicodedata
+from datetime import date, datetime
 from flask_login import UserMixin
+from sqlalchemy import or_, event
+from sqlalchemy.orm import validates, object_session
+
+import passwords
+
+
+def ordered_pair(user_a_id, user_b_id):
+    """Renvoie (min, max) : un match est toujours stocké dans cet ordre."""
+    return (user_a_id, user_b_id) if user_a_id < user_b_id else (user_b_id, user_a_id)
+
+
+def conversation_key(user_a_id, user_b_id):
+    """Clé de conversation commune aux deux sens d'échange (ex: '3:17')."""
+    return '%d:%d' % ordered_pair(user_a_id, user_b_id)
+
+
+def normalize_city(city):
+    """Clé de ville comparable : 'Saint-Étienne ' -> 'saint etienne' (None si vide)."""
+    decomposed = unicodedata.normalize('NFKD', city or '')
+    ascii_only = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(re.split(r'[^0-9a-z]+', ascii_only.lower())).strip() or None
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -17,10 +39,14 @@ class User(db.Model, UserMixin):
     first_name = db.Column(db.String(60), nullable=False)
     date_of_birth = db.Column(db.Date, nullable=True)
     city = db.Column(db.String(100), nullable=True)
+    # Ville normalisée (voir normalize_city), tenue à jour avec `city`
+    city_key = db.Column(db.String(100), nullable=True)
     
     # NOUVEAU : Champ pour le nom de fichier de la photo principale
     # Stocke le nom du fichier (ex: 'abcdef1234.jpg')
     image_file = db.Column(db.String(100), nullable=False, default='default.jpg') 
+    # Empreinte de la photo en cours de traitement (voir images.py), None sinon
+    pending_picture = db.Column(db.String(32), nullable=True)
     
     # --- 3. Le "Vibe Check" ---
     vibe_tags = db.Column(db.String(255), nullable=True) 
@@ -33,21 +59,69 @@ class User(db.Model, UserMixin):
     # --- 5. Sécurité et Métadonnées ---
     is_verified = db.Column(db.Boolean, default=False) # Badge de vérification (âge/selfie)
     date_joined = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrémentés à chaque modification du profil (infos, photo) : ETag / Last-Modified
+    # des pages de profil et clé du cache des cartes (voir profile_cache.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Feed filtré par ville et tranche d'âge : ville exacte, date de naissance
+    # entre deux bornes, id pour la pagination (index couvrant, voir discovery.py)
+    __table_args__ = (
+        db.Index('ix_user_discovery', 'city_key', 'date_of_birth', 'id'),
+    )
+
+    @validates('city')
+    def _update_city_key(self, key, city):
+        self.city_key = normalize_city(city)
+        return city
+
+    @property
+    def age(self):
+        """Âge en années révolues (None si la date de naissance est inconnue)."""
+        if self.date_of_birth is None:
+            return None
+        dob, today = self.date_of_birth, date.today()
+        return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
     
     # --- Méthodes de sécurité ---
 
+    # Hachage dans le pool borné de passwords.py : HashingBusy si saturé
+
     def set_password(self, password):
         """Hache et stocke le mot de passe."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hasher.hash(password)
 
     def check_password(self, password):
-        """Vérifie le mot de passe haché."""
-        return check_password_hash(self.password_hash, password)
+        """
+        Vérifie le mot de passe haché. En cas de succès, un hash calculé avec
+        d'anciens paramètres est remplacé (à commiter par l'appelant).
+        """
+        if not passwords.hasher.verify(self.password_hash, password):
+            return False
+        if passwords.hasher.needs_rehash(self.password_hash):
+            try:
+                self.set_password(password)
+            except passwords.HashingBusy:
+                pass   # pool saturé : mise à niveau à la prochaine connexion
+        return True
 
     def __repr__(self):
         return f"User('{self.first_name}', '{self.email}')"
 
 
+@event.listens_for(User, 'before_update')
+def _bump_user_version(mapper, connection, user):
+    # Incrément calculé par SQLite (SET version = version + 1) : la valeur
+    # en mémoire peut être périmée (instantané de user_cache fusionné sans
+    # rechargement), deux écrivains obtiennent quand même deux versions.
+    # Les UPDATE groupés (query.update) ne passent pas ici : les écrire avec
+    # User.version + 1 et updated_at (ex: images._set_picture)
+    session = object_session(user)
+    if session is not None and session.is_modified(user, include_collections=False):
+        user.version = User.version + 1   # relu depuis la base au prochain accès
+        user.updated_at = datetime.utcnow()
+
+
 class Swipe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     
@@ -62,20 +136,70 @@ class Swipe(db.Model):
     
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
+    # Un seul swipe par couple ; sert aussi l'anti-jointure du feed.
+    # Le second index sert la recherche de like réciproque.
+    # (noms partagés avec migrations.py)
+    __table_args__ = (
+        db.Index('uq_swipe_swiper_swiped', 'swiper_id', 'swiped_id', unique=True),
+        db.Index('ix_swipe_swiped_swiper_liked', 'swiped_id', 'swiper_id', 'liked'),
+    )
+
+    @classmethod
+    def between(cls, swiper_id, swiped_id):
+        """Swipe de swiper_id sur swiped_id (requête indexée)."""
+        return cls.query.filter_by(swiper_id=swiper_id, swiped_id=swiped_id)
+
     def __repr__(self):
         action = "Liked" if self.liked else "Disliked"
         return f'<Swipe {self.swiper_id} {action} {self.swiped_id}>'
 
 
+class SeenBitmap(db.Model):
+    """Dislikes archivés d'un utilisateur, en bitmap compressé (voir seen.py)."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    cardinality = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SeenBitmap {self.user_id} ({self.cardinality} profils)>'
+
+
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     
     # Les ID des deux utilisateurs (triés pour l'unicité du match)
+    # Toujours user1_id < user2_id : utiliser Match.create() / Match.between()
     user1_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user2_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('uq_match_users', 'user1_id', 'user2_id', unique=True),
+        db.Index('ix_match_user2', 'user2_id'),
+    )
+
+    @classmethod
+    def create(cls, user_a_id, user_b_id):
+        """Construit un match en respectant l'ordre (min, max)."""
+        user1_id, user2_id = ordered_pair(user_a_id, user_b_id)
+        return cls(user1_id=user1_id, user2_id=user2_id)
+
+    @classmethod
+    def between(cls, user_a_id, user_b_id):
+        """Match entre deux utilisateurs (une seule recherche dans l'index unique)."""
+        user1_id, user2_id = ordered_pair(user_a_id, user_b_id)
+        return cls.query.filter_by(user1_id=user1_id, user2_id=user2_id)
+
+    @classmethod
+    def for_user(cls, user_id):
+        """Tous les matchs d'un utilisateur (OR servi par deux index)."""
+        return cls.query.filter(or_(cls.user1_id == user_id, cls.user2_id == user_id))
+
+    def other_user_id(self, user_id):
+        return self.user2_id if self.user1_id == user_id else self.user1_id
+
     def __repr__(self):
         return f'<Match {self.user1_id} and {self.user2_id}>'
 
@@ -89,5 +213,200 @@ class Message(db.Model):
     body = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
+    # Clé commune aux deux sens de la conversation (voir conversation_key())
+    conversation_key = db.Column(db.String(32), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_message_conversation', 'conversation_key', 'timestamp', 'id'),
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.conversation_key is None and self.sender_id and self.recipient_id:
+            self.conversation_key = conversation_key(self.sender_id, self.recipient_id)
+
+    @classmethod
+    def conversation(cls, user_a_id, user_b_id):
+        """Messages échangés entre deux utilisateurs, dans les deux sens."""
+        return cls.query.filter_by(conversation_key=conversation_key(user_a_id, user_b_id))
+
+    def __repr__(self):
+        return f'<Message from {self.sender_id} to {self.recipient_id}>'
+
+
+class MessageSegment(db.Model):
+    """
+    Messages archivés d'une conversation : JSON colonnaire compressé (voir
+    message_archive.py), avec le premier et le dernier message du segment
+    pour la pagination de l'historique.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_key = db.Column(db.String(32), nullable=False)
+    first_timestamp = db.Column(db.DateTime, nullable=False)
+    first_id = db.Column(db.Integer, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+    last_id = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+    # Segments d'une conversation, du plus récent au plus ancien
+    __table_args__ = (
+        db.Index('ix_message_segment_range', 'conversation_key', 'last_timestamp', 'last_id'),
+    )
+
+    def __repr__(self):
+        return f'<MessageSegment {self.conversation_key} ({self.count} messages)>'
+
+
+# --- FILE DE CANDIDATS DU FEED ---
+
+class CandidateQueue(db.Model):
+    """Profils pas encore vus, pré-calculés pour le feed d'un utilisateur."""
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+
+    # Score de compatibilité (vibe tags) : le feed sert le meilleur score d'abord
+    score = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
+    def __repr__(self):
+        return f'<CandidateQueue {self.owner_id} -> {self.candidate_id}>'
+
+
+# Tête de file : meilleur score, puis plus petit id (nom partagé avec migrations.py)
+db.Index('ix_candidate_queue_rank',
+         CandidateQueue.owner_id, CandidateQueue.score.desc(), CandidateQueue.candidate_id)
+
+
+class CandidateCursor(db.Model):
+    """Dernier User.id parcouru lors du remplissage de la file (pagination keyset)."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_candidate_id = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CandidateCursor {self.user_id} @ {self.last_candidate_id}>'
+
+
+class DiscoveryPreference(db.Model):
+    """Critères du feed : une ville (None = partout) et une tranche d'âge."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    city = db.Column(db.String(100), nullable=True)       # telle que saisie
+    city_key = db.Column(db.String(100), nullable=True)   # normalize_city(city)
+    min_age = db.Column(db.Integer, nullable=True)
+    max_age = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f'<DiscoveryPreference {self.user_id} {self.city_key} {self.min_age}-{self.max_age}>'
+
+
+# --- RÉSUMÉS DE CONVERSATION (BOÎTE DE RÉCEPTION) ---
+
+class ConversationSummary(db.Model):
+    """
+    Une ligne par match : dernier message, dernière activité et non-lus de
+    chaque côté. Maintenue dans la même transaction que les messages et les
+    matchs (voir conversations.py) ; reconstruisible avec `flask rebuild-summaries`.
+    """
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), primary_key=True)
+
+    # Même ordre que Match : user1_id < user2_id
+    user1_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user2_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    last_activity_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_sender_id = db.Column(db.Integer, nullable=True)
+    last_message_snippet = db.Column(db.String(80), nullable=True)
+
+    user1_unread = db.Column(db.Integer, nullable=False, default=0)
+    user2_unread = db.Column(db.Integer, nullable=False, default=0)
+    user1_last_read_id = db.Column(db.Integer, nullable=False, default=0)
+    user2_last_read_id = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_summary_user1_activity', 'user1_id', 'last_activity_at'),
+        db.Index('ix_summary_user2_activity', 'user2_id', 'last_activity_at'),
+    )
+
+    def side(self, user_id):
+        """'user1' ou 'user2' selon la place de user_id dans la conversation."""
+        return 'user1' if self.user1_id == user_id else 'user2'
+
+    def unread_for(self, user_id):
+        return getattr(self, self.side(user_id) + '_unread')
+
+    def __repr__(self):
+        return f'<ConversationSummary match={self.match_id}>'
+
+
+# --- COMPTEURS D'ENGAGEMENT ET LIKES EN ATTENTE ---
+
+class UserStats(db.Model):
+    """
+    Compteurs d'un utilisateur, maintenus dans la même transaction que les
+    swipes et les matchs (voir engagement.py) ; reconstruisibles avec
+    `flask rebuild-stats`. Pas de ligne = tous les compteurs à zéro.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    likes_sent = db.Column(db.Integer, nullable=False, default=0)
+    matches = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id} ({self.likes_received} likes reçus, {self.matches} matchs)>'
+
+
+class PendingLike(db.Model):
+    """
+    "Qui m'a liké" : likes reçus par user_id auxquels il n'a pas encore répondu
+    (ni swipe en retour, ni match). Table sans rowid, rangée par destinataire.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    liker_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_pending_like_recent', 'user_id', 'timestamp'),
+        {'sqlite_with_rowid': False},
+    )
+
+    def __repr__(self):
+        return f'<PendingLike {self.liker_id} -> {self.user_id}>'
+
+
+class MatchNotice(db.Model):
+    """
+    Match créé au vidage du buffer de swipes (hors requête), pas encore annoncé
+    au swiper qui l'a complété (voir swipe_buffer.py). Table sans rowid.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    matched_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    def __repr__(self):
+        return f'<MatchNotice {self.user_id} <-> {self.matched_user_id}>'
+
+
+# --- VIBE TAGS NORMALISÉS ---
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(40), unique=True, nullable=False)  # normalisé (voir tags.py)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+
+class UserTag(db.Model):
+    """Association utilisateur <-> tag ; l'index (tag_id, user_id) sert d'index inversé."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_user_tag_tag_user', 'tag_id', 'user_id'),
+    )
+
     def __repr__(self):
-        return f'<Message from {self.sender_id} to {self.recipient_id}>'
\ No newline at end of file
+        return f'<UserTag {self.user_id} #{self.tag_id}>'
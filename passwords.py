@@ -0,0 +1,142 @@
+# passwords.py
+
+"""
+Hachage des mots de passe hors des workers web, dans un pool de processus borné.
+
+Un hachage scrypt prend ~160 ms de CPU. Fait dans la requête, une vague de
+connexions occupe tous les workers et les routes légères (/feed...) attendent
+derrière. Ici :
+    - les hachages partent dans un pool de PASSWORD_HASH_WORKERS processus,
+      à priorité CPU abaissée (nice PASSWORD_HASH_NICE) : le noyau sert
+      d'abord les workers web ;
+    - au plus PASSWORD_HASH_MAX_PENDING hachages en cours ou en attente par
+      processus web : au-delà, HashingBusy est levée immédiatement et la vue
+      répond 503 + Retry-After plutôt que d'empiler les requêtes ;
+    - l'algorithme et ses paramètres viennent de la configuration
+      (PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH). Un hash stocké avec
+      d'autres paramètres est recalculé à la connexion réussie suivante.
+
+PASSWORD_HASH_WORKERS = 0 : hachage dans le thread de la requête (développement),
+toujours limité par PASSWORD_HASH_MAX_PENDING.
+
+Les processus du pool démarrent par forkserver (pas de fork() d'un processus
+web multi-thread) : comme pour tout pool multiprocessing, un script lancé
+directement qui utilise le pool doit protéger son code par
+`if __name__ == '__main__'` (flask run, gunicorn... le font déjà).
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_SALT_LENGTH = 16
+RETRY_AFTER_S = 2   # en-tête Retry-After des réponses 503
+
+
+class HashingBusy(Exception):
+    """Trop de hachages en attente : réessayer dans quelques secondes."""
+
+
+def _lower_priority(increment):
+    # Exécuté une fois au démarrage de chaque processus du pool
+    if increment:
+        os.nice(increment)
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+class PasswordHasher:
+    """Hachage et vérification bornés ; instance unique `hasher`, configurée par init_app()."""
+
+    def __init__(self, **settings):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.configure(**settings)
+
+    def configure(self, workers=0, max_pending=16, timeout=10.0, nice=10,
+                  method=DEFAULT_METHOD, salt_length=DEFAULT_SALT_LENGTH):
+        self.shutdown()
+        self.workers = workers
+        self.timeout = timeout
+        self.nice = nice
+        self.method = method
+        self.salt_length = salt_length
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _get_executor(self):
+        # Créé à la première utilisation : rien à démarrer pour les commandes CLI
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=context,
+                        initializer=_lower_priority, initargs=(self.nice,),
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy()
+        try:
+            if not self.workers:
+                return fn(*args)
+            future = self._get_executor().submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                future.cancel()
+                raise HashingBusy()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Vrai si le hash n'a pas été calculé avec la méthode et la longueur de
+        sel configurées. Seuls les paramètres écrits dans PASSWORD_HASH_METHOD
+        sont comparés ('scrypt' accepte tout scrypt, 'scrypt:32768:8:1' non).
+        """
+        try:
+            method, salt, _ = password_hash.split('$', 2)
+        except ValueError:
+            return True
+        wanted = self.method.split(':')
+        return method.split(':')[:len(wanted)] != wanted or len(salt) != self.salt_length
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Hors application (scripts, seeding) : hachage dans le thread appelant
+hasher = PasswordHasher()
+
+
+def init_app(app):
+    config = app.config
+    hasher.configure(
+        workers=config['PASSWORD_HASH_WORKERS'],
+        max_pending=config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=config['PASSWORD_HASH_TIMEOUT_S'],
+        nice=config['PASSWORD_HASH_NICE'],
+        method=config['PASSWORD_HASH_METHOD'],
+        salt_length=config['PASSWORD_SALT_LENGTH'],
+    )
+    app.extensions['password_hasher'] = hasher
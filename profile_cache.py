@@ -0,0 +1,147 @@
+# profile_cache.py
+
+"""
+GET conditionnel des pages de profil et cache des cartes de profil.
+
+1. ETag / Last-Modified : une page de profil ne dépend que du profil affiché
+   (User.version, incrémentée à chaque modification, voir models.py), de
+   l'utilisateur connecté (barre de navigation, boutons) et des templates
+   déployés. Si le navigateur présente l'ETag courant (If-None-Match) ou, à
+   défaut, une date au moins égale à updated_at (If-Modified-Since), la vue
+   répond 304 sans lire les tags ni rendre le template. Les compteurs
+   d'engagement affichés (UserStats, voir engagement.py) changent sans
+   nouvelle version du profil : ils entrent dans l'ETag et dans
+   Last-Modified. En-têtes
+   `Cache-Control: private, no-cache` et `Vary: Cookie` : le navigateur
+   revalide à chaque visite et aucun cache partagé ne garde la page.
+   Jamais de 304 quand des messages flash attendent d'être affichés.
+
+2. Cartes de profil (users/profil_card.html) : le fragment rendu est gardé
+   en mémoire sous la clé (id, version, âge) ; une modification du profil
+   change la clé et l'ancienne entrée sort du LRU. Le fragment est rendu
+   sans le contexte de la requête : il ne doit dépendre que du profil
+   affiché, jamais de current_user.
+
+Configuration : PROFILE_CARD_CACHE = 'local' (LRU + TTL, par processus) ou 'none'.
+"""
+
+import hashlib
+import os
+
+from flask import current_app, request, session
+from markupsafe import Markup
+
+import assets
+from user_cache import LocalTTLCache, NullCache
+
+
+CARD_TEMPLATE = 'users/profil_card.html'
+
+# Empreinte des templates et du manifeste des assets, calculée au démarrage
+_deploy_tag = ''
+
+
+# --- GET CONDITIONNEL ---
+
+def _fingerprint(app):
+    """Change dès qu'un template ou un asset versionné change (nouveau déploiement)."""
+    digest = hashlib.sha256()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    paths = [os.path.join(app.static_folder, assets.MANIFEST_NAME)]
+    for root, _, files in os.walk(template_dir):
+        paths.extend(os.path.join(root, name) for name in files)
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            digest.update(os.path.relpath(path, app.root_path).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+
+def profile_etag(user, viewer_id, stats=None):
+    # La vue fait partie de l'ETag : /users/<id> et /profile/<id> n'affichent pas la même page
+    etag = f'{request.endpoint}-{user.id}-v{user.version}-u{viewer_id}-{_deploy_tag}'
+    if stats is not None:
+        etag += f'-s{stats.likes_received}.{stats.likes_sent}.{stats.matches}'
+    return etag
+
+
+def _last_modified(user, stats):
+    dates = [d for d in (user.updated_at, stats and stats.updated_at) if d is not None]
+    return max(dates) if dates else None
+
+
+def set_validators(response, user, viewer_id, stats=None):
+    """Ajoute ETag (faible : calculé sans lire le corps), Last-Modified et Cache-Control."""
+    response.set_etag(profile_etag(user, viewer_id, stats), weak=True)
+    last_modified = _last_modified(user, stats)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+
+def not_modified(user, viewer_id, stats=None):
+    """
+    Réponse 304 si le navigateur a déjà cette version de la page, sinon None.
+    `stats` : compteurs affichés sur la page (UserStats), s'il y en a.
+    """
+    if session.get('_flashes'):
+        return None
+    last_modified = _last_modified(user, stats)
+    if request.if_none_match:
+        # If-None-Match prime sur If-Modified-Since (RFC 9110, 13.2.2)
+        fresh = request.if_none_match.contains_weak(profile_etag(user, viewer_id, stats))
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        return None
+    if not fresh:
+        return None
+    return set_validators(current_app.response_class(status=304), user, viewer_id, stats)
+
+
+# --- CACHE DES CARTES DE PROFIL ---
+
+class CardCache:
+    """Fragments HTML des cartes de profil + compteurs de succès / échecs."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, user):
+        # L'âge affiché change à l'anniversaire, sans nouvelle version du profil
+        return f'card:{user.id}:{user.version}:{user.age}'
+
+    def render(self, user):
+        key = self._key(user)
+        html = self.backend.get(key)
+        if html is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            html = current_app.jinja_env.get_template(CARD_TEMPLATE).render(user=user)
+            self.backend.set(key, html)
+        return Markup(html)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hits / total if total else 0.0}
+
+
+cards = CardCache(NullCache())
+
+
+def init_app(app):
+    global _deploy_tag
+    _deploy_tag = _fingerprint(app)
+    if app.config['PROFILE_CARD_CACHE'] == 'local':
+        cards.backend = LocalTTLCache(maxsize=app.config['PROFILE_CARD_CACHE_MAXSIZE'],
+                                      ttl=app.config['PROFILE_CARD_CACHE_TTL'])
+    app.extensions['profile_cache'] = cards
+    # Dans les templates : {{ profile_card(user) }}
+    app.add_template_global(cards.render, 'profile_card')
@@ -0,0 +1,376 @@
+# realtime.py
+
+"""
+Chat en temps réel : Server-Sent Events servis par une boucle asyncio.
+
+Les vues Flask restent synchrones ; les connexions SSE, elles, sont tenues
+par un petit serveur HTTP asyncio (bibliothèque standard) : une connexion
+inactive ne coûte qu'une coroutine et un socket, jamais un thread. Les
+accès à la base (autorisation, rattrapage) passent par un pool borné de
+REALTIME_DB_THREADS threads.
+
+    GET <REALTIME_URL>/chat/<user_id>/events[?after=<message_id>]
+
+Même règle d'accès que chat() : utilisateur connecté (cookie de session
+Flask) et match avec <user_id>. Chaque message est envoyé avec son id
+(`id: 42`) : à la reconnexion, le navigateur renvoie Last-Event-ID et les
+messages manqués sont relus dans Message avant de reprendre le direct.
+
+Diffusion : chat() écrit toujours le message dans Message, puis le publie
+sur le hub (canal = clé de conversation). Le hub délègue à un backend
+interchangeable (PubSubBackend) :
+    - LocalBackend : en mémoire, pour un serveur SSE dans le même processus ;
+    - MessageTableBackend : suit la table Message (id > dernier vu) pour un
+      serveur SSE dans un processus séparé (`flask realtime`), quel que soit
+      le nombre de workers web.
+
+Configuration (REALTIME_MODE) :
+    - 'off'      : pas de temps réel (le chat garde son formulaire) ;
+    - 'thread'   : serveur SSE dans un thread du processus web, démarré à la
+                   première requête (un seul processus web : dev, petit déploiement) ;
+    - 'external' : serveur SSE lancé à part par `flask realtime`.
+REALTIME_URL est l'adresse vue par le navigateur (ex: '/realtime' derrière
+le proxy) ; vide, elle vaut http://<hôte de la page>:REALTIME_PORT.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from flask import current_app, request
+from werkzeug.test import EnvironBuilder
+
+from extensions import db
+from models import Match, Message, conversation_key
+import conversations
+
+
+logger = logging.getLogger('vibezone.realtime')
+
+_EVENTS_PATH = re.compile(r'^(?:/.*)?/chat/(?P<user_id>\d+)/events$')
+_RECONNECT = object()   # file d'un abonné débordée : on coupe, il se reconnecte et rattrape
+
+
+# --- HUB ET BACKENDS ---
+
+class PubSubBackend:
+    """Interface d'un canal de diffusion : publier, s'abonner, se désabonner."""
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel, callback):
+        raise NotImplementedError
+
+    def unsubscribe(self, channel, callback):
+        raise NotImplementedError
+
+
+class LocalBackend(PubSubBackend):
+    """Abonnés du processus courant ; les callbacks doivent être thread-safe."""
+
+    def __init__(self):
+        self._subscribers = {}   # {canal: {callback, ...}}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(event)
+        return len(callbacks)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(callback)
+
+    def unsubscribe(self, channel, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(channel)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._subscribers[channel]
+
+
+class MessageTableBackend(LocalBackend):
+    """
+    Diffuse les nouvelles lignes de Message, écrites par n'importe quel processus.
+
+    Un thread relit `id > dernier id vu` (parcours de clé primaire) toutes les
+    `interval` secondes ; publish() ne fait rien : le message est déjà en base.
+    """
+
+    def __init__(self, app, interval=0.25, batch=500):
+        super().__init__()
+        self.app = app
+        self.interval = interval
+        self.batch = batch
+        self._stop = threading.Event()
+        with app.app_context():
+            self.last_id = db.session.scalar(db.select(db.func.max(Message.id))) or 0
+        threading.Thread(target=self._run, name='realtime-poller', daemon=True).start()
+
+    def publish(self, channel, event):
+        return 0
+
+    def poll(self):
+        with self.app.app_context():
+            rows = db.session.scalars(
+                db.select(Message).where(Message.id > self.last_id).order_by(Message.id).limit(self.batch)
+            ).all()
+            for message in rows:
+                super().publish(message.conversation_key, conversations.message_to_dict(message))
+                self.last_id = message.id
+            db.session.remove()
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.poll() == self.batch:
+                    continue
+            except Exception:
+                logger.exception('Lecture des nouveaux messages impossible')
+            self._stop.wait(self.interval)
+
+    def close(self):
+        self._stop.set()
+
+
+class Hub:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def publish_message(self, message):
+        """Après le commit : envoie le message aux participants connectés."""
+        return self.backend.publish(message.conversation_key, conversations.message_to_dict(message))
+
+
+hub = Hub(LocalBackend())
+
+
+# --- SERVEUR SSE ---
+
+class RealtimeServer:
+    """Serveur HTTP asyncio minimal : uniquement les flux /chat/<id>/events."""
+
+    def __init__(self, app):
+        self.app = app
+        self.heartbeat = app.config['REALTIME_HEARTBEAT_S']
+        self.max_connections = app.config['REALTIME_MAX_CONNECTIONS']
+        self.queue_size = app.config['REALTIME_QUEUE_SIZE']
+        self.allowed_origins = set(filter(None, app.config['REALTIME_ALLOWED_ORIGINS'].split(',')))
+        self.executor = ThreadPoolExecutor(max_workers=app.config['REALTIME_DB_THREADS'],
+                                           thread_name_prefix='realtime-db')
+        self.connections = 0
+        self.loop = None
+        self.ready = threading.Event()
+
+    # 1. Requête HTTP
+
+    async def _read_request(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = request_line.split(' ', 2)
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    def _cors_headers(self, headers):
+        origin = headers.get('origin')
+        if not origin:
+            return ''
+        same_host = urlsplit(origin).hostname == urlsplit('//' + headers.get('host', '')).hostname
+        if origin in self.allowed_origins or (not self.allowed_origins and same_host):
+            return f'Access-Control-Allow-Origin: {origin}\r\nAccess-Control-Allow-Credentials: true\r\nVary: Origin\r\n'
+        return ''
+
+    def _session_user_id(self, headers):
+        """Utilisateur Flask-Login de la session signée (None si absent ou invalide)."""
+        environ = EnvironBuilder(path='/', headers={'Cookie': headers.get('cookie', '')}).get_environ()
+        session = self.app.session_interface.open_session(self.app, self.app.request_class(environ))
+        user_id = session.get('_user_id') if session is not None else None
+        return int(user_id) if user_id and str(user_id).isdigit() else None
+
+    # 2. Base de données (pool de threads borné)
+
+    def _authorize_and_backlog(self, viewer_id, other_id, after_id):
+        with self.app.app_context():
+            try:
+                if Match.between(viewer_id, other_id).first() is None:
+                    return False, []
+                if after_id is None:
+                    return True, []
+                backlog = conversations.messages_after(viewer_id, other_id, after_id,
+                                                       self.app.config['CHAT_PAGE_SIZE'])
+                return True, [conversations.message_to_dict(m) for m in backlog]
+            finally:
+                db.session.remove()
+
+    # 3. Flux d'événements
+
+    @staticmethod
+    def _event(message):
+        data = json.dumps(message, ensure_ascii=False)
+        return f'id: {message["id"]}\nevent: message\ndata: {data}\n\n'.encode()
+
+    async def _handle(self, reader, writer):
+        try:
+            method, target, headers = await asyncio.wait_for(self._read_request(reader), timeout=10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError,
+                ConnectionError):
+            writer.close()
+            return
+        cors = self._cors_headers(headers)
+        url = urlsplit(target)
+        match = _EVENTS_PATH.match(url.path)
+
+        def reply(status):
+            writer.write(f'HTTP/1.1 {status}\r\n{cors}Content-Length: 0\r\nConnection: close\r\n\r\n'.encode())
+            writer.close()
+
+        if method != 'GET' or match is None:
+            return reply('404 Not Found')
+        if self.connections >= self.max_connections:
+            return reply('503 Service Unavailable')
+        viewer_id = self._session_user_id(headers)
+        if viewer_id is None:
+            return reply('401 Unauthorized')
+        other_id = int(match.group('user_id'))
+        # Rattrapage à partir de Last-Event-ID (reconnexion) ou de ?after= (dernier message affiché)
+        after = headers.get('last-event-id') or parse_qs(url.query).get('after', [''])[0]
+        after_id = int(after) if after.isdigit() else None
+
+        # Abonnement avant la lecture du rattrapage : aucun message ne peut passer entre les deux
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+
+        def deliver(event):   # appelé depuis le thread qui publie
+            loop.call_soon_threadsafe(self._enqueue, queue, event)
+
+        channel = conversation_key(viewer_id, other_id)
+        hub.backend.subscribe(channel, deliver)
+        self.connections += 1
+        try:
+            allowed, backlog = await loop.run_in_executor(
+                self.executor, self._authorize_and_backlog, viewer_id, other_id, after_id
+            )
+            if not allowed:
+                return reply('403 Forbidden')
+            writer.write((
+                'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n'
+                f'Cache-Control: no-cache\r\nX-Accel-Buffering: no\r\n{cors}\r\nretry: 3000\n\n'
+            ).encode())
+            last_sent = after_id or 0
+            for message in backlog:
+                writer.write(self._event(message))
+                last_sent = message['id']
+            await writer.drain()
+
+            # Un client SSE n'envoie plus rien : une lecture qui aboutit signale son départ
+            closed = asyncio.ensure_future(reader.read(1024))
+            try:
+                while True:
+                    getter = asyncio.ensure_future(queue.get())
+                    done, _ = await asyncio.wait({getter, closed}, timeout=self.heartbeat,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        getter.cancel()
+                        if closed in done:
+                            break
+                        writer.write(b': ping\n\n')   # garde la connexion ouverte à travers les proxys
+                    else:
+                        event = getter.result()
+                        if event is _RECONNECT:
+                            break
+                        if event['id'] <= last_sent:
+                            continue   # déjà envoyé avec le rattrapage
+                        writer.write(self._event(event))
+                        last_sent = event['id']
+                    await writer.drain()
+            finally:
+                closed.cancel()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            hub.backend.unsubscribe(channel, deliver)
+            self.connections -= 1
+            writer.close()
+
+    @staticmethod
+    def _enqueue(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client trop lent : il repartira de Last-Event-ID
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_RECONNECT)
+
+    # 4. Démarrage
+
+    async def serve(self, host, port):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        logger.info('Flux temps réel sur http://%s:%s', host, port)
+        self.ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def run(self, host, port):
+        asyncio.run(self.serve(host, port))
+
+    def start_thread(self, host, port):
+        thread = threading.Thread(target=self.run, args=(host, port), name='realtime', daemon=True)
+        thread.start()
+        self.ready.wait(5)
+        return thread
+
+
+# --- INTÉGRATION FLASK ---
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def events_url(user_id, after_id=None):
+    """Adresse du flux SSE d'une conversation, vue par le navigateur (None si désactivé)."""
+    config = current_app.config
+    if config['REALTIME_MODE'] == 'off':
+        return None
+    base = config['REALTIME_URL'] or f"{request.scheme}://{urlsplit('//' + request.host).hostname}:{config['REALTIME_PORT']}"
+    url = f"{base.rstrip('/')}/chat/{user_id}/events"
+    return url if after_id is None else f'{url}?after={after_id}'
+
+
+def serve_forever(app):
+    """`flask realtime` : serveur SSE au premier plan, alimenté par la table Message."""
+    global _server
+    hub.backend = MessageTableBackend(app, interval=app.config['REALTIME_POLL_INTERVAL_MS'] / 1000)
+    _server = RealtimeServer(app)
+    _server.run(app.config['REALTIME_HOST'], app.config['REALTIME_PORT'])
+
+
+def init_app(app):
+    if app.config['REALTIME_MODE'] != 'thread':
+        return
+
+    @app.before_request
+    def start_realtime_server():
+        # Au premier appel seulement : les commandes CLI et les scripts n'ouvrent pas de port
+        global _server
+        if _server is not None:
+            return
+        with _server_lock:
+            if _server is None:
+                server = RealtimeServer(app)
+                server.start_thread(app.config['REALTIME_HOST'], app.config['REALTIME_PORT'])
+                _server = server
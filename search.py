@@ -0,0 +1,300 @@
+# search.py
+
+"""
+Recherche plein texte (SQLite FTS5) dans les messages et les profils.
+
+Deux index FTS5 à contenu externe : les textes restent dans leurs tables,
+l'index ne stocke que les tokens.
+    - message_fts (body, conversation_key) sur message ;
+    - profile_fts (icebreaker_1..3, city, vibe_tags) sur user.
+Des triggers SQLite les tiennent à jour dans la transaction de l'écriture
+(vues, INSERT groupés du seeding, scripts) : aucun code applicatif à oublier.
+
+Les messages archivés (segments compressés, voir message_archive.py) n'ont
+pas de table lisible par SQLite : ils sont dans message_archive_fts, index
+sans contenu (content='') tenu à jour par message_archive.py, dont le rowid
+désigne le segment et la position du message. Les résultats en sont décodés
+depuis les segments.
+
+Le tokenizer unicode61 ignore les accents ('cafe' trouve 'café'). La clé de
+conversation '3:17' donne les tokens '3' et '17' : limiter la recherche aux
+conversations de l'utilisateur est un terme de plus dans la requête FTS,
+intersecté dans l'index, et non un filtre appliqué après coup.
+
+Classement : la fonction bm25() de FTS5 compte, pour chaque terme, les
+lignes qui le contiennent dans tout l'index ; pour un mot courant cela
+revient à parcourir des millions d'entrées (~90 ms sur 10 M de messages),
+alors que la recherche elle-même, limitée aux matchs, n'en lit que
+quelques-unes. FTS5 ne sert donc qu'à trouver les lignes : les
+SEARCH_RANK_POOL plus récentes sont classées ici avec la partie "fréquence
+dans le texte / longueur" de BM25 (tous les résultats contiennent tous les
+mots, l'IDF ne changerait presque rien à l'ordre), puis paginées. Les
+extraits surlignés sont calculés sur la page seulement.
+
+    flask search-index            # reconstruit les index depuis les tables
+    flask search-index --check    # vérifie l'index contre les tables
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import column, event, text
+from sqlalchemy.exc import DatabaseError
+
+from extensions import db
+import conversations
+import message_archive
+
+
+# Colonnes indexées (la clé de conversation ne sert qu'au filtrage)
+MESSAGE_COLUMNS = ('body', 'conversation_key')
+PROFILE_COLUMNS = ('icebreaker_1', 'icebreaker_2', 'icebreaker_3', 'city', 'vibe_tags')
+# Poids au classement : la ville et les vibe tags comptent plus qu'un mot d'icebreaker
+PROFILE_WEIGHTS = (1.0, 1.0, 1.0, 2.0, 2.0)
+
+TOKENIZER = 'unicode61 remove_diacritics 2'
+MAX_TERMS = 8
+SNIPPET_TOKENS = 12
+DEFAULT_RANK_POOL = 500
+
+# Saturation de la fréquence et normalisation par la longueur (valeurs usuelles de BM25)
+_K1, _B = 1.2, 0.75
+
+
+def _index_ddl(table, content, columns):
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    names = ', '.join(columns)
+    delete_old = (f"INSERT INTO {table} ({table}, rowid, {names}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {table} (rowid, {names}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{names}, content='{content}', content_rowid='id', tokenize='{TOKENIZER}')",
+        f'CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON "{content}" BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON "{content}" BEGIN {delete_old} END',
+        # Seules les colonnes indexées déclenchent la mise à jour (pas version, updated_at...)
+        f'CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {names} ON "{content}" '
+        f'BEGIN {delete_old} {insert_new} END',
+    ]
+
+
+INDEXES = {
+    'message_fts': _index_ddl('message_fts', 'message', MESSAGE_COLUMNS),
+    'profile_fts': _index_ddl('profile_fts', 'user', PROFILE_COLUMNS),
+}
+
+ARCHIVE_INDEX = 'message_archive_fts'
+ARCHIVE_DDL = (f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARCHIVE_INDEX} USING fts5("
+               f"{', '.join(MESSAGE_COLUMNS)}, content='', tokenize='{TOKENIZER}')")
+
+
+def create_indexes(conn):
+    """Crée les tables FTS5 et leurs triggers (idempotent)."""
+    for statements in INDEXES.values():
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+    conn.exec_driver_sql(ARCHIVE_DDL)
+
+
+def rebuild(conn, log=None):
+    """Reconstruit les index depuis le contenu des tables et des segments (rattrapage, migration)."""
+    for table in INDEXES:
+        conn.exec_driver_sql(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        if log:
+            log(f'{table} reconstruit')
+    message_archive.reindex(conn, log)
+
+
+def check(conn):
+    """
+    Noms des index qui ne correspondent plus aux tables (vide si tout va bien).
+    Pour message_archive_fts, sans contenu, seule la cohérence interne est vérifiée.
+    """
+    broken = []
+    for table in (*INDEXES, ARCHIVE_INDEX):
+        try:
+            conn.exec_driver_sql(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)")
+        except DatabaseError:
+            broken.append(table)
+    return broken
+
+
+# Une base neuve est créée par db.metadata.create_all() (voir migrations.upgrade) :
+# les index FTS5, qui ne sont pas des modèles, sont créés dans la foulée
+@event.listens_for(db.metadata, 'after_create')
+def _create_indexes_with_schema(target, connection, **kwargs):
+    create_indexes(connection)
+
+
+# --- REQUÊTES ---
+
+def _normalize(word):
+    """Comme le tokenizer : minuscules, sans accents ('Café' -> 'cafe')."""
+    decomposed = unicodedata.normalize('NFKD', word.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _tokens(value):
+    """[(début, fin, mot normalisé)] ; '_' sépare les mots, comme dans unicode61."""
+    return [(m.start(), m.end(), _normalize(m.group())) for m in re.finditer(r'[^\W_]+', value or '')]
+
+
+def terms(query):
+    """Mots de la saisie, sans syntaxe FTS5 : 'Café, "jazz"!' -> ['Café', 'jazz']."""
+    return re.findall(r'[^\W_]+', query or '')[:MAX_TERMS]
+
+
+def _phrases(words):
+    # Chaque mot entre guillemets : la saisie ne peut pas injecter d'opérateur FTS5
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def _rank(candidates, fields, wanted, weights):
+    """
+    Trie `candidates` (déjà dans l'ordre de départage) par score BM25 sans IDF,
+    calculé sur fields(candidat) -> [texte par colonne].
+    """
+    tokenized = [[[token for _, _, token in _tokens(value)] for value in fields(c)] for c in candidates]
+    if not tokenized:
+        return []
+    average = [max(1.0, sum(len(doc[i]) for doc in tokenized) / len(tokenized)) for i in range(len(weights))]
+
+    def score(doc):
+        total = 0.0
+        for tokens, weight, avg_length in zip(doc, weights, average):
+            for term in wanted:
+                tf = tokens.count(term)
+                if tf:
+                    total += weight * tf * (_K1 + 1) / (tf + _K1 * (1 - _B + _B * len(tokens) / avg_length))
+        return total
+
+    scores = [score(doc) for doc in tokenized]
+    order = sorted(range(len(candidates)), key=lambda i: -scores[i])   # tri stable
+    return [candidates[i] for i in order]
+
+
+def snippet(value, wanted, size=SNIPPET_TOKENS):
+    """Extrait de `size` mots autour du premier mot trouvé, mots trouvés entre <mark>."""
+    tokens = _tokens(value)
+    hits = [i for i, (_, _, token) in enumerate(tokens) if token in wanted]
+    if not hits:
+        return None
+    first = max(0, min(hits[0] - size // 4, len(tokens) - size))
+    window = tokens[first:first + size]
+    parts = [Markup('…') if first > 0 else Markup('')]
+    position = window[0][0]
+    for start, end, token in window:
+        parts.append(escape(value[position:start]))
+        parts.append(Markup('<mark>%s</mark>') % value[start:end] if token in wanted else escape(value[start:end]))
+        position = end
+    if first + size < len(tokens):
+        parts.append(Markup('…'))
+    else:
+        parts.append(escape(value[position:]))
+    return Markup('').join(parts)
+
+
+@dataclass
+class Page:
+    """Une page de résultats classés ; has_next indique s'il en reste."""
+    results: list
+    page: int
+    has_next: bool
+
+
+def _page(ranked, page, per_page):
+    page = max(1, page)
+    start = (page - 1) * per_page
+    return ranked[start:start + per_page], page, len(ranked) > start + per_page
+
+
+def _rank_pool():
+    return current_app.config.get('SEARCH_RANK_POOL', DEFAULT_RANK_POOL)
+
+
+def search_messages(user_id, query, page=1, per_page=20):
+    """
+    Messages des conversations de user_id contenant tous les mots de `query`,
+    archivés compris.
+
+    Résultats : [{'message_id', 'other_id', 'sender_id', 'timestamp', 'snippet', 'cursor'}].
+    """
+    words = terms(query)
+    if not words:
+        return Page([], 1, False)
+    match = f'conversation_key : "{int(user_id)}" AND body : ({_phrases(words)})'
+    pool = _rank_pool()
+    # Les plus récents d'abord (ordre natif de l'index) : départage à score égal
+    rows = db.session.execute(text("""
+        SELECT m.id, m.sender_id, m.recipient_id, m.timestamp, m.body
+        FROM message_fts JOIN message m ON m.id = message_fts.rowid
+        WHERE message_fts MATCH :match
+        ORDER BY message_fts.rowid DESC
+        LIMIT :pool
+    """).columns(timestamp=db.DateTime), {'match': match, 'pool': pool}).all()
+    # Puis les messages archivés, tous plus anciens, pour compléter le lot à classer
+    if len(rows) < pool:
+        rowids = db.session.scalars(text(f"""
+            SELECT rowid FROM {ARCHIVE_INDEX}
+            WHERE {ARCHIVE_INDEX} MATCH :match
+            ORDER BY rowid DESC
+            LIMIT :pool
+        """), {'match': match, 'pool': pool - len(rows)}).all()
+        archived = message_archive.indexed_messages(rowids)
+        rows += sorted(archived, key=lambda m: (m.timestamp, m.id), reverse=True)
+    wanted = {_normalize(word) for word in words}
+    rows, page, has_next = _page(_rank(rows, lambda row: [row.body], wanted, (1.0,)), page, per_page)
+    return Page([
+        {
+            'message_id': row.id,
+            'other_id': row.recipient_id if row.sender_id == user_id else row.sender_id,
+            'sender_id': row.sender_id,
+            'timestamp': row.timestamp,
+            'snippet': snippet(row.body, wanted) or escape(row.body[:80]),
+            # Curseur du message : /chat/<id>?until=<cursor> affiche la page qui se termine sur lui
+            'cursor': conversations.encode_cursor(row),
+        }
+        for row in rows
+    ], page, has_next)
+
+
+def search_profiles(user_id, query, page=1, per_page=20):
+    """
+    Profils des matchs de user_id dont les icebreakers, la ville ou les vibe
+    tags contiennent tous les mots de `query`.
+
+    Résultats : [{'user_id', 'snippet'}].
+    """
+    words = terms(query)
+    if not words:
+        return Page([], 1, False)
+    # rowid IN (matchs) : une recherche dans l'index par match, pas de parcours des profils
+    columns = ', '.join(f'u.{column}' for column in PROFILE_COLUMNS)
+    rows = db.session.execute(text(f"""
+        SELECT u.id, {columns}
+        FROM profile_fts JOIN user u ON u.id = profile_fts.rowid
+        WHERE profile_fts MATCH :match
+          AND profile_fts.rowid IN (
+              SELECT user2_id FROM "match" WHERE user1_id = :user_id
+              UNION ALL
+              SELECT user1_id FROM "match" WHERE user2_id = :user_id
+          )
+        ORDER BY profile_fts.rowid
+        LIMIT :pool
+    """).columns(*map(column, ('id',) + PROFILE_COLUMNS)), {
+        'match': _phrases(words), 'user_id': user_id, 'pool': _rank_pool(),
+    }).all()
+    wanted = {_normalize(word) for word in words}
+
+    def fields(row):
+        return [getattr(row, column) for column in PROFILE_COLUMNS]
+
+    rows, page, has_next = _page(_rank(rows, fields, wanted, PROFILE_WEIGHTS), page, per_page)
+    return Page([
+        {'user_id': row.id, 'snippet': next(filter(None, (snippet(value, wanted) for value in fields(row))), None)}
+        for row in rows
+    ], page, has_next)
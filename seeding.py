@@ -0,0 +1,169 @@
+# seeding.py
+
+"""
+Générateur de données synthétiques (développement, benchmarks).
+
+    flask seed-data --users 10000 --swipes 200000 --like-ratio 0.35 --matches 5000
+
+Tout passe par des INSERT groupés (par paquets de CHUNK lignes) :
+    - utilisateurs : villes de tailles inégales (loi de Zipf), âges 18-45 ans,
+      3 à 6 vibe tags parmi un vocabulaire fixe (tables Tag / UserTag) ;
+    - swipes : swipers plus ou moins actifs (Zipf), couples uniques, proportion
+      de likes `like_ratio`, étalés sur les 60 derniers jours ;
+    - matchs : K couples avec likes réciproques, stockés en paire ordonnée ;
+    - messages : nombre par match de moyenne `messages_per_match` (loi
+      géométrique), longueur log-normale (médiane ~40 caractères, max 500) ;
+    - résumés de conversation, compteurs d'engagement et likes en attente
+      reconstruits à la fin (rebuild_summaries, rebuild_stats).
+Le mot de passe de tous les comptes est SEED_PASSWORD (email : user<N>@SEED_EMAIL_DOMAIN).
+"""
+
+import json
+import math
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select, func
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import User, Swipe, Match, Message, Tag, UserTag, ordered_pair, conversation_key, normalize_city
+import conversations
+import engagement
+
+
+CHUNK = 20000
+SEED_PASSWORD = 'password'
+# Domaine réservé à la documentation (RFC 2606) mais accepté par le validateur
+# Email() du formulaire de connexion, contrairement à .local
+SEED_EMAIL_DOMAIN = 'example.com'
+
+CITIES = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Lille', 'Bordeaux', 'Nantes', 'Strasbourg',
+          'Montpellier', 'Rennes', 'Nice', 'Grenoble', 'Dijon', 'Angers', 'Brest', 'Tours',
+          'Dakar', 'Abidjan', 'Bruxelles', 'Genève', 'Montréal', 'Saint-Étienne']
+TAGS = ['techno', 'jazz', 'rap', 'rock', 'randonnée', 'cinéma', 'cuisine', 'voyage', 'yoga',
+        'jeux vidéo', 'lecture', 'photo', 'danse', 'football', 'escalade', 'théâtre', 'vin',
+        'café', 'chats', 'chiens', 'mode', 'art', 'sciences', 'musées', 'festivals', 'surf',
+        'running', 'vélo', 'séries', 'manga']
+WORDS = ('salut ça va trop bien et toi tu fais quoi ce soir on se voit demain haha '
+         'carrément j adore ce son tu connais ce bar grave moi aussi à plus').split()
+
+
+def _chunks(rows):
+    rows = list(rows)
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def _zipf_weights(n):
+    return [1 / (rank + 1) for rank in range(n)]
+
+
+def _message_body(rng):
+    length = min(500, max(1, int(rng.lognormvariate(math.log(40), 0.8))))
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(WORDS))
+    return ' '.join(words)[:length]
+
+
+def generate(n_users, n_swipes, like_ratio=0.35, n_matches=0, messages_per_match=10, seed=42, log=None):
+    """Remplit une base vide ; renvoie le nombre de lignes créées par table."""
+    if db.session.scalar(select(func.count()).select_from(User)):
+        raise ValueError('La base contient déjà des utilisateurs : utiliser une base vide.')
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    counts = {}
+
+    def done(table, n):
+        counts[table] = n
+        if log:
+            log(f'{table} : {n} lignes')
+
+    # 1. Utilisateurs et vibe tags
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    city_weights = _zipf_weights(len(CITIES))
+    today = date.today()
+    db.session.execute(insert(Tag), [{'name': name} for name in TAGS])
+    tag_ids = dict(db.session.execute(select(Tag.name, Tag.id)).all())
+    users, user_tags = [], []
+    for user_id in range(1, n_users + 1):
+        city = rng.choices(CITIES, weights=city_weights)[0]
+        names = rng.sample(TAGS, rng.randint(3, 6))
+        users.append({
+            'id': user_id,
+            'email': f'user{user_id}@{SEED_EMAIL_DOMAIN}',
+            'password_hash': password_hash,
+            'first_name': f'User{user_id}',
+            'date_of_birth': today - timedelta(days=rng.randint(18 * 365 + 5, 45 * 365)),
+            'city': city,
+            'city_key': normalize_city(city),   # insert() groupé : pas de @validates
+            'vibe_tags': json.dumps(sorted(names), ensure_ascii=False),
+            'image_file': 'default.jpg',
+            'date_joined': now - timedelta(days=rng.randint(0, 365)),
+        })
+        user_tags.extend({'user_id': user_id, 'tag_id': tag_ids[name]} for name in names)
+    for rows in _chunks(users):
+        db.session.execute(insert(User), rows)
+    for rows in _chunks(user_tags):
+        db.session.execute(insert(UserTag), rows)
+    done('user', n_users)
+
+    # 2. Matchs : couples distincts avec likes réciproques
+    pairs = set()
+    n_matches = min(n_matches, n_users * (n_users - 1) // 2)
+    while len(pairs) < n_matches:
+        a, b = rng.sample(range(1, n_users + 1), 2)
+        pairs.add(ordered_pair(a, b))
+    matches, swipes = [], {}
+    for a, b in pairs:
+        matched_at = now - timedelta(days=rng.uniform(0, 60))
+        matches.append({'user1_id': a, 'user2_id': b, 'timestamp': matched_at})
+        swipes[(a, b)] = (True, matched_at - timedelta(hours=rng.uniform(0, 48)))
+        swipes[(b, a)] = (True, matched_at)
+
+    # 3. Autres swipes : swipers plus ou moins actifs, likes non réciproques
+    activity = _zipf_weights(n_users)
+    rng.shuffle(activity)
+    max_swipes = n_users * (n_users - 1)
+    target_swipes = min(max(n_swipes, len(swipes)), max_swipes)
+    while len(swipes) < target_swipes:
+        for swiper in rng.choices(range(1, n_users + 1), weights=activity, k=target_swipes - len(swipes)):
+            swiped = rng.randint(1, n_users)
+            if swiped == swiper or (swiper, swiped) in swipes:
+                continue
+            liked = rng.random() < like_ratio and (swiped, swiper) not in swipes
+            swipes[(swiper, swiped)] = (liked, now - timedelta(days=rng.uniform(0, 60)))
+    for rows in _chunks(
+        {'swiper_id': a, 'swiped_id': b, 'liked': liked, 'timestamp': at}
+        for (a, b), (liked, at) in swipes.items()
+    ):
+        db.session.execute(insert(Swipe), rows)
+    done('swipe', len(swipes))
+    for rows in _chunks(matches):
+        db.session.execute(insert(Match), rows)
+    done('match', len(matches))
+
+    # 4. Messages : volume géométrique par match, longueurs log-normales
+    messages = []
+    p = 1 / (messages_per_match + 1) if messages_per_match else 1
+    for match in matches:
+        a, b = match['user1_id'], match['user2_id']
+        sent_at = match['timestamp']
+        while rng.random() > p:
+            sender, recipient = (a, b) if rng.random() < 0.5 else (b, a)
+            sent_at += timedelta(minutes=rng.expovariate(1 / 90))
+            messages.append({
+                'sender_id': sender, 'recipient_id': recipient, 'body': _message_body(rng),
+                'timestamp': min(sent_at, now), 'conversation_key': conversation_key(a, b),
+            })
+    for rows in _chunks(messages):
+        db.session.execute(insert(Message), rows)
+    done('message', len(messages))
+    db.session.commit()
+
+    # 5. Résumés de conversation (boîte de réception), compteurs et likes en attente
+    with db.engine.begin() as conn:
+        conversations.rebuild_summaries(conn)
+        engagement.rebuild_stats(conn)
+    return counts
@@ -0,0 +1,226 @@
+# seen.py
+
+"""
+Profils déjà vus, sous forme de bitmap compressé (une ligne par utilisateur).
+
+La table Swipe garde une ligne par décision ; l'immense majorité sont des
+dislikes qui ne servent plus qu'à « ne plus montrer ce profil ». La commande
+`flask archive-swipes` déplace les anciens dislikes dans SeenBitmap puis
+supprime leurs lignes. Les likes restent dans Swipe (détection des matchs).
+
+Format (petit-boutiste), inspiré de Roaring : les ID sont regroupés par blocs
+de 65 536 (16 bits de poids fort) ; chaque bloc est stocké sous la forme la
+plus compacte parmi :
+    - ARRAY  : liste triée des 16 bits de poids faible (2 octets par ID) ;
+    - BITMAP : 65 536 bits (8 Ko), pour les blocs denses ;
+    - RUNS   : intervalles [début, fin] (4 octets par intervalle).
+L'appartenance est testée directement sur les octets stockés (recherche
+dichotomique ou test de bit), sans décompresser tout le bitmap.
+"""
+
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import Swipe, SeenBitmap
+
+
+MAGIC = b'VZS1'
+ARRAY, BITMAP, RUNS = 0, 1, 2
+BITMAP_BYTES = 8192
+
+_HEADER = struct.Struct('<4sI')         # magic, nombre de blocs
+_CONTAINER = struct.Struct('<HBII')     # clé, type, cardinalité, taille des données
+
+
+def _to_bytes(values):
+    """uint16 -> octets petit-boutistes."""
+    values = array('H', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _uint16(data):
+    """Octets petit-boutistes -> séquence indexable d'uint16 (sans copie si possible)."""
+    if sys.byteorder == 'little':
+        return memoryview(data).cast('H')
+    values = array('H')
+    values.frombytes(data)
+    values.byteswap()
+    return values
+
+
+def _encode_container(lows):
+    """Choisit la représentation la plus compacte d'un bloc (lows trié, sans doublon)."""
+    starts, ends = [], []
+    for low in lows:
+        if ends and low == ends[-1] + 1:
+            ends[-1] = low
+        else:
+            starts.append(low)
+            ends.append(low)
+
+    sizes = {ARRAY: 2 * len(lows), BITMAP: BITMAP_BYTES, RUNS: 4 * len(starts)}
+    kind = min(sizes, key=sizes.get)
+    if kind == ARRAY:
+        return kind, _to_bytes(lows)
+    if kind == RUNS:
+        return kind, _to_bytes(starts) + _to_bytes(ends)
+    bits = bytearray(BITMAP_BYTES)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return kind, bytes(bits)
+
+
+def encode(ids):
+    """Sérialise un ensemble d'ID (entiers positifs < 2**32)."""
+    containers = {}
+    for user_id in sorted(set(ids)):
+        containers.setdefault(user_id >> 16, []).append(user_id & 0xFFFF)
+
+    headers, payloads = [], []
+    for key, lows in containers.items():
+        kind, payload = _encode_container(lows)
+        headers.append(_CONTAINER.pack(key, kind, len(lows), len(payload)))
+        payloads.append(payload)
+    return _HEADER.pack(MAGIC, len(containers)) + b''.join(headers) + b''.join(payloads)
+
+
+class SeenSet:
+    """Ensemble d'ID en lecture seule, testé directement sur sa forme sérialisée."""
+
+    def __init__(self, data=b''):
+        self.data = bytes(data)
+        self._containers = {}   # {clé: (type, cardinalité, données)}
+        if not self.data:
+            return
+        magic, count = _HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError('Format de bitmap inconnu')
+        offset = _HEADER.size + count * _CONTAINER.size
+        view = memoryview(self.data)
+        for i in range(count):
+            key, kind, cardinality, size = _CONTAINER.unpack_from(self.data, _HEADER.size + i * _CONTAINER.size)
+            self._containers[key] = (kind, cardinality, view[offset:offset + size])
+            offset += size
+
+    @classmethod
+    def from_ids(cls, ids):
+        return cls(encode(ids))
+
+    def __contains__(self, user_id):
+        container = self._containers.get(user_id >> 16)
+        if container is None:
+            return False
+        kind, _, payload = container
+        low = user_id & 0xFFFF
+        if kind == BITMAP:
+            return bool(payload[low >> 3] >> (low & 7) & 1)
+        values = _uint16(payload)
+        if kind == ARRAY:
+            i = bisect_right(values, low)
+            return i > 0 and values[i - 1] == low
+        half = len(values) // 2                  # RUNS : débuts puis fins
+        i = bisect_right(values[:half], low)
+        return i > 0 and low <= values[half + i - 1]
+
+    def next_unseen(self, user_id):
+        """Plus petit ID >= user_id absent de l'ensemble (saute les plages entières)."""
+        while True:
+            container = self._containers.get(user_id >> 16)
+            if container is None:
+                return user_id
+            kind, _, payload = container
+            low = user_id & 0xFFFF
+            if kind == RUNS:
+                values = _uint16(payload)
+                half = len(values) // 2
+                i = bisect_right(values[:half], low)
+                if i == 0 or low > values[half + i - 1]:
+                    return user_id
+                user_id += values[half + i - 1] - low + 1   # fin de la plage
+            elif user_id in self:
+                user_id += 1
+            else:
+                return user_id
+
+    def __iter__(self):
+        for key in sorted(self._containers):
+            kind, _, payload = self._containers[key]
+            high = key << 16
+            if kind == ARRAY:
+                lows = _uint16(payload)
+            elif kind == RUNS:
+                values = _uint16(payload)
+                half = len(values) // 2
+                lows = (low for start, end in zip(values[:half], values[half:])
+                        for low in range(start, end + 1))
+            else:
+                bits = int.from_bytes(payload, 'little')
+                lows = (low for low in range(65536) if bits >> low & 1)
+            for low in lows:
+                yield high | low
+
+    def __len__(self):
+        return sum(cardinality for _, cardinality, _ in self._containers.values())
+
+    def union(self, ids):
+        """Nouvel ensemble contenant aussi `ids`."""
+        return SeenSet.from_ids([*self, *ids])
+
+    def filter_unseen(self, ids):
+        return [user_id for user_id in ids if user_id not in self]
+
+
+# --- ACCÈS ---
+
+def load(user_id):
+    """Profils archivés de l'utilisateur (mis en cache pour la requête en cours)."""
+    cache = g.setdefault('seen_sets', {})
+    if user_id not in cache:
+        data = db.session.scalar(select(SeenBitmap.data).where(SeenBitmap.user_id == user_id))
+        cache[user_id] = SeenSet(data or b'')
+    return cache[user_id]
+
+
+def archive_dislikes(older_than_days, log=None):
+    """
+    Déplace les dislikes de plus de `older_than_days` jours dans SeenBitmap.
+
+    Un utilisateur à la fois : lecture de ses dislikes, fusion dans son bitmap,
+    suppression des lignes, commit. Renvoie le nombre de swipes archivés.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    old_dislikes = (Swipe.liked.is_(False), Swipe.timestamp < cutoff)
+    swiper_ids = db.session.scalars(select(Swipe.swiper_id).where(*old_dislikes).distinct()).all()
+
+    archived = 0
+    for swiper_id in swiper_ids:
+        rows = db.session.execute(
+            select(Swipe.swiped_id).where(Swipe.swiper_id == swiper_id, *old_dislikes)
+        ).all()
+        current = db.session.scalar(select(SeenBitmap.data).where(SeenBitmap.user_id == swiper_id))
+        merged = SeenSet(current or b'').union(swiped_id for (swiped_id,) in rows)
+
+        db.session.execute(
+            insert(SeenBitmap)
+            .values(user_id=swiper_id, data=merged.data, cardinality=len(merged), updated_at=datetime.utcnow())
+            .on_conflict_do_update(index_elements=['user_id'], set_={
+                'data': merged.data, 'cardinality': len(merged), 'updated_at': datetime.utcnow(),
+            })
+        )
+        db.session.execute(delete(Swipe).where(Swipe.swiper_id == swiper_id, *old_dislikes))
+        db.session.commit()
+
+        archived += len(rows)
+        if log:
+            log(f'Utilisateur {swiper_id} : {len(rows)} dislikes archivés ({len(merged.data)} octets)')
+    return archived
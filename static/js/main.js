@@ -0,0 +1,309 @@
+// static/js/main.js
+
+/*
+ * 1. Feed en "paquet" (voir la vue feed() dans app.py).
+ *
+ * /feed envoie plusieurs profils d'un coup : on les fait défiler ici sans
+ * recharger la page. Les décisions sont gardées en mémoire puis envoyées par
+ * lots à /api/swipes (toutes les SYNC_EVERY décisions, après SYNC_DELAY_MS
+ * d'inactivité, et en quittant la page). Quand il reste peu de cartes, le
+ * paquet suivant est demandé en arrière-plan, en excluant les profils encore
+ * affichés ou pas encore envoyés. Tant que l'envoi échoue, aucun paquet n'est
+ * demandé (la liste d'exclusion ne ferait que grandir) : nouvel essai après
+ * SYNC_RETRY_MS, doublé à chaque échec jusqu'à SYNC_RETRY_MAX_MS.
+ * Sans JavaScript, les liens des cartes gardent le parcours /swipe -> /feed.
+ */
+(function () {
+    'use strict';
+
+    var SYNC_EVERY = 5;
+    var SYNC_DELAY_MS = 3000;
+    var SYNC_RETRY_MS = 2000;
+    var SYNC_RETRY_MAX_MS = 60000;
+
+    var deck = document.getElementById('feed-deck');
+    var dataElement = document.getElementById('feed-deck-data');
+    if (!deck || !dataElement || !window.fetch) {
+        return;
+    }
+    var config = JSON.parse(dataElement.textContent);
+    var prefetchAt = Math.max(2, Math.floor(config.deck_size / 3));
+
+    var pending = [];          // décisions pas encore envoyées : {user_id, action}
+    var sending = null;        // envoi en cours (Promise)
+    var fetchingDeck = false;
+    var exhausted = config.exhausted;
+    var syncTimer = null;
+    var syncFailing = false;   // dernier envoi en échec : paquet suivant suspendu
+    var failures = 0;          // échecs consécutifs (envoi ou paquet)
+    var retryTimer = null;
+
+    function cards() {
+        return deck.querySelectorAll('.deck-card');
+    }
+
+    function heldIds() {
+        var ids = [];
+        cards().forEach(function (card) { ids.push(card.dataset.userId); });
+        pending.forEach(function (decision) { ids.push(String(decision.user_id)); });
+        return ids;
+    }
+
+    function showMatch(match) {
+        var container = document.querySelector('.flash-messages-container');
+        if (!container) {
+            container = document.createElement('div');
+            container.className = 'flash-messages-container';
+            container.style.cssText = 'position: fixed; top: 80px; right: 20px; z-index: 1000; width: 300px;';
+            document.body.appendChild(container);
+        }
+        var alert = document.createElement('div');
+        alert.className = 'alert alert-success';
+        alert.setAttribute('role', 'alert');
+        alert.style.cssText = 'padding: 15px; margin-bottom: 10px; border-radius: 8px; color: white; ' +
+            'background-color: #4CAF50; box-shadow: 0 4px 10px rgba(0,0,0,0.1); cursor: pointer;';
+        alert.textContent = "C'est un Vibe ! Vous avez matché avec " + match.first_name + '.';
+        alert.addEventListener('click', function () { alert.remove(); });
+        container.appendChild(alert);
+    }
+
+    // --- ENVOI DES DÉCISIONS ---
+
+    function sync(keepalive) {
+        clearTimeout(syncTimer);
+        if (sending) {
+            return sending.then(function () { return pending.length ? sync(keepalive) : null; });
+        }
+        if (!pending.length) {
+            return Promise.resolve();
+        }
+        var batch = pending.splice(0, config.swipe_batch_max);
+        sending = fetch(config.swipes_url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            credentials: 'same-origin',
+            keepalive: !!keepalive,   // l'envoi survit à la fermeture de la page
+            body: JSON.stringify({swipes: batch})
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        }).then(function (result) {
+            syncFailing = false;
+            failures = 0;
+            result.matches.forEach(showMatch);
+        }).catch(function () {
+            // Réseau indisponible : le lot repart avec le prochain envoi
+            pending = batch.concat(pending);
+            syncFailing = true;
+            retryLater();
+        }).then(function () {
+            sending = null;
+        });
+        return sending;
+    }
+
+    function retryLater() {
+        // Envoi puis paquet suivant, après une attente doublée à chaque échec
+        failures += 1;
+        clearTimeout(retryTimer);
+        retryTimer = setTimeout(function () {
+            sync().then(showTop);
+        }, Math.min(SYNC_RETRY_MS * Math.pow(2, failures - 1), SYNC_RETRY_MAX_MS));
+    }
+
+    function drain() {
+        // Un lot par requête : on renvoie jusqu'à ce que les décisions en attente
+        // tiennent dans la liste d'exclusion acceptée par /feed (un lot au plus)
+        return sync().then(function () {
+            return pending.length > config.swipe_batch_max && !syncFailing ? drain() : null;
+        });
+    }
+
+    function scheduleSync() {
+        if (syncFailing) {
+            return;   // nouvel essai déjà programmé par retryLater()
+        }
+        if (pending.length >= SYNC_EVERY) {
+            sync();
+        } else {
+            clearTimeout(syncTimer);
+            syncTimer = setTimeout(sync, SYNC_DELAY_MS);
+        }
+    }
+
+    // --- PAQUET SUIVANT ---
+
+    function prefetch() {
+        if (fetchingDeck || exhausted || syncFailing) {
+            return;   // envoi en échec : retryLater() relance le paquet suivant
+        }
+        fetchingDeck = true;
+        var added = 0;
+        // Décisions envoyées d'abord : la file côté serveur est alors à jour
+        drain().then(function () {
+            if (syncFailing) {
+                throw new Error('Décisions non envoyées');
+            }
+            var url = config.deck_url + '&exclude=' + encodeURIComponent(heldIds().join(','));
+            return fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}});
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        }).then(function (result) {
+            var held = heldIds();
+            result.cards.forEach(function (card) {
+                if (held.indexOf(String(card.user_id)) !== -1) {
+                    return;
+                }
+                var element = document.createElement('div');
+                element.className = 'deck-card';
+                element.dataset.userId = card.user_id;
+                element.hidden = true;
+                element.innerHTML = card.html;
+                deck.appendChild(element);
+                added += 1;
+            });
+            exhausted = result.exhausted;
+        }).catch(function () {
+            // Échec de l'envoi (déjà relancé par retryLater) ou du paquet
+        }).then(function () {
+            fetchingDeck = false;
+            if (added || exhausted) {
+                failures = 0;
+                showTop();
+            } else if (!syncFailing) {
+                // Rien de nouveau : pas de nouvelle demande immédiate depuis showTop()
+                retryLater();
+            }
+        });
+    }
+
+    function showTop() {
+        var remaining = cards();
+        if (remaining.length) {
+            remaining[0].hidden = false;
+        } else if (exhausted) {
+            // Plus aucun profil : la page "vide" est rendue par le serveur
+            sync().then(function () { window.location.href = config.feed_url; });
+        }
+        if (remaining.length <= prefetchAt) {
+            prefetch();
+        }
+    }
+
+    // --- SWIPE ---
+
+    deck.addEventListener('click', function (event) {
+        var link = event.target.closest('a[data-swipe]');
+        var card = link && link.closest('.deck-card');
+        if (!card) {
+            return;
+        }
+        event.preventDefault();
+        pending.push({user_id: Number(card.dataset.userId), action: link.dataset.swipe});
+        card.remove();
+        scheduleSync();
+        showTop();
+    });
+
+    window.addEventListener('pagehide', function () { sync(true); });
+    document.addEventListener('visibilitychange', function () {
+        if (document.visibilityState === 'hidden') {
+            sync(true);
+        }
+    });
+})();
+
+/*
+ * 2. Chat en temps réel (voir realtime.py).
+ *
+ * Les messages arrivent par un flux Server-Sent Events (EventSource se
+ * reconnecte seul et renvoie Last-Event-ID : le serveur renvoie les messages
+ * manqués). Le formulaire est envoyé en arrière-plan (fetch, réponse JSON)
+ * au lieu du Post-Redirect-Get. Chaque bulle porte l'id de son message :
+ * un message reçu deux fois (réponse + flux) n'est affiché qu'une fois.
+ */
+(function () {
+    'use strict';
+
+    var container = document.querySelector('.chat-container');
+    if (!container || !window.fetch) {
+        return;
+    }
+    var viewerId = Number(container.dataset.viewerId);
+    var messageArea = container.querySelector('.message-area');
+    var form = container.querySelector('.message-form-area form');
+
+    function hasMessage(id) {
+        return !!messageArea.querySelector('[data-message-id="' + id + '"]');
+    }
+
+    function appendMessage(message) {
+        if (hasMessage(message.id)) {
+            return;
+        }
+        var empty = messageArea.querySelector('.chat-empty');
+        if (empty) {
+            empty.remove();
+        }
+        var sent = message.sender_id === viewerId;
+        var bubble = document.createElement('div');
+        bubble.className = 'message-bubble ' + (sent ? 'sent' : 'received');
+        bubble.dataset.messageId = message.id;
+        bubble.style.cssText = 'text-align: ' + (sent ? 'right' : 'left') + '; margin-bottom: 10px;';
+        var body = document.createElement('div');
+        body.style.cssText = sent
+            ? 'background: var(--color-primary); color: white; padding: 10px 15px; border-radius: 20px 20px 5px 20px; display: inline-block; max-width: 70%;'
+            : 'background: var(--color-bg-light); color: var(--color-text-dark); padding: 10px 15px; border-radius: 20px 20px 20px 5px; display: inline-block; max-width: 70%;';
+        body.appendChild(document.createTextNode(message.body));
+        var timestamp = document.createElement('div');
+        timestamp.className = 'timestamp';
+        timestamp.style.cssText = 'font-size: 0.75em; opacity: 0.8; margin-top: 5px;';
+        timestamp.textContent = message.timestamp.slice(11, 16);   // HH:MM (UTC, comme le template)
+        body.appendChild(timestamp);
+        bubble.appendChild(body);
+        messageArea.appendChild(bubble);
+        messageArea.scrollTop = messageArea.scrollHeight;
+    }
+
+    messageArea.scrollTop = messageArea.scrollHeight;
+
+    if (container.dataset.eventsUrl && window.EventSource) {
+        var events = new EventSource(container.dataset.eventsUrl, {withCredentials: true});
+        events.addEventListener('message', function (event) {
+            appendMessage(JSON.parse(event.data));
+        });
+    }
+
+    if (form) {
+        form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            var data = new FormData(form);
+            var button = form.querySelector('[type="submit"]');
+            button.disabled = true;
+            fetch(form.action || window.location.href, {
+                method: 'POST',
+                body: data,
+                credentials: 'same-origin',
+                headers: {'Accept': 'application/json'}
+            }).then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.json();
+            }).then(function (result) {
+                appendMessage(result.message);
+                form.querySelector('textarea, input[name="body"]').value = '';
+            }).catch(function () {
+                // Échec : envoi classique du formulaire (rechargement de la page)
+                form.submit();
+            }).then(function () {
+                button.disabled = false;
+            });
+        });
+    }
+})();
@@ -0,0 +1,343 @@
+# swipe_buffer.py
+
+"""
+Buffer d'écriture des swipes (optionnel : SWIPE_WRITE_MODE = 'buffered').
+
+En mode direct, chaque clic fait un commit SQLite ; aux heures de pointe,
+l'unique écrivain de SQLite devient le goulot d'étranglement. En mode
+buffered, un swipe est :
+    1. ajouté à un journal local (une ligne JSON, fichier en ajout seul) ;
+    2. gardé en mémoire dans le buffer du processus ;
+    3. écrit dans Swipe par lots, toutes les SWIPE_FLUSH_INTERVAL_MS ou dès
+       SWIPE_FLUSH_MAX_ITEMS swipes en attente (un seul commit par lot).
+Les likes réciproques sont cherchés dans la base ET dans le buffer : un match
+est signalé (et enregistré) immédiatement. Le feed ignore les profils en
+attente dans le buffer.
+
+Reprise après crash : au démarrage, les journaux orphelins (processus mort,
+verrou flock libéré) sont rejoués puis supprimés. Le rejeu est idempotent
+(INSERT ... ON CONFLICT DO NOTHING).
+
+Durabilité — à connaître avant d'activer ce mode :
+    - SWIPE_LOG_FSYNC = True (défaut) : fsync du journal à chaque clic. Un
+      swipe confirmé survit à un crash du processus ou de la machine ; il
+      n'apparaît dans la base qu'après le vidage suivant (ou au redémarrage).
+    - SWIPE_LOG_FSYNC = False : le journal n'est écrit que dans le cache du
+      système. Un crash du processus ne perd rien ; une coupure de courant
+      ou un crash du noyau peut perdre les dernières secondes de swipes.
+    - Chaque processus (worker) a son propre buffer : un like réciproque
+      encore dans le buffer d'un AUTRE processus n'est vu qu'au vidage, où
+      record_swipes() crée le match. Il est noté dans MatchNotice (même
+      transaction) et annoncé au swiper avec le résultat de son prochain
+      swipe, quel que soit le worker (signalé en retard, jamais perdu).
+    - Un disque local est requis : le verrou flock des journaux ne fonctionne
+      pas de façon fiable sur un système de fichiers réseau.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import User, Swipe, MatchNotice
+import seen
+import swipes
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou, un seul processus supposé
+    fcntl = None
+
+
+LOG_PATTERN = 'swipes-*.log'
+
+
+def _try_lock(f):
+    """Verrou exclusif non bloquant ; False si un autre processus le détient."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class SwipeBuffer:
+    """Swipes en attente d'écriture + journal durable + thread de vidage."""
+
+    def __init__(self, app, log_dir, interval_ms=200, max_items=500, fsync=True):
+        self.app = app
+        self.log_dir = log_dir
+        self.interval = interval_ms / 1000
+        self.max_items = max_items
+        self.fsync = fsync
+
+        self._lock = threading.Lock()          # état en mémoire + journal courant
+        self._flush_lock = threading.Lock()    # un seul vidage à la fois
+        self._pending = {}    # {swiper_id: {swiped_id: (liked, datetime)}}
+        self._flushing = {}   # lot en cours d'écriture (encore visible pour les lectures)
+        self._count = 0
+        self._log = None
+        self._log_seq = 0
+        self._unflushed_logs = []   # journaux dont le contenu n'est pas encore en base
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._owner_pid = None
+
+        os.makedirs(log_dir, exist_ok=True)
+
+    # --- JOURNAL ---
+
+    def _open_log(self):
+        self._log_seq += 1
+        path = os.path.join(self.log_dir, f'swipes-{os.getpid()}-{self._log_seq}.log')
+        log = open(path, 'a', encoding='utf-8')
+        _try_lock(log)
+        return log
+
+    def _write_log(self, lines):
+        if self._log is None:
+            self._log = self._open_log()
+        self._log.write(''.join(lines))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    # --- ÉCRITURE ---
+
+    def _ensure_started(self):
+        """Thread de vidage démarré au premier swipe (et recréé après un fork)."""
+        if self._owner_pid != os.getpid():
+            self._owner_pid = os.getpid()
+            self._log = None   # le journal hérité appartient au processus parent
+            self._thread = threading.Thread(target=self._run, name='swipe-buffer', daemon=True)
+            self._thread.start()
+
+    def append(self, swiper_id, decisions, timestamp):
+        """
+        Journalise puis met en attente {swiped_id: liked}.
+
+        Renvoie la liste des swiped_id acceptés (ceux déjà en attente sont ignorés).
+        """
+        with self._lock:
+            self._ensure_started()
+            known = self._pending.get(swiper_id, {})
+            flushing = self._flushing.get(swiper_id, {})
+            accepted = {
+                swiped_id: liked for swiped_id, liked in decisions.items()
+                if swiped_id not in known and swiped_id not in flushing
+            }
+            if not accepted:
+                return []
+
+            stamp = timestamp.isoformat()
+            self._write_log([
+                json.dumps({'swiper': swiper_id, 'swiped': swiped_id, 'liked': liked, 'at': stamp}) + '\n'
+                for swiped_id, liked in accepted.items()
+            ])
+            pending = self._pending.setdefault(swiper_id, {})
+            for swiped_id, liked in accepted.items():
+                pending[swiped_id] = (liked, timestamp)
+            self._count += len(accepted)
+            if self._count >= self.max_items:
+                self._wake.set()
+        return list(accepted)
+
+    # --- LECTURE ---
+
+    def pending_for(self, swiper_id):
+        """ID des profils swipés par swiper_id et pas encore écrits en base."""
+        with self._lock:
+            return set(self._pending.get(swiper_id, ())) | set(self._flushing.get(swiper_id, ()))
+
+    def likers_of(self, swiped_id, candidate_ids):
+        """Parmi candidate_ids, ceux dont un like sur swiped_id est encore en attente."""
+        with self._lock:
+            return {
+                candidate_id for candidate_id in candidate_ids
+                for batch in (self._pending, self._flushing)
+                if batch.get(candidate_id, {}).get(swiped_id, (False,))[0]
+            }
+
+    # --- VIDAGE ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._count:
+                self.flush()
+
+    def flush(self):
+        """Écrit tous les swipes en attente dans Swipe (un commit). Renvoie leur nombre."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending, self._count = self._pending, {}, 0
+                self._flushing = batch
+                # Les prochains swipes vont dans un nouveau journal
+                if self._log is not None:
+                    self._unflushed_logs.append(self._log)
+                    self._log = None
+                logs = list(self._unflushed_logs)
+
+            try:
+                with self.app.app_context():
+                    for swiper_id, decisions in batch.items():
+                        # Un groupe par heure de clic (un appel à append) : chaque swipe garde la sienne
+                        by_time = {}
+                        for swiped_id, (liked, at) in decisions.items():
+                            by_time.setdefault(at, {})[swiped_id] = liked
+                        for at, group in sorted(by_time.items()):
+                            result = swipes.record_swipes(swiper_id, group, timestamp=at)
+                            _queue_match_notices(swiper_id, result.matches, at)
+                    db.session.commit()
+            except Exception:
+                self.app.logger.exception('Échec du vidage du buffer de swipes ; nouvel essai au prochain cycle')
+                with self._lock:
+                    # On remet le lot en attente ; ses journaux restent sur disque
+                    for swiper_id, decisions in batch.items():
+                        pending = self._pending.setdefault(swiper_id, {})
+                        for swiped_id, value in decisions.items():
+                            pending.setdefault(swiped_id, value)
+                    self._count = sum(len(d) for d in self._pending.values())
+                    self._flushing = {}
+                return 0
+
+            with self._lock:
+                self._flushing = {}
+                for log in logs:
+                    self._unflushed_logs.remove(log)
+                    os.unlink(log.name)
+                    log.close()
+            return sum(len(decisions) for decisions in batch.values())
+
+    def replay(self):
+        """Rejoue les journaux orphelins (processus arrêté sans vidage). Renvoie le nombre de swipes."""
+        for path in sorted(glob.glob(os.path.join(self.log_dir, LOG_PATTERN))):
+            log = open(path, 'a+', encoding='utf-8')
+            if not _try_lock(log):
+                log.close()   # journal actif d'un autre processus
+                continue
+            log.seek(0)
+            with self._lock:
+                for line in log:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # dernière ligne tronquée par le crash
+                    pending = self._pending.setdefault(entry['swiper'], {})
+                    pending.setdefault(entry['swiped'], (entry['liked'], datetime.fromisoformat(entry['at'])))
+                self._count = sum(len(d) for d in self._pending.values())
+                self._unflushed_logs.append(log)
+        return self.flush()
+
+    def close(self):
+        """Arrêt propre : vide le buffer (appelé à la sortie du processus)."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._owner_pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+buffer = None
+
+
+def init_app(app):
+    """Crée le buffer si SWIPE_WRITE_MODE = 'buffered' ; rejoue toujours les journaux orphelins."""
+    global buffer
+    log_dir = os.path.join(app.root_path, app.config['SWIPE_BUFFER_DIR'])
+    buffered = app.config['SWIPE_WRITE_MODE'] == 'buffered'
+    if not buffered and not glob.glob(os.path.join(log_dir, LOG_PATTERN)):
+        return
+
+    swipe_buffer = SwipeBuffer(
+        app, log_dir,
+        interval_ms=app.config['SWIPE_FLUSH_INTERVAL_MS'],
+        max_items=app.config['SWIPE_FLUSH_MAX_ITEMS'],
+        fsync=app.config['SWIPE_LOG_FSYNC'],
+    )
+    replayed = swipe_buffer.replay()
+    if replayed:
+        app.logger.warning('%d swipe(s) rejoué(s) depuis le journal du buffer', replayed)
+    if buffered:
+        buffer = swipe_buffer
+        app.extensions['swipe_buffer'] = buffer
+        atexit.register(buffer.close)
+
+
+# --- MATCHS CRÉÉS AU VIDAGE ---
+
+def _queue_match_notices(swiper_id, matched_users, timestamp):
+    """Note les matchs créés au vidage, à annoncer au prochain swipe de swiper_id."""
+    if matched_users:
+        db.session.execute(insert(MatchNotice).on_conflict_do_nothing(), [
+            {'user_id': swiper_id, 'matched_user_id': user.id, 'timestamp': timestamp} for user in matched_users
+        ])
+
+
+def take_match_notices(user_id):
+    """Matchs pas encore annoncés à user_id (toujours en cours), retirés de MatchNotice."""
+    notices = db.session.scalars(select(MatchNotice.matched_user_id).where(MatchNotice.user_id == user_id)).all()
+    if not notices:
+        return []
+    db.session.execute(delete(MatchNotice).where(MatchNotice.user_id == user_id,
+                                                 MatchNotice.matched_user_id.in_(notices)))
+    # Un match défait entre-temps n'est plus annoncé
+    return db.session.scalars(
+        select(User).where(User.id.in_(notices), swipes.match_exists(user_id)).order_by(User.id)
+    ).all()
+
+
+def pending_for(swiper_id):
+    return buffer.pending_for(swiper_id) if buffer is not None else set()
+
+
+def submit(swiper_id, decisions):
+    """
+    Enregistre un lot {swiped_id: liked} : via le buffer s'il est actif, sinon
+    directement (swipes.record_swipes). Le commit reste à la charge de l'appelant.
+    """
+    if buffer is None or not decisions:
+        result = swipes.record_swipes(swiper_id, decisions)
+        result.matches += take_match_notices(swiper_id)   # journaux rejoués au démarrage
+        return result
+
+    now = datetime.utcnow()
+    # 1. Déjà swipés : en base, archivés (seen.py) ou en attente dans le buffer
+    in_db = set(db.session.scalars(
+        select(Swipe.swiped_id).where(Swipe.swiper_id == swiper_id, Swipe.swiped_id.in_(list(decisions)))
+    ))
+    archived = seen.load(swiper_id)
+    fresh = {t: liked for t, liked in decisions.items() if t not in in_db and t not in archived}
+    recorded = buffer.append(swiper_id, fresh, now)
+    recorded_ids = set(recorded)
+    skipped = [swiped_id for swiped_id in decisions if swiped_id not in recorded_ids]
+
+    # 2. Likes réciproques : en base ou encore dans le buffer -> match immédiat
+    liked_ids = [swiped_id for swiped_id in recorded if decisions[swiped_id]]
+    matched_users = []
+    if liked_ids:
+        reciprocal = set(db.session.scalars(
+            select(Swipe.swiper_id)
+            .where(Swipe.swiped_id == swiper_id, Swipe.swiper_id.in_(liked_ids), Swipe.liked.is_(True))
+        )) | buffer.likers_of(swiper_id, liked_ids)
+        if reciprocal:
+            matched_users = db.session.scalars(
+                select(User).where(User.id.in_(reciprocal), ~swipes.match_exists(swiper_id))
+            ).all()
+            swipes.create_matches(swiper_id, matched_users, now)
+
+    # 3. Matchs créés depuis au vidage du buffer (ici ou dans un autre worker)
+    return swipes.SwipeResult(recorded, skipped, matched_users + take_match_notices(swiper_id))
@@ -0,0 +1,144 @@
+# swipes.py
+
+"""
+Enregistrement des swipes et détection des matchs.
+
+record_swipes() traite un lot de décisions dans une seule transaction :
+  1. insertion groupée (INSERT ... ON CONFLICT DO NOTHING RETURNING) ;
+  2. retrait des profils de la file de candidats du feed, compteurs de likes
+     et likes en attente (voir engagement.py) ;
+  3. une seule requête jointe pour trouver tous les likes réciproques ;
+  4. insertion groupée des nouveaux matchs, de leurs résumés de conversation
+     et de leurs compteurs.
+
+Utilisé par la route /swipe (un seul swipe) et par l'API JSON /api/swipes,
+directement ou au vidage du buffer d'écriture (voir swipe_buffer.py).
+unmatch() défait un match et supprime sa conversation, archives comprises.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, exists, delete, and_, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import User, Swipe, Match, Message, CandidateQueue, ConversationSummary, ordered_pair, conversation_key
+import conversations
+import engagement
+import message_archive
+import seen
+
+
+ACTIONS = {'like': True, 'dislike': False}
+
+
+class SwipeResult:
+    """Résultat d'un lot : swipes enregistrés, ignorés et nouveaux matchs."""
+
+    def __init__(self, recorded, skipped, matches):
+        self.recorded = recorded    # [swiped_id, ...] réellement insérés
+        self.skipped = skipped      # [swiped_id, ...] déjà swipés auparavant
+        self.matches = matches      # [User, ...] nouveaux matchs
+
+    def to_dict(self):
+        return {
+            'recorded': self.recorded,
+            'skipped': self.skipped,
+            'matches': [{'user_id': u.id, 'first_name': u.first_name} for u in self.matches],
+        }
+
+
+def record_swipes(swiper_id, decisions, timestamp=None):
+    """
+    Enregistre un lot de décisions {swiped_id: liked} pour swiper_id.
+
+    Les décisions doivent déjà être validées (pas d'auto-swipe). Le commit est
+    laissé à l'appelant afin que tout le lot tienne dans une seule transaction.
+    `timestamp` : heure des clics si elle est antérieure (vidage du buffer, voir swipe_buffer.py).
+    """
+    if not decisions:
+        return SwipeResult([], [], [])
+
+    now = timestamp or datetime.utcnow()
+
+    # 1. Insertion groupée ; les swipes déjà existants sont ignorés par l'index unique,
+    #    les dislikes archivés (plus dans Swipe) par le bitmap des profils vus
+    archived = seen.load(swiper_id)
+    rows = [
+        {'swiper_id': swiper_id, 'swiped_id': swiped_id, 'liked': liked, 'timestamp': now}
+        for swiped_id, liked in decisions.items() if swiped_id not in archived
+    ]
+    inserted = db.session.execute(
+        insert(Swipe)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=['swiper_id', 'swiped_id'])
+        .returning(Swipe.swiped_id, Swipe.liked)
+    ).all() if rows else []
+
+    recorded = [swiped_id for swiped_id, _ in inserted]
+    recorded_ids = set(recorded)
+    skipped = [swiped_id for swiped_id in decisions if swiped_id not in recorded_ids]
+    liked_ids = [swiped_id for swiped_id, liked in inserted if liked]
+
+    # 2. Les profils swipés (ou déjà vus) quittent la file du feed
+    CandidateQueue.query.filter(
+        CandidateQueue.owner_id == swiper_id,
+        CandidateQueue.candidate_id.in_(list(decisions))
+    ).delete(synchronize_session=False)
+
+    # Compteurs et "qui m'a liké", dans la même transaction
+    engagement.record_swipes(swiper_id, recorded, liked_ids, now)
+
+    if not liked_ids:
+        return SwipeResult(recorded, skipped, [])
+
+    # 3. Tous les likes réciproques sans match existant, en une requête jointe
+    matched_users = db.session.scalars(
+        select(User)
+        .join(Swipe, and_(Swipe.swiper_id == User.id, Swipe.swiped_id == swiper_id))
+        .where(Swipe.liked.is_(True), User.id.in_(liked_ids), ~match_exists(swiper_id))
+    ).all()
+
+    # 4. Insertion groupée des nouveaux matchs (paires ordonnées) et de leurs résumés
+    create_matches(swiper_id, matched_users, now)
+
+    return SwipeResult(recorded, skipped, matched_users)
+
+
+def match_exists(user_id):
+    """EXISTS : un match relie déjà user_id à User.id (requête corrélée)."""
+    return exists().where(or_(
+        and_(Match.user1_id == user_id, Match.user2_id == User.id),
+        and_(Match.user1_id == User.id, Match.user2_id == user_id),
+    ))
+
+
+def create_matches(swiper_id, matched_users, timestamp):
+    """Insère les matchs swiper_id <-> matched_users (paires ordonnées), leurs résumés et compteurs."""
+    if not matched_users:
+        return
+    new_matches = db.session.execute(
+        insert(Match)
+        .values([
+            dict(zip(('user1_id', 'user2_id'), ordered_pair(swiper_id, user.id)), timestamp=timestamp)
+            for user in matched_users
+        ])
+        .on_conflict_do_nothing(index_elements=['user1_id', 'user2_id'])
+        .returning(Match.id, Match.user1_id, Match.user2_id, Match.timestamp)
+    ).all()
+    conversations.create_summaries(new_matches)
+    engagement.record_matches(new_matches)
+
+
+def unmatch(match):
+    """
+    Supprime le match et toute sa conversation : messages (dans Message et
+    archivés), résumé, compteurs. Les swipes restent : les deux profils ne se
+    reproposent pas dans le feed. Le commit est laissé à l'appelant.
+    """
+    key = conversation_key(match.user1_id, match.user2_id)
+    db.session.execute(delete(Message).where(Message.conversation_key == key))
+    message_archive.delete_conversation(key)
+    db.session.execute(delete(ConversationSummary).where(ConversationSummary.match_id == match.id))
+    engagement.record_unmatch(match.user1_id, match.user2_id)
+    db.session.delete(match)
@@ -0,0 +1,194 @@
+# tags.py
+
+"""
+Vibe tags normalisés et classement des candidats par compatibilité.
+
+Les tags sont stockés une seule fois (Tag) et reliés aux utilisateurs par
+UserTag, dont l'index (tag_id, user_id) sert d'index inversé tag -> utilisateurs.
+La source reste User.vibe_tags (affichée, indexée par profile_fts) : à chaque
+INSERT ou UPDATE d'un utilisateur qui la modifie, _sync_user_tags() réécrit
+ses lignes UserTag dans la même transaction, quel que soit le chemin
+d'écriture (set_user_tags, formulaire de profil...).
+
+Le classement du feed compare les tags de l'utilisateur à ceux de chaque
+candidat (indice de Jaccard : |A ∩ B| / |A ∪ B|). Les tags de chaque candidat
+sont encodés en bitset (un bit par Tag.id) et tous les scores sont calculés
+d'un coup avec NumPy ; sans NumPy, un repli en Python pur utilise des entiers
+comme bitsets. NumPy n'est importé qu'au premier classement (load_numpy).
+"""
+
+import json
+import re
+
+from sqlalchemy import select, delete, event, inspect
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import User, Tag, UserTag
+
+np = None   # NumPy une fois chargé par load_numpy()
+_numpy_checked = False
+_POPCOUNT_TABLE = None
+
+
+MAX_TAG_LENGTH = 40
+
+
+def normalize(name):
+    """'  Techno  Berlin ' -> 'techno berlin' (vide si rien d'utilisable)."""
+    return re.sub(r'\s+', ' ', (name or '').strip().lower())[:MAX_TAG_LENGTH]
+
+
+def parse_vibe_tags(raw):
+    """Ancien format de User.vibe_tags : liste JSON ou 'tag1,tag2'."""
+    if not raw:
+        return []
+    try:
+        names = json.loads(raw)
+        if not isinstance(names, list):
+            names = [names]
+    except ValueError:
+        names = raw.split(',')
+    return [str(name) for name in names]
+
+
+def set_user_tags(user, names):
+    """Remplace les tags de l'utilisateur (normalisés, sans doublons) ; UserTag suit au flush."""
+    user.vibe_tags = json.dumps(sorted({normalize(name) for name in names} - {''}), ensure_ascii=False)
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+def _sync_user_tags(mapper, connection, user):
+    """Réécrit les lignes UserTag d'après User.vibe_tags quand la colonne a changé."""
+    if not inspect(user).attrs.vibe_tags.history.has_changes():
+        return
+    names = sorted({normalize(name) for name in parse_vibe_tags(user.vibe_tags)} - {''})
+    if names:
+        connection.execute(insert(Tag).values([{'name': n} for n in names]).on_conflict_do_nothing())
+    tag_ids = connection.scalars(select(Tag.id).where(Tag.name.in_(names))).all() if names else []
+
+    connection.execute(delete(UserTag).where(UserTag.user_id == user.id))
+    if tag_ids:
+        connection.execute(insert(UserTag), [{'user_id': user.id, 'tag_id': tag_id} for tag_id in tag_ids])
+
+
+def user_tag_names(user_id):
+    return db.session.scalars(
+        select(Tag.name).join(UserTag, UserTag.tag_id == Tag.id)
+        .where(UserTag.user_id == user_id).order_by(Tag.name)
+    ).all()
+
+
+def user_tag_ids(user_id):
+    return db.session.scalars(select(UserTag.tag_id).where(UserTag.user_id == user_id)).all()
+
+
+def tag_pairs(user_ids):
+    """[(user_id, tag_id)] pour tous les utilisateurs donnés, en une requête."""
+    if not user_ids:
+        return []
+    return db.session.execute(
+        select(UserTag.user_id, UserTag.tag_id).where(UserTag.user_id.in_(user_ids))
+    ).all()
+
+
+# --- CLASSEMENT ---
+
+def load_numpy():
+    """Importe NumPy (dépendance optionnelle) au premier appel ; None s'il est absent."""
+    global np, _numpy_checked, _POPCOUNT_TABLE
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:  # repli en Python pur
+            numpy = None
+        if numpy is not None:
+            _POPCOUNT_TABLE = numpy.array([bin(i).count('1') for i in range(256)], dtype=numpy.uint8)
+        np, _numpy_checked = numpy, True
+    return np
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):   # NumPy >= 2.0
+        return np.bitwise_count(words)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(*words.shape, words.itemsize).sum(axis=-1)
+
+
+def _bitsets(n_rows, rows, tag_ids, n_words):
+    """
+    Matrice (n_rows, n_words) de uint64 : bit tag_id allumé pour chaque paire.
+
+    Les paires sont uniques (clé primaire de user_tag) : dans un mot, la somme
+    des bits vaut leur OU. On remplit donc des mots de 16 bits avec un seul
+    np.bincount (exact en float64 jusqu'à 16 bits), puis on les regroupe par 4.
+    """
+    n_lanes = n_words * 4
+    flat = rows * n_lanes + (tag_ids >> 4)
+    weights = np.left_shift(1, tag_ids & 15)
+    lanes = np.bincount(flat, weights=weights, minlength=n_rows * n_lanes).astype(np.uint16)
+    return lanes.reshape(n_rows, n_lanes).view(np.uint64)
+
+
+def _row_positions(candidate_ids, user_ids):
+    """Ligne de chaque user_id dans candidate_ids (vectorisé)."""
+    low, high = int(candidate_ids.min()), int(candidate_ids.max())
+    if high - low < 4 * len(candidate_ids):
+        # ID contigus (cas du feed : parcours keyset) : table d'indirection dense
+        lookup = np.empty(high - low + 1, dtype=np.int64)
+        lookup[candidate_ids - low] = np.arange(len(candidate_ids))
+        return lookup[user_ids - low]
+    order = np.argsort(candidate_ids)
+    return order[np.searchsorted(candidate_ids[order], user_ids)]
+
+
+def build_bitsets(candidate_ids, pairs, n_words=None):
+    """
+    Bitsets de tags de tous les candidats, calculés en une fois.
+
+    pairs : [(candidate_id, tag_id)] — typiquement le résultat de tag_pairs().
+    Renvoie une matrice (len(candidate_ids), n_words) alignée sur candidate_ids.
+    """
+    candidate_array = np.asarray(candidate_ids, dtype=np.int64)
+    pair_array = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    rows = _row_positions(candidate_array, pair_array[:, 0])
+    tag_ids = pair_array[:, 1]
+    if n_words is None:
+        n_words = int(tag_ids.max()) // 64 + 1 if len(tag_ids) else 1
+    return _bitsets(len(candidate_array), rows, tag_ids, n_words)
+
+
+def score_bitsets(candidates, reference_tag_ids):
+    """Jaccard entre chaque ligne de `candidates` et l'ensemble reference_tag_ids."""
+    reference_ids = np.unique(np.asarray(reference_tag_ids, dtype=np.int64))
+    capacity = candidates.shape[1] * 64
+    reference = _bitsets(1, np.zeros(np.count_nonzero(reference_ids < capacity), dtype=np.int64),
+                         reference_ids[reference_ids < capacity], candidates.shape[1])
+
+    # |A ∪ B| = |A| + |B| - |A ∩ B| ; les tags de référence hors capacité comptent dans |B|
+    intersection = _popcount(candidates & reference).sum(axis=1, dtype=np.int64)
+    sizes = _popcount(candidates).sum(axis=1, dtype=np.int64)
+    union = sizes + len(reference_ids) - intersection
+    return intersection / np.maximum(union, 1)
+
+
+def jaccard_scores(reference_tag_ids, candidate_ids, pairs):
+    """
+    Score de Jaccard de chaque candidat (dans l'ordre de candidate_ids).
+
+    pairs : [(candidate_id, tag_id)] — typiquement le résultat de tag_pairs().
+    """
+    if len(reference_tag_ids) == 0 or len(pairs) == 0:
+        return [0.0] * len(candidate_ids)
+
+    if load_numpy() is None:
+        reference = sum(1 << tag_id for tag_id in set(reference_tag_ids))
+        masks = dict.fromkeys(candidate_ids, 0)
+        for candidate_id, tag_id in pairs:
+            masks[candidate_id] |= 1 << tag_id
+        return [
+            (masks[c] & reference).bit_count() / ((masks[c] | reference).bit_count() or 1)
+            for c in candidate_ids
+        ]
+
+    return score_bitsets(build_bitsets(candidate_ids, pairs), reference_tag_ids).tolist()
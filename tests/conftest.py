@@ -0,0 +1,39 @@
+# tests/conftest.py
+
+"""
+Application de test : base SQLite temporaire créée au dernier schéma
+(create_app() applique migrations.upgrade()), sans pool de hachage ni
+mesures, formulaires sans jeton CSRF. Les tests ouvrent eux-mêmes un
+contexte d'application pour accéder à la base hors requête.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        WTF_CSRF_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+        METRICS_ENABLED = False
+        REALTIME_MODE = 'off'
+        SWIPE_WRITE_MODE = 'direct'
+        USER_CACHE_BACKEND = 'none'
+
+    app = create_app(TestConfig)
+    # Pas de contexte d'application actif : chaque requête du client de test
+    # ouvre le sien, avec une session neuve, comme en production
+    yield app
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,39 @@
+# tests/test_api_swipes.py
+
+"""API groupée /api/swipes : identifiants rejetés avant tout enregistrement."""
+
+from datetime import date
+
+from sqlalchemy import insert, select, func
+
+from extensions import db
+from models import User, Swipe, UserStats
+
+
+def test_unknown_and_boolean_ids_are_invalid(app):
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+             'date_of_birth': date(1995, 1, 1)}
+            for i in (1, 2, 3)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '3'
+        sess['_fresh'] = True
+    entries = [
+        {'user_id': 99999, 'action': 'like'},
+        {'user_id': True, 'action': 'like'},
+        {'user_id': False, 'action': 'dislike'},
+        {'user_id': 2, 'action': 'like'},
+    ]
+    response = client.post('/api/swipes', json={'swipes': entries})
+    assert response.status_code == 200
+    assert response.json['recorded'] == [2]
+    assert response.json['invalid'] == [entries[1], entries[2], entries[0]]
+
+    with app.app_context():
+        assert db.session.scalars(select(Swipe.swiped_id)).all() == [2]
+        assert db.session.scalar(select(func.count()).select_from(UserStats).where(UserStats.user_id == 99999)) == 0
@@ -0,0 +1,36 @@
+# tests/test_feed.py
+
+"""Paquet suivant du feed (?format=json) : profils exclus jamais renvoyés, liste d'exclusion bornée."""
+
+from datetime import date
+
+from sqlalchemy import insert
+
+from extensions import db
+from models import User
+
+
+def test_deck_respects_exclude_and_rejects_oversized_lists(app):
+    app.config.update(FEED_DECK_MAX=5, SWIPE_BATCH_MAX=10)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+             'date_of_birth': date(1995, 1, 1)}
+            for i in range(1, 40)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+
+    # Plus que l'ancienne troncature (4 * n) : toute la liste est prise en compte
+    held = list(range(2, 22))
+    response = client.get('/feed?format=json&n=3&exclude=' + ','.join(map(str, held)))
+    assert response.status_code == 200
+    assert [card['user_id'] for card in response.json['cards']] == [22, 23, 24]
+
+    too_many = ','.join(map(str, range(2, 2 + 2 * 5 + 10 + 1)))
+    response = client.get('/feed?format=json&n=3&exclude=' + too_many)
+    assert response.status_code == 400
@@ -0,0 +1,77 @@
+# tests/test_images.py
+
+"""Traitement des photos : seul le dernier upload remplace la photo actuelle, qui reste en place sinon."""
+
+import io
+import os
+import time
+from datetime import date
+
+from PIL import Image
+
+from extensions import db
+from models import User
+import images
+
+OLD, NEW = 'a' * 32, 'b' * 32
+
+
+def test_slow_upload_does_not_overwrite_newer_picture(app):
+    with app.app_context():
+        user = User(email='a@example.com', password_hash='x', first_name='Alice', date_of_birth=date(1995, 1, 1),
+                    image_file=app.config['PROFILE_PIC_PLACEHOLDER'], pending_picture=NEW)
+        db.session.add(user)
+        db.session.commit()
+        user_id, version = user.id, user.version
+
+    # Le traitement de l'ancien upload se termine après l'envoi du nouveau
+    images._set_picture(app, user_id, OLD, images.rendition_name(OLD))
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert (user.image_file, user.pending_picture, user.version) == (
+            app.config['PROFILE_PIC_PLACEHOLDER'], NEW, version)
+
+    images._set_picture(app, user_id, NEW, images.rendition_name(NEW))
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert (user.image_file, user.pending_picture, user.version) == (
+            images.rendition_name(NEW), None, version + 1)
+
+
+def test_webp_only_for_processed_pictures():
+    assert images.has_renditions(images.rendition_name(NEW))
+    assert images.rendition(images.rendition_name(NEW), 'card', 'webp') == f'{NEW}_card.webp'
+    assert not images.has_renditions('3f2a9c.jpg')
+    assert not images.has_renditions(None)
+
+
+def test_pending_upload_keeps_current_picture_and_failure_clears_it(app):
+    current = images.rendition_name(OLD)
+    with app.app_context():
+        user = User(email='a@example.com', password_hash='x', first_name='Alice', date_of_birth=date(1995, 1, 1),
+                    image_file=current)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        # Contenu illisible : le traitement échoue dans le pool
+        assert images.store_upload(app, user, io.BytesIO(b'pas une image')) is False
+        digest = images.content_digest(b'pas une image')
+        assert (user.image_file, user.pending_picture) == (current, digest)
+
+    deadline = time.monotonic() + 30
+    while True:
+        with app.app_context():
+            user = db.session.get(User, user_id)
+            if user.pending_picture is None or time.monotonic() > deadline:
+                break
+        time.sleep(0.05)
+    assert (user.image_file, user.pending_picture) == (current, None)
+
+
+def test_renditions_written_without_leftover_temp_files(tmp_path):
+    data = io.BytesIO()
+    Image.new('RGB', (800, 600), 'red').save(data, 'JPEG')
+    assert images.render_renditions(data.getvalue(), str(tmp_path), NEW) == images.rendition_name(NEW)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        images.rendition_name(NEW, size, fmt) for size in images.SIZES for fmt in images.FORMATS)
@@ -0,0 +1,13 @@
+# tests/test_indexes.py
+
+"""Chaque requête de route (migrations._route_queries) passe par un index : aucun SCAN de table."""
+
+import migrations
+
+
+def test_route_queries_use_indexes(app):
+    with app.app_context():
+        results = migrations.explain_route_queries()
+    assert results
+    scans = {name: plan for name, plan, ok in results if not ok}
+    assert not scans, scans
@@ -0,0 +1,102 @@
+# tests/test_message_archive.py
+
+"""Messages archivés : toujours trouvés par la recherche, supprimés sans lire toute la conversation."""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+from extensions import db
+from models import User, Match, Message, MessageSegment, conversation_key
+import conversations
+import message_archive
+import search
+import swipes
+
+KEY = conversation_key(1, 2)
+
+
+def archived_conversation(app):
+    """Conversation 1-2 de 20 messages lus, dont les 17 plus anciens archivés en segments de 4."""
+    app.config.update(MESSAGE_ARCHIVE_KEEP_RECENT=3, MESSAGE_SEGMENT_SIZE=4)
+    db.session.execute(insert(User), [
+        {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1)}
+        for i in (1, 2)
+    ])
+    db.session.add(Match.create(1, 2))
+    start = datetime.utcnow() - timedelta(days=30)
+    db.session.execute(insert(Message), [
+        {'sender_id': 1 + i % 2, 'recipient_id': 2 - i % 2, 'conversation_key': KEY,
+         'body': 'une girafe au zoo' if i == 5 else f'message {i}', 'timestamp': start + timedelta(minutes=i)}
+        for i in range(20)
+    ])
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conversations.rebuild_summaries(conn)
+        conn.execute(text('UPDATE conversation_summary SET user1_last_read_id = last_message_id, '
+                          'user2_last_read_id = last_message_id'))
+    assert message_archive.archive_messages(7) == 17
+
+
+def test_archived_messages_stay_searchable(app):
+    with app.app_context():
+        archived_conversation(app)
+        assert len(db.session.scalars(select(MessageSegment)).all()) == 5
+
+        found = search.search_messages(1, 'girafe').results
+        assert [(r['message_id'], r['sender_id'], r['other_id']) for r in found] == [(6, 2, 2)]
+        assert search.search_messages(2, 'message').results[0]['message_id'] == 20   # partie chaude d'abord
+        assert len(search.search_messages(2, 'message', per_page=50).results) == 19
+
+        # Reconstruction depuis les segments : mêmes résultats, index cohérent
+        with db.engine.begin() as conn:
+            search.rebuild(conn)
+            assert search.check(conn) == []
+        assert [r['message_id'] for r in search.search_messages(1, 'girafe').results] == [6]
+
+
+def test_delete_archived_message_reads_one_segment(app, monkeypatch):
+    with app.app_context():
+        archived_conversation(app)
+        match = Match.between(1, 2).first()
+        message = search.search_messages(1, 'girafe').results[0]
+
+        decoded = []
+        decode = message_archive.decode
+        monkeypatch.setattr(message_archive, 'decode', lambda data, key: decoded.append(key) or decode(data, key))
+        assert conversations.delete_message(match, 6, 2, message['timestamp'])
+        monkeypatch.undo()
+        db.session.commit()
+        assert len(decoded) == 1
+        assert search.search_messages(1, 'girafe').results == []
+        assert len(search.search_messages(1, 'message', per_page=50).results) == 19
+
+        # Sans date : plage d'ID des segments ; un message d'un autre expéditeur n'est pas supprimé
+        assert not conversations.delete_message(match, 7, 2)
+        assert conversations.delete_message(match, 7, 1)
+        db.session.commit()
+        assert len(search.search_messages(1, 'message', per_page=50).results) == 18
+
+
+def test_unmatch_removes_archived_messages_from_search(app):
+    with app.app_context():
+        archived_conversation(app)
+        swipes.unmatch(Match.between(1, 2).first())
+        db.session.commit()
+        assert search.search_messages(1, 'girafe').results == []
+        assert db.session.scalar(text("SELECT count(*) FROM message_archive_fts WHERE message_archive_fts MATCH 'message'")) == 0
+        with db.engine.connect() as conn:
+            assert search.check(conn) == []
+
+
+def test_search_cursor_page_ends_on_message(app):
+    with app.app_context():
+        archived_conversation(app)
+        # Message archivé (6) puis message resté dans Message (19)
+        for message_id, word in ((6, 'girafe'), (19, '18')):
+            result = next(r for r in search.search_messages(1, word).results if r['message_id'] == message_id)
+            until = conversations.decode_cursor(result['cursor'])
+            messages, older = conversations.history_page(1, 2, 4, until=until)
+            assert [m.id for m in messages] == list(range(message_id - 3, message_id + 1))
+            assert conversations.decode_cursor(older) == (messages[0].timestamp, messages[0].id)
@@ -0,0 +1,35 @@
+# tests/test_metrics.py
+
+"""/metrics : absente sans METRICS_TOKEN, réservée au porteur du jeton sinon."""
+
+import pytest
+
+from app import create_app
+from config import Config
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    def make(token):
+        class MetricsConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'metrics.db')
+            PASSWORD_HASH_WORKERS = 0
+            METRICS_ENABLED = True
+            METRICS_TOKEN = token
+        return create_app(MetricsConfig)
+    return make
+
+
+def test_metrics_disabled_without_token(metrics_app):
+    assert metrics_app('').test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_requires_bearer_token(metrics_app):
+    client = metrics_app('s3cret').test_client()
+    client.get('/login')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert b'auth.login' in response.data
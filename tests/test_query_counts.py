@@ -0,0 +1,115 @@
+# tests/test_query_counts.py
+
+"""
+Nombre de requêtes SQL par route : plafond fixe, et indépendant du nombre de
+matchs (pas de N+1).
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from extensions import db
+from models import User, Match, Message, conversation_key
+import conversations
+import engagement
+
+MATCH_COUNTS = [1, 10, 50]
+
+# Plafond de requêtes SQL par route (utilisateur connecté, conversation avec l'utilisateur 2)
+# Vues @database.read_only : leurs SELECT peuvent aller au moteur 'replica', elles n'écrivent jamais
+READ_ONLY_ROUTES = ['/matches', '/inbox', '/profile/2', '/users/2', '/search?q=salut']
+
+CEILINGS = {
+    '/feed': 3,
+    '/matches': 3,
+    '/inbox': 4,
+    '/chat/2': 6,
+    '/chat/2/messages?after=0': 3,
+    '/profile/2': 4,
+    '/users/2': 3,
+    '/search?q=salut': 4,   # + message_archive_fts (messages archivés)
+}
+
+
+def seed(n_users, matches):
+    """Utilisateurs 1..n_users ; matchs {user_id: [autres]} avec trois messages chacun."""
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+         'date_of_birth': date(1995, 1, 1), 'city': 'Paris', 'city_key': 'paris', 'image_file': 'default.jpg'}
+        for i in range(1, n_users + 1)
+    ])
+    start = datetime.utcnow() - timedelta(days=1)
+    for user_id, others in matches.items():
+        db.session.add_all(Match.create(user_id, other) for other in others)
+        db.session.execute(insert(Message), [
+            {'sender_id': sender, 'recipient_id': recipient, 'body': f'salut {i}',
+             'timestamp': start + timedelta(minutes=i), 'conversation_key': conversation_key(user_id, other)}
+            for other in others
+            for i, (sender, recipient) in enumerate([(user_id, other), (other, user_id), (user_id, other)])
+        ])
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conversations.rebuild_summaries(conn)
+        engagement.rebuild_stats(conn)
+
+
+def executed(app, user_id, url):
+    """Requêtes SQL exécutées par GET url, utilisateur user_id connecté."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200, (url, response.status_code)
+    return statements
+
+
+def count_queries(app, user_id, url):
+    return len(executed(app, user_id, url))
+
+
+@pytest.fixture
+def users_with_matches(app):
+    """Les utilisateurs 1, 2, 3 ont respectivement MATCH_COUNTS matchs."""
+    first_other = len(MATCH_COUNTS) + 1
+    matches = {
+        user_id: list(range(first_other, first_other + count))
+        for user_id, count in enumerate(MATCH_COUNTS, start=1)
+    }
+    matches[1].append(2)   # l'utilisateur 1 discute aussi avec l'utilisateur 2
+    with app.app_context():
+        seed(first_other + max(MATCH_COUNTS), matches)
+    return app
+
+
+@pytest.mark.parametrize('url', CEILINGS)
+def test_route_query_ceiling(users_with_matches, url):
+    count_queries(users_with_matches, 1, url)   # première visite : file du feed, caches
+    assert count_queries(users_with_matches, 1, url) <= CEILINGS[url]
+
+
+@pytest.mark.parametrize('url', ['/matches', '/inbox'])
+def test_query_count_independent_of_matches(users_with_matches, url):
+    counts = {count: count_queries(users_with_matches, user_id, url)
+              for user_id, count in enumerate(MATCH_COUNTS, start=1)}
+    assert len(set(counts.values())) == 1, counts
+
+
+@pytest.mark.parametrize('url', READ_ONLY_ROUTES)
+def test_read_only_routes_never_write(users_with_matches, url):
+    statements = executed(users_with_matches, 1, url)
+    assert not [s for s in statements if s.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE')]
@@ -0,0 +1,14 @@
+# tests/test_seeding.py
+
+"""Les comptes générés se connectent avec SEED_PASSWORD par le formulaire de connexion."""
+
+import seeding
+
+
+def test_seeded_account_can_log_in(app):
+    with app.app_context():
+        seeding.generate(5, 10, n_matches=1, messages_per_match=2)
+    response = app.test_client().post('/login', data={
+        'email': f'user1@{seeding.SEED_EMAIL_DOMAIN}', 'password': seeding.SEED_PASSWORD,
+    })
+    assert response.status_code == 302
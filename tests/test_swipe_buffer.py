@@ -0,0 +1,63 @@
+# tests/test_swipe_buffer.py
+
+"""Vidage du buffer de swipes : heure de chaque clic conservée, matchs tardifs annoncés."""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from models import User, Swipe, Match
+import swipe_buffer
+
+
+def test_flush_keeps_timestamps_and_reports_late_matches(app, tmp_path):
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+             'date_of_birth': date(1995, 1, 1)}
+            for i in (1, 2, 3)
+        ])
+        db.session.commit()
+
+    # Deux workers : chacun a reçu un des deux likes réciproques, jamais vus l'un par l'autre
+    first, second = datetime(2026, 1, 1, 12), datetime(2026, 1, 1, 12, 5)
+    buffer = swipe_buffer.SwipeBuffer(app, str(tmp_path / 'logs'), interval_ms=60000)
+    buffer.append(1, {2: True}, first)
+    buffer.append(2, {3: False}, first)
+    buffer.append(2, {1: True}, second)
+    assert buffer.flush() == 3
+    buffer.close()
+
+    with app.app_context():
+        stamps = dict(db.session.execute(select(Swipe.swiped_id, Swipe.timestamp).where(Swipe.swiper_id == 2)).all())
+        assert stamps == {3: first, 1: second}
+        assert db.session.scalar(select(Match.timestamp)) == second
+
+        # Annoncé une seule fois, au swiper qui a complété le match
+        assert swipe_buffer.take_match_notices(1) == []
+        assert [user.id for user in swipe_buffer.take_match_notices(2)] == [1]
+        assert swipe_buffer.take_match_notices(2) == []
+
+
+def test_late_match_reported_with_next_swipe(app, tmp_path):
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': f'User{i}',
+             'date_of_birth': date(1995, 1, 1)}
+            for i in (1, 2, 3)
+        ])
+        db.session.commit()
+    buffer = swipe_buffer.SwipeBuffer(app, str(tmp_path / 'logs'), interval_ms=60000)
+    now = datetime.utcnow() - timedelta(minutes=1)
+    buffer.append(1, {2: True}, now)
+    buffer.append(2, {1: True}, now)
+    buffer.flush()
+    buffer.close()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '2'
+        sess['_fresh'] = True
+    response = client.post('/api/swipes', json={'swipes': [{'user_id': 3, 'action': 'dislike'}]})
+    assert response.json['matches'] == [{'user_id': 1, 'first_name': 'User1'}]
@@ -0,0 +1,33 @@
+# tests/test_tags.py
+
+"""UserTag suit User.vibe_tags, quel que soit le chemin d'écriture."""
+
+from datetime import date
+
+from extensions import db
+from models import User
+import tags
+
+
+def test_user_tags_follow_vibe_tags(app):
+    with app.app_context():
+        user = User(email='a@example.com', password_hash='x', first_name='Alice',
+                    date_of_birth=date(1995, 1, 1), vibe_tags='["Techno", "jazz "]')
+        db.session.add(user)
+        db.session.commit()
+        assert tags.user_tag_names(user.id) == ['jazz', 'techno']
+
+        # Ancien format texte écrit directement dans la colonne
+        user.vibe_tags = 'rock, Techno'
+        db.session.commit()
+        assert tags.user_tag_names(user.id) == ['rock', 'techno']
+
+        tags.set_user_tags(user, ['  Vélo ', 'vélo', ''])
+        db.session.commit()
+        assert tags.user_tag_names(user.id) == ['vélo']
+        assert user.vibe_tags == '["vélo"]'
+
+        # Autre modification du profil : les tags ne sont pas réécrits
+        user.city = 'Lyon'
+        db.session.commit()
+        assert tags.user_tag_names(user.id) == ['vélo']
@@ -0,0 +1,29 @@
+# tests/test_user_version.py
+
+"""User.version est incrémenté par SQLite, même depuis une copie périmée de l'utilisateur."""
+
+from datetime import date
+
+from extensions import db
+from models import User
+
+
+def test_concurrent_writers_get_distinct_versions(app):
+    with app.app_context():
+        user = User(email='a@example.com', password_hash='x', first_name='Alice', date_of_birth=date(1995, 1, 1))
+        db.session.add(user)
+        db.session.commit()
+        user_id, version = user.id, user.version
+
+    # Deux requêtes chargent la même version, puis écrivent chacune à leur tour
+    with app.app_context():
+        first = db.session.get(User, user_id)
+        assert first.version == version
+        with app.app_context():
+            second = db.session.get(User, user_id)
+            second.city = 'Lyon'
+            db.session.commit()
+            assert second.version == version + 1
+        first.icebreaker_1 = 'hello'
+        db.session.commit()
+        assert first.version == version + 2
@@ -0,0 +1,169 @@
+# user_cache.py
+
+"""
+Cache (optionnel) des utilisateurs chargés par Flask-Login.
+
+load_user() est appelé à chaque requête authentifiée ; avec ce cache, le
+SELECT par clé primaire n'a lieu qu'en cas d'absence ou d'expiration.
+On ne met en cache qu'un instantané des colonnes (dict), jamais l'objet ORM :
+en cas de succès, l'objet est rattaché à la session sans requête
+(merge(load=False)).
+
+Le stockage passe par une interface minimale (CacheBackend) pour pouvoir
+brancher plus tard un cache partagé entre processus. Invalidation :
+toute modification ORM d'un User (profil, photo, mot de passe) invalide
+l'entrée au commit ; les UPDATE groupés doivent appeler invalidate().
+
+Configuration : USER_CACHE_BACKEND = 'local' (LRU + TTL en mémoire) ou 'none'.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from extensions import db
+from models import User
+
+
+class CacheBackend:
+    """Interface d'un stockage clé -> valeur avec durée de vie."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Cache désactivé : chaque appel va jusqu'à la base."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class LocalTTLCache(CacheBackend):
+    """LRU en mémoire du processus, avec expiration après `ttl` secondes."""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # {clé: (expire_à, valeur)}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class UserCache:
+    """Cache des utilisateurs + compteurs de succès / échecs / invalidations."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, user_id):
+        return f'user:{user_id}'
+
+    def get_user(self, user_id):
+        """Renvoie l'utilisateur (attaché à la session courante) ou None."""
+        snapshot = self.backend.get(self._key(user_id))
+        if snapshot is not None:
+            self.hits += 1
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        self.misses += 1
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.backend.set(self._key(user_id), _snapshot(user))
+        return user
+
+    def invalidate(self, user_id):
+        self.invalidations += 1
+        self.backend.delete(self._key(user_id))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+def _snapshot(user):
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def make_backend(config):
+    if config.get('USER_CACHE_BACKEND') == 'local':
+        return LocalTTLCache(maxsize=config['USER_CACHE_MAXSIZE'], ttl=config['USER_CACHE_TTL'])
+    return NullCache()
+
+
+cache = UserCache(NullCache())
+
+
+def init_app(app):
+    cache.backend = make_backend(app.config)
+    app.extensions['user_cache'] = cache
+
+
+# --- INVALIDATION AUTOMATIQUE ---
+# Les utilisateurs modifiés sont notés au flush, puis invalidés après le commit
+# (invalider avant risquerait de remettre en cache l'ancienne version).
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _remember_changed_user(mapper, connection, user):
+    session = Session.object_session(user)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(user.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
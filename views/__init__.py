@@ -0,0 +1,27 @@
+# views/__init__.py
+
+"""
+Routes de l'application, regroupées en blueprints :
+
+    main       accueil, à propos
+    auth       inscription, connexion, déconnexion
+    feed       paquet de profils, swipes, matchs
+    messaging  boîte de réception, chat, recherche
+    profile    pages de profil, photo, préférences de découverte
+
+Les endpoints sont préfixés par le nom du blueprint : url_for('feed.feed'),
+url_for('messaging.chat', user_id=...).
+"""
+
+from views.auth import bp as auth_bp
+from views.feed import bp as feed_bp
+from views.main import bp as main_bp
+from views.messaging import bp as messaging_bp
+from views.profile import bp as profile_bp
+
+BLUEPRINTS = [main_bp, auth_bp, feed_bp, messaging_bp, profile_bp]
+
+
+def init_app(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
@@ -0,0 +1,107 @@
+# views/auth.py
+
+from flask import Blueprint, render_template, url_for, flash, redirect, request, make_response
+from flask_login import login_user, current_user, logout_user
+
+from extensions import db, login_manager
+from forms import RegistrationForm, LoginForm
+from models import User
+import loaders
+import passwords
+import user_cache
+
+bp = Blueprint('auth', __name__)
+
+
+# --- FONCTION DE CHARGEMENT UTILISATEUR POUR FLASK-LOGIN ---
+
+@login_manager.user_loader
+def load_user(user_id):
+    """Indique à Flask-Login comment recharger un utilisateur."""
+    # 1. Cache des utilisateurs (optionnel, voir user_cache.py) : évite le SELECT par requête
+    user = user_cache.cache.get_user(int(user_id))
+    # 2. Partagé avec le chargeur de la requête : les vues qui relisent current_user le trouvent
+    if user is not None:
+        loaders.get_loader().prime(user)
+    return user
+
+
+# --- ROUTES D'AUTHENTIFICATION ---
+
+def hashing_busy(template, **context):
+    """Pool de hachage saturé : 503 immédiat, le formulaire reste rempli."""
+    flash("Beaucoup de monde se connecte en ce moment. Réessayez dans quelques secondes.", 'warning')
+    response = make_response(render_template(template, **context), 503)
+    response.headers['Retry-After'] = str(passwords.RETRY_AFTER_S)
+    return response
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.home'))
+
+    form = RegistrationForm()
+
+    if form.validate_on_submit():
+        user = User(
+            email=form.email.data,
+            first_name=form.first_name.data,
+            date_of_birth=form.date_of_birth.data,
+            city=form.city.data,
+            icebreaker_1=form.icebreaker_1.data,
+            icebreaker_2=form.icebreaker_2.data,
+            icebreaker_3=form.icebreaker_3.data,
+        )
+        # Hachage et stockage du mot de passe (pool borné, voir passwords.py)
+        try:
+            user.set_password(form.password.data)
+        except passwords.HashingBusy:
+            return hashing_busy('auth/register.html', title='Inscription', form=form)
+
+        db.session.add(user)
+        db.session.commit()
+
+        flash(f'Bienvenue à bord, {form.first_name.data} ! Votre compte est créé. Connectez-vous maintenant.', 'success')
+        return redirect(url_for('auth.login'))
+
+    return render_template('auth/register.html', title='Inscription', form=form)
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.home'))
+
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+
+        # Vérification du mot de passe (pool borné, voir passwords.py)
+        try:
+            password_ok = user is not None and user.check_password(form.password.data)
+        except passwords.HashingBusy:
+            return hashing_busy('auth/login.html', title='Connexion', form=form)
+
+        if password_ok:
+            # Hash recalculé avec les paramètres actuels (PASSWORD_HASH_METHOD...)
+            if user in db.session.dirty:
+                db.session.commit()
+            # Connexion réussie
+            login_user(user, remember=form.remember.data)
+
+            # Gestion de la redirection après connexion
+            next_page = request.args.get('next')
+            flash('Connexion réussie. Bienvenue de retour !', 'success')
+            return redirect(next_page or url_for('main.home'))
+        else:
+            flash('Échec de la connexion. Veuillez vérifier votre email et mot de passe.', 'danger')
+
+    return render_template('auth/login.html', title='Connexion', form=form)
+
+
+@bp.route('/logout')
+def logout():
+    logout_user()
+    flash('Vous êtes déconnecté. À bientôt !', 'info')
+    return redirect(url_for('main.home'))
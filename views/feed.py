@@ -0,0 +1,175 @@
+# views/feed.py
+
+from flask import Blueprint, current_app, render_template, url_for, flash, redirect, request, jsonify
+from flask_login import current_user, login_required
+from sqlalchemy import select
+
+from extensions import db
+from models import User, Match
+import candidates
+import database
+import loaders
+import profile_cache
+import swipe_buffer
+import swipes
+
+bp = Blueprint('feed', __name__)
+
+
+# --- ROUTE PROTÉGÉE /feed (unique, logique de swipe) ---
+@bp.route('/feed')
+@login_required
+def feed():
+    """
+    Affiche un paquet des prochains profils à swiper (FEED_DECK_SIZE, ou ?n=).
+
+    Le premier profil est visible ; static/js/main.js fait défiler les suivants
+    sans recharger la page, renvoie les décisions par lots à /api/swipes et
+    demande le paquet suivant en JSON (?format=json&exclude=<id,...>) avant
+    d'arriver au bout. Sans JavaScript, les liens de la carte gardent le
+    parcours /swipe -> /feed.
+
+    Pas de @read_only : la file de candidats est rechargée ou purgée pendant
+    la lecture du paquet (voir candidates.next_candidates), et le rendu des
+    cartes (profile_cache) ne fait aucune requête.
+    """
+    config = current_app.config
+    size = max(1, min(request.args.get('n', config['FEED_DECK_SIZE'], type=int), config['FEED_DECK_MAX']))
+    # Profils encore dans le paquet du navigateur ou dont la décision n'est pas encore envoyée :
+    # au plus deux paquets et un lot de décisions. Au-delà, refus plutôt qu'une troncature
+    # qui renverrait au client des profils qu'il a déjà
+    exclude = [int(i) for i in request.args.get('exclude', '').split(',') if i.isdigit()]
+    exclude_max = 2 * config['FEED_DECK_MAX'] + config['SWIPE_BATCH_MAX']
+    if len(exclude) > exclude_max:
+        return jsonify(error=f"{exclude_max} profils exclus maximum par requête."), 400
+
+    # Prochains candidats non vus, tirés de la file pré-calculée (voir candidates.py)
+    deck = candidates.next_candidates(current_user.id, size, exclude)
+    cards = [
+        {'user_id': user.id, 'first_name': user.first_name, 'html': str(profile_cache.cards.render(user))}
+        for user in deck
+    ]
+    if request.args.get('format') == 'json':
+        return jsonify(cards=cards, exhausted=len(deck) < size)
+
+    if not deck:
+        return render_template('feed/feed_empty.html')
+    deck_data = {
+        'user_ids': [user.id for user in deck],
+        'exhausted': len(deck) < size,
+        'deck_size': size,
+        'feed_url': url_for('feed.feed'),
+        'deck_url': url_for('feed.feed', format='json', n=size),
+        'swipes_url': url_for('feed.api_swipes'),
+        'swipe_batch_max': config['SWIPE_BATCH_MAX'],
+    }
+    return render_template('feed/feed.html', cards=cards, deck_data=deck_data)
+
+
+@bp.route('/swipe/<int:swiped_id>/<action>')
+@login_required
+def swipe(swiped_id, action):
+    """
+    Enregistre l'action de swipe (like/dislike) et vérifie s'il y a un match.
+    """
+
+    # 1. Vérifications de sécurité de base
+    if not action in ['like', 'dislike']:
+        flash("Action non valide.", "danger")
+        return redirect(url_for('feed.feed'))
+
+    if swiped_id == current_user.id:
+        flash("Vous ne pouvez pas vous swiper vous-même !", "warning")
+        return redirect(url_for('feed.feed'))
+
+    # 2. Enregistrer le swipe et détecter un éventuel match en une transaction
+    #    (même chemin que l'API groupée /api/swipes, voir swipes.py ;
+    #    buffer d'écriture si SWIPE_WRITE_MODE = 'buffered', voir swipe_buffer.py)
+    result = swipe_buffer.submit(current_user.id, {swiped_id: swipes.ACTIONS[action]})
+    db.session.commit()
+
+    if result.skipped:
+        flash("Vous avez déjà vu ce profil.", "info")
+
+    # 3. --- LOGIQUE DE MATCH --- C'EST UN MATCH ! (ou "It's a Vibe!")
+    for matched_user in result.matches:
+        flash(f"C'est un Vibe ! Vous avez matché avec {matched_user.first_name}.", "success")
+
+    # 4. Rediriger vers le feed pour le prochain profil
+    return redirect(url_for('feed.feed'))
+
+
+@bp.route('/api/swipes', methods=['POST'])
+@login_required
+def api_swipes():
+    """
+    Enregistre un lot de swipes (ex: décisions prises hors-ligne sur mobile).
+
+    Corps JSON : {"swipes": [{"user_id": 12, "action": "like"}, ...]}
+    Réponse : {"recorded": [...], "skipped": [...], "invalid": [...], "matches": [...]}
+    """
+    batch_max = current_app.config['SWIPE_BATCH_MAX']
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('swipes')
+    if not isinstance(entries, list):
+        return jsonify(error="Le champ 'swipes' doit être une liste."), 400
+    if len(entries) > batch_max:
+        return jsonify(error=f"{batch_max} swipes maximum par requête."), 413
+
+    # 1. Validation ; la première décision sur un profil l'emporte
+    decisions = {}
+    accepted = []
+    invalid = []
+    for entry in entries:
+        swiped_id = entry.get('user_id') if isinstance(entry, dict) else None
+        action = entry.get('action') if isinstance(entry, dict) else None
+        if (not isinstance(swiped_id, int) or isinstance(swiped_id, bool)
+                or action not in swipes.ACTIONS or swiped_id == current_user.id):
+            invalid.append(entry)
+            continue
+        accepted.append(entry)
+        decisions.setdefault(swiped_id, swipes.ACTIONS[action])
+
+    # 2. Profils inexistants, en une requête (SQLite n'applique pas la clé étrangère de Swipe)
+    if decisions:
+        unknown = set(decisions) - set(db.session.scalars(select(User.id).where(User.id.in_(decisions))))
+        invalid += [entry for entry in accepted if entry['user_id'] in unknown]
+        for swiped_id in unknown:
+            del decisions[swiped_id]
+
+    # 3. Tout le lot dans une seule transaction
+    result = swipe_buffer.submit(current_user.id, decisions)
+    db.session.commit()
+
+    return jsonify(invalid=invalid, **result.to_dict())
+
+
+@bp.route('/matches')
+@database.read_only   # SELECT servis par le moteur 'replica' en production
+@login_required
+def matches():
+    """
+    Affiche tous les matches de l'utilisateur connecté.
+    """
+    # Récupérer tous les matches où l'utilisateur est impliqué
+    user_matches = Match.for_user(current_user.id).order_by(Match.timestamp.desc()).all()
+
+    # Charger tous les profils matchés en une seule requête IN (plus de N+1)
+    loader = loaders.get_loader()
+    loader.prime(*user_matches)
+    loader.want(User, [match.other_user_id(current_user.id) for match in user_matches])
+
+    # Créer une liste des profils matchés avec leurs infos
+    matched_users = []
+    for match in user_matches:
+        # Déterminer qui est l'autre utilisateur
+        other_user_id = match.other_user_id(current_user.id)
+        other_user = loader.load(User, other_user_id)
+
+        if other_user:
+            matched_users.append({
+                'user': other_user,
+                'match_date': match.timestamp
+            })
+
+    return render_template('matches.html', matches=matched_users, total=len(matched_users))
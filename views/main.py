@@ -0,0 +1,16 @@
+# views/main.py
+
+from flask import Blueprint, render_template
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/')
+def home():
+    slogan = "Plus que des likes, des connexions réelles."
+    return render_template('home.html', slogan=slogan)
+
+
+@bp.route('/about')
+def about():
+    return render_template('about.html')
@@ -0,0 +1,216 @@
+# views/messaging.py
+
+from datetime import datetime
+
+from flask import Blueprint, current_app, render_template, url_for, flash, redirect, request, jsonify, abort
+from flask_login import current_user, login_required
+
+from extensions import db
+from forms import MessageForm, ConfirmForm
+from models import User, Message
+import conversations
+import database
+import engagement
+import loaders
+import realtime
+import search
+import swipes
+
+bp = Blueprint('messaging', __name__)
+
+
+@bp.route('/inbox')
+@database.read_only   # SELECT servis par le moteur 'replica' en production
+@login_required
+def inbox():
+    """
+    Affiche la liste de tous les matchs (conversations) de l'utilisateur.
+    """
+
+    # Une seule requête indexée sur les résumés de conversation (voir conversations.py),
+    # triée par dernière activité, avec aperçu du dernier message et non-lus
+    conversations_list = [
+        {
+            'user': other_user,
+            'snippet': summary.last_message_snippet,
+            'last_sender_id': summary.last_sender_id,
+            'last_activity_at': summary.last_activity_at,
+            'unread': summary.unread_for(current_user.id),
+        }
+        for summary, other_user in conversations.inbox(current_user.id)
+    ]
+
+    # "Ils t'ont liké" : likes reçus sans réponse, lus dans PendingLike (voir engagement.py)
+    pending_likes = [
+        {'user': liker, 'liked_at': pending.timestamp}
+        for pending, liker in engagement.pending_likes(current_user.id, current_app.config['INBOX_PENDING_LIKES'])
+    ]
+
+    return render_template('messaging/inbox.html', conversations=conversations_list,
+                           pending_likes=pending_likes,
+                           pending_count=engagement.pending_count(current_user.id) if pending_likes else 0,
+                           stats=engagement.stats_for(current_user.id))
+
+
+@bp.route('/search', endpoint='search')
+@database.read_only   # SELECT servis par le moteur 'replica' en production
+@login_required
+def search_results():
+    """
+    Recherche plein texte (voir search.py), limitée aux matchs de l'utilisateur :
+    ?scope=messages (défaut) dans ses conversations, ?scope=profiles dans les
+    icebreakers, villes et vibe tags de ses matchs. Résultats classés par
+    pertinence, paginés (?page=), en JSON avec ?format=json.
+    """
+    query = request.args.get('q', '').strip()
+    scope = 'profiles' if request.args.get('scope') == 'profiles' else 'messages'
+    page = request.args.get('page', 1, type=int)
+    page_size = current_app.config['SEARCH_PAGE_SIZE']
+    if scope == 'profiles':
+        found = search.search_profiles(current_user.id, query, page, page_size)
+    else:
+        found = search.search_messages(current_user.id, query, page, page_size)
+
+    # Profils des résultats chargés en une seule requête IN
+    loader = loaders.get_loader()
+    other_id = 'user_id' if scope == 'profiles' else 'other_id'
+    loader.want(User, [result[other_id] for result in found.results])
+    results = [dict(result, user=loader.load(User, result[other_id])) for result in found.results]
+
+    if request.args.get('format') == 'json':
+        for result in results:
+            user = result.pop('user')
+            result.update(first_name=user.first_name if user else None, snippet=str(result['snippet']))
+            if 'timestamp' in result:
+                result['timestamp'] = result['timestamp'].isoformat()
+        return jsonify(results=results, page=found.page, has_next=found.has_next)
+    return render_template('search.html', query=query, scope=scope, results=results,
+                           page=found.page, has_next=found.has_next)
+
+
+@bp.route('/chat/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def chat(user_id):
+    """
+    Page de conversation individuelle avec un autre utilisateur.
+    """
+
+    # 1. Récupérer l'utilisateur à qui on veut parler
+    recipient = loaders.load_user(user_id) or abort(404)
+
+    # 2. SÉCURITÉ : Vérifier s'il y a un match entre l'utilisateur actuel et le destinataire
+    match = loaders.load_match(current_user.id, user_id)
+
+    if not match:
+        # S'il n'y a pas de match, interdire l'accès
+        flash("Vous ne pouvez discuter qu'avec vos matchs.", "danger")
+        return redirect(url_for('messaging.inbox'))
+
+    # 3. Initialiser le formulaire
+    form = MessageForm()
+
+    # 4. Gérer l'envoi de message (POST)
+    if form.validate_on_submit():
+        new_message = Message(
+            sender_id=current_user.id,
+            recipient_id=user_id,
+            body=form.body.data
+        )
+        db.session.add(new_message)
+        conversations.record_message(match, new_message)  # résumé mis à jour dans la même transaction
+        db.session.commit()
+        # Diffusion aux participants connectés au flux temps réel (voir realtime.py)
+        realtime.hub.publish_message(new_message)
+        if request.accept_mimetypes.best == 'application/json':
+            # Envoi depuis static/js/main.js : pas de rechargement de la page
+            return jsonify(message=conversations.message_to_dict(new_message)), 201
+        # Rediriger vers la même page pour afficher le nouveau message (Pattern Post-Redirect-Get)
+        return redirect(url_for('messaging.chat', user_id=user_id))
+
+    if request.method == 'POST' and request.accept_mimetypes.best == 'application/json':
+        return jsonify(errors=form.errors), 400
+
+    # 5. La conversation est lue : remise à zéro des non-lus (écriture seulement si besoin)
+    if conversations.mark_read(match, current_user.id):
+        db.session.commit()
+
+    # 6. Récupérer une page de l'historique (GET) : les N derniers messages,
+    #    ceux précédant le curseur ?before=... ("charger plus anciens"), ou la page
+    #    qui se termine sur le message ?until=... (lien d'un résultat de recherche)
+    before = conversations.decode_cursor(request.args.get('before'))
+    until = conversations.decode_cursor(request.args.get('until'))
+    messages, older_cursor = conversations.history_page(
+        current_user.id, user_id, current_app.config['CHAT_PAGE_SIZE'], before=before, until=until
+    )
+
+    # Flux SSE à partir du dernier message affiché, sur la page la plus récente seulement
+    # (None si REALTIME_MODE = 'off')
+    is_latest = before is None and until is None
+    events_url = realtime.events_url(user_id, after_id=messages[-1].id if messages else 0) if is_latest else None
+
+    return render_template('messaging/chat.html',
+                                recipient=recipient,
+                                form=form,
+                                confirm_form=ConfirmForm(),
+                                messages=messages,
+                                older_cursor=older_cursor,
+                                events_url=events_url)
+
+
+@bp.route('/chat/<int:user_id>/messages/<int:message_id>/delete', methods=['POST'])
+@login_required
+def delete_message(user_id, message_id):
+    """
+    Supprime un de ses propres messages, même archivé (voir message_archive.py).
+    """
+    match = loaders.load_match(current_user.id, user_id)
+    if not match or not ConfirmForm().validate_on_submit():
+        abort(403)
+    # ?at= : date du message, pour ne lire qu'un segment s'il est archivé
+    try:
+        timestamp = datetime.fromisoformat(request.args.get('at', ''))
+    except ValueError:
+        timestamp = None
+    if conversations.delete_message(match, message_id, current_user.id, timestamp):
+        db.session.commit()
+        flash("Message supprimé.", "info")
+    else:
+        flash("Ce message n'existe pas ou ne vous appartient pas.", "warning")
+    # Retour à la page d'historique affichée (?before= / ?until=, transmis par le formulaire)
+    return redirect(url_for('messaging.chat', user_id=user_id, before=request.args.get('before'),
+                            until=request.args.get('until')))
+
+
+@bp.route('/chat/<int:user_id>/unmatch', methods=['POST'])
+@login_required
+def unmatch(user_id):
+    """
+    Met fin au match : la conversation (messages archivés compris) est supprimée.
+    """
+    match = loaders.load_match(current_user.id, user_id)
+    if not match or not ConfirmForm().validate_on_submit():
+        abort(403)
+    swipes.unmatch(match)
+    db.session.commit()
+    flash("Le match est terminé, la conversation a été supprimée.", "info")
+    return redirect(url_for('messaging.inbox'))
+
+
+@bp.route('/chat/<int:user_id>/messages')
+@login_required
+def chat_messages(user_id):
+    """
+    Rafraîchissement léger du chat (JSON) : uniquement les messages
+    postérieurs à ?after=<message_id>, sans re-rendre chat.html.
+    """
+    if not loaders.load_match(current_user.id, user_id):
+        return jsonify(error="Vous ne pouvez discuter qu'avec vos matchs."), 403
+
+    after_id = request.args.get('after', 0, type=int)
+    messages = conversations.messages_after(
+        current_user.id, user_id, after_id, current_app.config['CHAT_PAGE_SIZE']
+    )
+    return jsonify(
+        messages=[conversations.message_to_dict(m) for m in messages],
+        last_id=messages[-1].id if messages else after_id,
+    )
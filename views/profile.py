@@ -0,0 +1,121 @@
+# views/profile.py
+
+from flask import Blueprint, current_app, render_template, url_for, flash, redirect, request, abort, make_response
+from flask_login import current_user, login_required
+
+from extensions import db
+from forms import UpdateProfileForm, DiscoveryForm
+import database
+import discovery
+import engagement
+import images
+import loaders
+import profile_cache
+import tags
+
+bp = Blueprint('profile', __name__)
+
+
+@bp.route('/users/<int:user_id>')
+@database.read_only   # SELECT servis par le moteur 'replica' en production
+@login_required
+def user_profile(user_id):   # <--- renommé de 'profile' en 'user_profile'
+    user = loaders.load_user(user_id) or abort(404)
+    stats = engagement.stats_for(user.id)   # compteurs affichés : ils font partie de l'ETag
+    # 304 si le navigateur a déjà cette version du profil (voir profile_cache.py)
+    unchanged = profile_cache.not_modified(user, current_user.id, stats)
+    if unchanged:
+        return unchanged
+    response = make_response(render_template('users/profil.html', user=user, stats=stats))
+    return profile_cache.set_validators(response, user, current_user.id, stats)
+
+
+# Edition du profil — nom/fonction et URL différents pour éviter conflit
+@bp.route('/profile/<int:user_id>/edit', endpoint='profile_edit', methods=['GET', 'POST'])
+@login_required
+def profile_edit(user_id):
+    user = loaders.load_user(user_id) or abort(404)
+    # ...gestion du formulaire d'édition...
+    return render_template('users/update_profile.html', user=user)
+
+
+@bp.route('/profile/<int:user_id>')
+@database.read_only   # SELECT servis par le moteur 'replica' en production
+@login_required
+def profile(user_id):
+    user = loaders.load_user(user_id) or abort(404)
+
+    # Likes reçus / envoyés et matchs (une lecture par clé primaire, voir engagement.py)
+    stats = engagement.stats_for(user.id)
+
+    # 304 si le navigateur a déjà cette version du profil (voir profile_cache.py)
+    unchanged = profile_cache.not_modified(user, current_user.id, stats)
+    if unchanged:
+        return unchanged
+
+    # âge calculé par le modèle (User.age)
+    age = user.age
+
+    # vibe tags normalisés (table user_tag, voir tags.py) : plus de parsing à chaque vue
+    vibe_tags = tags.user_tag_names(user.id)
+
+    response = make_response(render_template('users/profil.html', user=user, age=age, vibe_tags=vibe_tags,
+                                             stats=stats))
+    return profile_cache.set_validators(response, user, current_user.id, stats)
+
+
+# Fonction pour vérifier l'extension du fichier
+def allowed_file(filename):
+    return '.' in filename and \
+            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+
+@bp.route('/settings/picture', methods=['GET', 'POST'])
+@login_required
+def update_picture():
+    form = UpdateProfileForm()
+
+    if form.validate_on_submit():
+        if form.picture.data and allowed_file(form.picture.data.filename):
+
+            # 1. Sauvegarder l'image et mettre à jour image_file : les déclinaisons
+            #    (WebP/JPEG, plusieurs tailles) sont générées en arrière-plan (voir images.py)
+            ready = images.store_upload(current_app._get_current_object(), current_user, form.picture.data)
+
+            db.session.commit()
+            if ready:
+                flash('Votre photo de profil a été mise à jour !', 'success')
+            else:
+                flash('Votre photo est en cours de traitement, elle apparaîtra dans quelques instants.', 'info')
+            return redirect(url_for('profile.profile', user_id=current_user.id))
+
+        elif form.picture.data and not allowed_file(form.picture.data.filename):
+            flash('Erreur : Type de fichier non supporté.', 'danger')
+
+    # L'URL de la photo actuelle
+    image_url = url_for('static', filename='profile_pics/' + current_user.image_file)
+
+    return render_template('users/update_picture.html', title='Photo de Profil', form=form, image_url=image_url)
+
+
+@bp.route('/settings/discovery', methods=['GET', 'POST'])
+@login_required
+def discovery_settings():
+    """Ville et tranche d'âge des profils proposés dans le feed (voir discovery.py)."""
+    preferences = discovery.get_preferences(current_user.id)
+    form = DiscoveryForm()
+
+    if form.validate_on_submit():
+        discovery.save_preferences(current_user.id, form.city.data.strip(),
+                                   form.min_age.data, form.max_age.data)
+        db.session.commit()
+        flash('Tes préférences de découverte sont enregistrées !', 'success')
+        return redirect(url_for('feed.feed'))
+
+    if request.method == 'GET':
+        # Par défaut : sa propre ville, tous les âges
+        form.city.data = preferences.city if preferences else current_user.city
+        form.min_age.data = (preferences and preferences.min_age) or discovery.MIN_AGE
+        form.max_age.data = (preferences and preferences.max_age) or discovery.MAX_AGE
+
+    return render_template('users/discovery.html', title='Préférences', form=form)
@@ -0,0 +1,23 @@
+# wsgi.py
+
+"""
+Point d'entrée des serveurs WSGI, prévu pour le préchargement :
+
+    gunicorn --preload -w 4 wsgi:app
+
+L'application est créée une seule fois dans le processus maître (migrations,
+NumPy, templates compilés), puis partagée par les workers après le fork.
+Aucun thread, pool de processus ni connexion SQLite n'est démarré avant :
+le serveur temps réel, le thread du buffer de swipes et les pools de
+hachage et d'images démarrent dans chaque worker à leur première utilisation.
+"""
+
+from dotenv import load_dotenv
+
+# Avant config.py : Config lit os.environ à l'import (`flask` charge .env lui-même)
+load_dotenv()
+
+from app import create_app, warm_up  # noqa: E402
+
+app = create_app()
+warm_up(app)